@@ -1,27 +1,41 @@
 import time
 import hashlib
 import hmac
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 
 # TODO: add support for futures
 # rename to be only for get + post req's. should have more consistent naming, as WS requires different auth
 
+# sha512 of an empty body, the payload hash of every GET/DELETE
+EMPTY_PAYLOAD_HASH = hashlib.sha512(b"").hexdigest()
+
 class AuthGateio:
     def __init__(self, api_key: str, api_secret: str):
         self.api_key = api_key
         self.api_secret = api_secret
+        # keyed once; each signature copies this state instead of re-keying from the secret
+        self._hmac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha512)
+        self._static_headers = {'Accept': 'application/json', 'Content-Type': 'application/json', 'KEY': api_key}
+
+    def _sign(self, method: str, url: str, query_string: Optional[str], payload: Union[str, bytes, None], t: float) -> str:
+        if payload:
+            hashed_payload = hashlib.sha512(payload if isinstance(payload, bytes) else payload.encode('utf-8')).hexdigest()
+        else:
+            hashed_payload = EMPTY_PAYLOAD_HASH
+        mac = self._hmac.copy()
+        mac.update(f'{method}\n{url}\n{query_string or ""}\n{hashed_payload}\n{t}'.encode('utf-8'))
+        return mac.hexdigest()
 
-    def gen_sign(self, method: str, url: str, query_string: Optional[str] = None, payload_string: Optional[str] = None) -> Dict[str, str]:
+    def gen_sign(self, method: str, url: str, query_string: Optional[str] = None, payload_string: Union[str, bytes, None] = None) -> Dict[str, str]:
         t = time.time()
-        m = hashlib.sha512()
-        m.update((payload_string or "").encode('utf-8'))
-        hashed_payload = m.hexdigest()
-        s = f'{method}\n{url}\n{query_string or ""}\n{hashed_payload}\n{t}'
-        sign = hmac.new(self.api_secret.encode('utf-8'), s.encode('utf-8'), hashlib.sha512).hexdigest()
-        return {'KEY': self.api_key, 'Timestamp': str(t), 'SIGN': sign}
+        return {'KEY': self.api_key, 'Timestamp': str(t), 'SIGN': self._sign(method, url, query_string, payload_string, t)}
 
-    def get_headers(self, method: str, url: str, query_string: Optional[str] = None, payload_string: Optional[str] = None) -> Dict[str, str]:
-        headers = self.gen_sign(method, url, query_string, payload_string)
-        headers.update({'Accept': 'application/json', 'Content-Type': 'application/json'})
+    def get_headers(self, method: str, url: str, query_string: Optional[str] = None, payload_string: Union[str, bytes, None] = None) -> Dict[str, str]:
+        """
+        Signed headers including Accept/Content-Type, in one dict.
+        """
+        t = time.time()
+        headers = self._static_headers.copy()
+        headers['Timestamp'] = str(t)
+        headers['SIGN'] = self._sign(method, url, query_string, payload_string, t)
         return headers
-
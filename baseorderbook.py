@@ -1,4 +1,5 @@
 import numpy as np
+from fractions import Fraction
 from numba import njit
 from numba.types import Array, bool_, int64, float64
 from numpy.typing import NDArray
@@ -15,17 +16,130 @@ def nbisin(a: Array, b: Array) -> Array:
 
 
 
+@njit
+def _sort_levels(levels: Array, descending: bool) -> None:
+    # insertion sort in place: updates are a handful of rows and usually
+    # arrive nearly sorted, and a stable sort keeps last-write-wins order
+    for i in range(1, levels.shape[0]):
+        p = levels[i, 0]
+        s = levels[i, 1]
+        j = i - 1
+        while j >= 0 and ((levels[j, 0] < p) if descending else (levels[j, 0] > p)):
+            levels[j + 1, 0] = levels[j, 0]
+            levels[j + 1, 1] = levels[j, 1]
+            j -= 1
+        levels[j + 1, 0] = p
+        levels[j + 1, 1] = s
+
+
+@njit
+def _merge_side(book: Array, updates: Array, out: Array, descending: bool) -> int:
+    """
+    Merges sorted `updates` into the sorted `book` side, writing at most
+    `out.shape[0]` levels into `out`. Zero-size updates delete the level.
+    Returns the number of levels written.
+    """
+    _sort_levels(updates, descending)
+    n = book.shape[0]
+    k = updates.shape[0]
+    limit = out.shape[0]
+    i = 0
+    j = 0
+    m = 0
+    while m < limit and (i < n or j < k):
+        if j < k:
+            # duplicated prices in one update: the last one wins
+            while j + 1 < k and updates[j + 1, 0] == updates[j, 0]:
+                j += 1
+        if j >= k:
+            take_book = True
+            take_update = False
+        elif i >= n:
+            take_book = False
+            take_update = True
+        else:
+            bp = book[i, 0]
+            up = updates[j, 0]
+            if bp == up:
+                # level replaced (or deleted) by the update
+                i += 1
+                take_book = False
+                take_update = True
+            else:
+                take_book = (bp > up) if descending else (bp < up)
+                take_update = not take_book
+
+        if take_book:
+            out[m, 0] = book[i, 0]
+            out[m, 1] = book[i, 1]
+            m += 1
+            i += 1
+        elif take_update:
+            if updates[j, 1] != 0:
+                out[m, 0] = updates[j, 0]
+                out[m, 1] = updates[j, 1]
+                m += 1
+            j += 1
+    return m
+
+
+@njit
+def _set_top(bba: Array, row: int, side: Array, n: int) -> bool:
+    p = side[0, 0] if n > 0 else 0.0
+    s = side[0, 1] if n > 0 else 0.0
+    changed = bba[row, 0] != p or bba[row, 1] != s
+    bba[row, 0] = p
+    bba[row, 1] = s
+    return changed
+
+
+@njit
+def merge_book(bids: Array, bid_updates: Array, bids_out: Array, asks: Array, ask_updates: Array, asks_out: Array, bba: Array) -> tuple:
+    """
+    Applies one depth delta to both sides of a sorted book in a single linear
+    pass per side, writing the new sides into `bids_out`/`asks_out` and the
+    new top of book into `bba`.
+
+    Returns the number of bid and ask levels written (-1 for a side without
+    updates, which is left untouched) and whether the top of book changed.
+    """
+    n_bids = -1
+    n_asks = -1
+    changed = False
+    if bid_updates.shape[0] > 0:
+        n_bids = _merge_side(bids, bid_updates, bids_out, True)
+        changed |= _set_top(bba, 0, bids_out, n_bids)
+    if ask_updates.shape[0] > 0:
+        n_asks = _merge_side(asks, ask_updates, asks_out, False)
+        changed |= _set_top(bba, 1, asks_out, n_asks)
+    return n_bids, n_asks, changed
+
+
 class Orderbook:
+    """
+    Sorted top-`size` orderbook. Bids are kept in descending and asks in
+    ascending price order, merged with each delta by `merge_book` into a pair
+    of reusable buffers per side. `bids` and `asks` are views into those
+    buffers and are only valid until the next update.
+    """
+
     def __init__(self, size: int) -> None:
         self.size = size
         self.asks = np.zeros((0, 2), dtype=np.float64)
         self.bids = np.zeros((0, 2), dtype=np.float64)
         self.bba = np.zeros((2, 2), dtype=np.float64)  # Initialize with correct shape
 
+        # two buffers per side, the merge reads the current one and writes the other
+        self._bid_bufs = np.zeros((2, size, 2), dtype=np.float64)
+        self._ask_bufs = np.zeros((2, size, 2), dtype=np.float64)
+        self._bid_cur = 0
+        self._ask_cur = 0
+        self._empty = np.zeros((0, 2), dtype=np.float64)
+
     def sort_bids(self):
         if self.bids.size > 0:
             #self.bids = self.bids[self.bids[:, 0].argsort()][: self.size]
-            self.bids = self.bids[self.bids[:, 0].argsort()][::-1][: self.size]
+            self.bids = np.ascontiguousarray(self.bids[self.bids[:, 0].argsort()][::-1][: self.size])
 
             self.bba[0, :] = self.bids[0]
         else:
@@ -38,52 +152,73 @@ class Orderbook:
         else:
             self.bba[1, :] = [0, 0]
 
-    def update_bids(self, bids: Array) -> None:
+    def _levels(self, levels: Array) -> Array:
+        if levels.size == 0:
+            return self._empty
+        return levels.reshape(-1, 2)
+
+    def update_bids(self, bids: Array) -> bool:
         """
-        if the size t
-        
+        Updates the current bids with new data. See `update_book`.
         """
+        return self.update_book(bids, self._empty)
 
-        if bids.size == 0:
-            return None
-        
-        self.bids = self.bids[~nbisin(self.bids[:, 0], bids[:, 0])]
-        self.bids = np.vstack((self.bids, bids[bids[:, 1] != 0]))
-        self.sort_bids()
+    def update_asks(self, asks: Array) -> bool:
+        """
+        Updates the current asks with new data. See `update_book`.
+        """
+        return self.update_book(self._empty, asks)
 
-    def update_asks(self, asks: Array) -> None:
+    def update_book(self, bids: Array, asks: Array) -> bool:
         """
-        Updates the current asks with new data. Removes entries with matching
-        prices in update, regardless of size, and then adds non-zero quantity
-        data from update to the book.
+        Updates the current orderbook with new data. Entries with matching
+        prices are replaced by the update, zero quantity updates remove the
+        level, and each side is truncated to `size` levels. Update arrays are
+        sorted in place.
 
         Parameters
         ----------
+        bids : Array
+            New bid orders data, formatted as [[price, size], ...].
         asks : Array
             New ask orders data, formatted as [[price, size], ...].
+
+        Returns
+        -------
+        bool
+            Whether the best bid or ask (price or size) changed. `bids` and
+            `asks` from before the call now point at stale buffer contents.
         """
-        if asks.size == 0:
-            return None
+        bid_out = self._bid_bufs[1 - self._bid_cur]
+        ask_out = self._ask_bufs[1 - self._ask_cur]
+        n_bids, n_asks, changed = merge_book(
+            self.bids, self._levels(bids), bid_out,
+            self.asks, self._levels(asks), ask_out,
+            self.bba,
+        )
+        if n_bids >= 0:
+            self._bid_cur = 1 - self._bid_cur
+            self.bids = bid_out[:n_bids]
+        if n_asks >= 0:
+            self._ask_cur = 1 - self._ask_cur
+            self.asks = ask_out[:n_asks]
+        return changed
 
-        self.asks = self.asks[~nbisin(self.asks[:, 0], asks[:, 0])]
-        self.asks = np.vstack((self.asks, asks[asks[:, 1] != 0]))
-        self.sort_asks()
-            
-    def update_book(self, bids: Array, asks: Array) -> None:
+    def load_snapshot(self, bids: Array, asks: Array) -> None:
         """
-        Updates the current orderbook with new data. Removes entries with
-        matching prices in update, regardless of size, and then adds non-zero
-        quantity data from update to the book.
+        Replaces the whole book with a snapshot.
 
         Parameters
         ----------
         bids : Array
-            New bid orders data, formatted as [[price, size], ...].
+            Snapshot bid levels, formatted as [[price, size], ...].
         asks : Array
-            New ask orders data, formatted as [[price, size], ...].
+            Snapshot ask levels, formatted as [[price, size], ...].
         """
-        self.update_bids(bids)
-        self.update_asks(asks)
+        self.bids = bids.reshape(-1, 2)
+        self.asks = asks.reshape(-1, 2)
+        self.sort_bids()
+        self.sort_asks()
 
     def get_spread(self) -> float:
         """
@@ -98,7 +233,328 @@ class Orderbook:
         return (self.bba[0, 0] + self.bba[1, 0]) / 2
 
 
+# LadderOrderbook state, kept in one int64 array so the kernels can update it in place
+_ORIGIN, _BEST_BID, _BEST_ASK, _DROPPED = 0, 1, 2, 3
+
+
+@njit
+def _ladder_shift(qty: Array, shift: int) -> None:
+    # moves the ladder content so that index i becomes i - shift
+    n = qty.size
+    if abs(shift) >= n:
+        qty[:] = 0
+    elif shift > 0:
+        qty[: n - shift] = qty[shift:].copy()
+        qty[n - shift :] = 0
+    elif shift < 0:
+        qty[-shift:] = qty[: n + shift].copy()
+        qty[:-shift] = 0
+
+
+@njit
+def _ladder_rescan(qty: Array, start: int, step: int) -> int:
+    # best level after a shift: the old best if it survived, otherwise the
+    # first non-empty level from the end that would hold the best
+    n = qty.size
+    if 0 <= start < n and qty[start] != 0:
+        return start
+    idx = n - 1 if step < 0 else 0
+    while 0 <= idx < n:
+        if qty[idx] != 0:
+            return idx
+        idx -= step
+    return -1
+
+
+@njit
+def _ladder_recenter(qty: Array, state: Array, mid_tick: int) -> None:
+    # qty is [bid ladder, ask ladder]
+    shift = mid_tick - qty.shape[1] // 2 - state[_ORIGIN]
+    if shift == 0:
+        return
+    _ladder_shift(qty[0], shift)
+    _ladder_shift(qty[1], shift)
+    state[_ORIGIN] += shift
+    if state[_BEST_BID] >= 0:
+        state[_BEST_BID] = _ladder_rescan(qty[0], state[_BEST_BID] - shift, -1)
+    if state[_BEST_ASK] >= 0:
+        state[_BEST_ASK] = _ladder_rescan(qty[1], state[_BEST_ASK] - shift, 1)
+
+
+@njit
+def _ladder_apply(qty: Array, levels: Array, ticks_per_unit: float, origin: int, best: int, is_bid: bool) -> tuple:
+    """
+    Writes [price, size] levels into one side of the ladder and returns the new
+    best index (-1 if the side is empty), the number of non-zero levels that
+    fell outside the ladder and the tick of the best of those.
+    """
+    n = qty.size
+    dropped = 0
+    jump = 0
+    rescan = False
+    for i in range(levels.shape[0]):
+        tick = int(np.rint(levels[i, 0] * ticks_per_unit))
+        size = levels[i, 1]
+        idx = tick - origin
+        if idx < 0 or idx >= n:
+            if size != 0:
+                if dropped == 0 or (is_bid and tick > jump) or (not is_bid and tick < jump):
+                    jump = tick
+                dropped += 1
+            continue
+        qty[idx] = size
+        if size != 0:
+            if best < 0 or (is_bid and idx > best) or (not is_bid and idx < best):
+                best = idx
+                rescan = False
+        elif idx == best:
+            rescan = True
+
+    if rescan:
+        step = -1 if is_bid else 1
+        idx = best
+        best = -1
+        while 0 <= idx < n:
+            if qty[idx] != 0:
+                best = idx
+                break
+            idx += step
+    return best, dropped, jump
+
+
+@njit
+def _ladder_side(qty: Array, state: Array, levels: Array, is_bid: bool, ticks_per_unit: float) -> None:
+    if state[_BEST_BID] < 0 and state[_BEST_ASK] < 0:
+        # empty book: centre the ladder on the first live level
+        for i in range(levels.shape[0]):
+            if levels[i, 1] != 0:
+                _ladder_recenter(qty, state, int(np.rint(levels[i, 0] * ticks_per_unit)))
+                break
+
+    side = qty[0] if is_bid else qty[1]
+    slot = _BEST_BID if is_bid else _BEST_ASK
+    best, dropped, jump = _ladder_apply(side, levels, ticks_per_unit, state[_ORIGIN], state[slot], is_bid)
+    state[slot] = best
+    if dropped:
+        # if the dropped levels would be the new best, price has jumped past
+        # the edge of the ladder: recenter on them and write again. updates
+        # are last-write-wins so replaying them is idempotent
+        if best < 0 or (is_bid and jump > state[_ORIGIN] + best) or (not is_bid and jump < state[_ORIGIN] + best):
+            _ladder_recenter(qty, state, jump)
+        best, dropped, jump = _ladder_apply(side, levels, ticks_per_unit, state[_ORIGIN], state[slot], is_bid)
+        state[slot] = best
+        state[_DROPPED] += dropped
+
+    # keep the mid out of the outer quarters
+    bb = state[_BEST_BID]
+    ba = state[_BEST_ASK]
+    if bb >= 0 and ba >= 0:
+        mid = (bb + ba) // 2
+    else:
+        mid = bb if bb >= 0 else ba
+    n = qty.shape[1]
+    quarter = n // 4
+    if mid >= 0 and not quarter <= mid < n - quarter:
+        _ladder_recenter(qty, state, state[_ORIGIN] + mid)
+
+
+@njit
+def _ladder_top(bba: Array, qty: Array, state: Array, tick_num: int, tick_den: int) -> bool:
+    changed = False
+    for row in range(2):
+        best = state[_BEST_BID] if row == 0 else state[_BEST_ASK]
+        p = (state[_ORIGIN] + best) * tick_num / tick_den if best >= 0 else 0.0
+        s = qty[row, best] if best >= 0 else 0.0
+        changed |= bba[row, 0] != p or bba[row, 1] != s
+        bba[row, 0] = p
+        bba[row, 1] = s
+    return changed
+
+
+@njit
+def _ladder_levels(qty: Array, origin: int, best: int, step: int, tick_num: int, tick_den: int, out: Array) -> int:
+    """
+    Walks one side of the ladder away from the best level and fills `out` with
+    [price, size] rows. Returns the number of rows written.
+    """
+    n = qty.size
+    k = 0
+    idx = best
+    while best >= 0 and 0 <= idx < n and k < out.shape[0]:
+        if qty[idx] != 0:
+            out[k, 0] = (origin + idx) * tick_num / tick_den
+            out[k, 1] = qty[idx]
+            k += 1
+        idx += step
+    return k
+
+
+@njit
+def ladder_update(qty: Array, state: Array, bids: Array, asks: Array, ticks_per_unit: float, tick_num: int, tick_den: int, bba: Array, out: Array) -> tuple:
+    """
+    Applies one depth delta to both sides of a ladder (`qty`, bid and ask rows):
+    price to tick conversion, level writes, best bid/ask tracking and
+    recentering in one pass over preallocated buffers, then the top levels of
+    each changed side into `out` (bid and ask [price, size] rows) and the new
+    top of book into `bba`. Fewer, packed arguments keep the call overhead down.
+
+    Returns the number of bid and ask levels written (-1 for a side that was
+    left untouched) and whether the top of book changed.
+    """
+    origin = state[_ORIGIN]
+    if bids.shape[0] > 0:
+        _ladder_side(qty, state, bids, True, ticks_per_unit)
+    if asks.shape[0] > 0:
+        _ladder_side(qty, state, asks, False, ticks_per_unit)
+    # a recenter can drop levels off either side
+    moved = state[_ORIGIN] != origin
+    n_bids = -1
+    n_asks = -1
+    if bids.shape[0] > 0 or moved:
+        n_bids = _ladder_levels(qty[0], state[_ORIGIN], state[_BEST_BID], -1, tick_num, tick_den, out[0])
+    if asks.shape[0] > 0 or moved:
+        n_asks = _ladder_levels(qty[1], state[_ORIGIN], state[_BEST_ASK], 1, tick_num, tick_den, out[1])
+    return n_bids, n_asks, _ladder_top(bba, qty, state, tick_num, tick_den)
 
-    
 
+class LadderOrderbook:
+    """
+    Orderbook stored as two preallocated ladders of sizes indexed by price tick
+    relative to `origin`. Level upserts and deletes are O(1) writes, best bid/ask
+    are tracked incrementally, and the ladder is recentered around the mid when
+    price drifts towards either edge.
 
+    Exposes the same `bids`/`asks`/`bba` views as `Orderbook`, so it can be used
+    wherever the sorted book is. `bids` and `asks` are views into reusable
+    buffers and are only valid until the next update.
+
+    Parameters
+    ----------
+    size : int
+        Number of levels exposed through `bids` and `asks`.
+    tick_size : float
+        Price increment of the contract (`order_price_round` on Gate.io).
+    capacity : int
+        Number of ticks held per side. Levels further than roughly half of this
+        from the mid are dropped.
+    """
+
+    def __init__(self, size: int, tick_size: float, capacity: int = 8192) -> None:
+        self.size = size
+        self.tick_size = tick_size
+        # the decimal tick as an exact fraction num / den: prices are rebuilt as
+        # tick * num / den, one exact integer product and one correctly rounded
+        # division, so they round-trip the decimal price exactly where
+        # tick * tick_size (9999 * 0.01 != 99.99) or tick / (1 / tick_size)
+        # (1 / 1e-05 == 99999.99999999999) do not
+        self.tick_num, self.tick_den = Fraction(str(tick_size)).as_integer_ratio()
+        self.ticks_per_unit = self.tick_den / self.tick_num
+        self.capacity = capacity
+        self.bba = np.zeros((2, 2), dtype=np.float64)
+        # origin, best bid index, best ask index, dropped levels
+        self._state = np.array([0, -1, -1, 0], dtype=np.int64)
+
+        # bid and ask ladders, and the top `size` [price, size] rows of each
+        self._qty = np.zeros((2, capacity), dtype=np.float64)
+        self._out = np.zeros((2, size, 2), dtype=np.float64)
+        self._bids_out = self._out[0]
+        self._asks_out = self._out[1]
+        self._empty = np.zeros((0, 2), dtype=np.float64)
+        self.bids = self._bids_out[:0]
+        self.asks = self._asks_out[:0]
+
+    @property
+    def origin(self) -> int:
+        return int(self._state[_ORIGIN])
+
+    @property
+    def best_bid(self) -> int:
+        return int(self._state[_BEST_BID])
+
+    @property
+    def best_ask(self) -> int:
+        return int(self._state[_BEST_ASK])
+
+    @property
+    def dropped_levels(self) -> int:
+        return int(self._state[_DROPPED])
+
+    def to_ticks(self, prices: Array) -> NDArray[np.int64]:
+        return np.rint(prices * self.ticks_per_unit).astype(np.int64)
+
+    def recenter(self, mid_tick: int) -> None:
+        """
+        Moves the ladder origin so that `mid_tick` sits in the middle of the
+        ladder. Levels that fall off either end are discarded.
+        """
+        _ladder_recenter(self._qty, self._state, mid_tick)
+        self.bids = self._bids_out[: _ladder_levels(self._qty[0], self.origin, self.best_bid, -1, self.tick_num, self.tick_den, self._bids_out)]
+        self.asks = self._asks_out[: _ladder_levels(self._qty[1], self.origin, self.best_ask, 1, self.tick_num, self.tick_den, self._asks_out)]
+        _ladder_top(self.bba, self._qty, self._state, self.tick_num, self.tick_den)
+
+    def _levels(self, levels: Array) -> Array:
+        if levels.size == 0:
+            return self._empty
+        return levels.reshape(-1, 2)
+
+    def update_bids(self, bids: Array) -> bool:
+        """
+        Writes bid levels into the ladder. See `update_book`.
+        """
+        return self.update_book(bids, self._empty)
+
+    def update_asks(self, asks: Array) -> bool:
+        """
+        Writes ask levels into the ladder. See `update_book`.
+        """
+        return self.update_book(self._empty, asks)
+
+    def update_book(self, bids: Array, asks: Array) -> bool:
+        """
+        Updates both sides of the ladder. A size of zero removes the level.
+
+        Parameters
+        ----------
+        bids : Array
+            New bid orders data, formatted as [[price, size], ...].
+        asks : Array
+            New ask orders data, formatted as [[price, size], ...].
+
+        Returns
+        -------
+        bool
+            Whether the best bid or ask (price or size) changed, as
+            `Orderbook.update_book`. `bids` and `asks` taken before the call
+            are rewritten on next access.
+        """
+        n_bids, n_asks, changed = ladder_update(
+            self._qty, self._state, self._levels(bids), self._levels(asks),
+            self.ticks_per_unit, self.tick_num, self.tick_den, self.bba, self._out,
+        )
+        if n_bids >= 0:
+            self.bids = self._bids_out[:n_bids]
+        if n_asks >= 0:
+            self.asks = self._asks_out[:n_asks]
+        return changed
+
+    def load_snapshot(self, bids: Array, asks: Array) -> None:
+        """
+        Clears the ladder and loads a full snapshot, centred on its mid.
+        """
+        self._qty[:] = 0
+        self._state[_BEST_BID] = self._state[_BEST_ASK] = -1
+        self.bids = self._bids_out[:0]
+        self.asks = self._asks_out[:0]
+        self.update_book(bids, asks)
+
+    def get_spread(self) -> float:
+        """
+        Returns the current spread of the orderbook.
+        """
+        return self.bba[1, 0] - self.bba[0, 0]
+
+    def get_mid_price(self) -> float:
+        """
+        Returns the mid price of the orderbook.
+        """
+        return (self.bba[0, 0] + self.bba[1, 0]) / 2
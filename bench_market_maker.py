@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+"""
+tick-to-trade latency and rate limit behaviour of market_maker.py under load, against SimGateio
+in the same process: no keys (dummy ones are set) and no network, so it can run in CI.
+
+the full stack runs as in market_maker.main: QuoteGenerator on the sim's order book stream,
+TradingExecutor, OrderSubmissionGateio with its scheduler and the private order stream, and the
+open-order reconciler. tick-to-trade is the time from receiving the book update that changed a
+contract's quotes to the first create, cancel or amend of the resulting requote being handed to
+the transport (after the scheduler let it through). updates arriving while a requote is already
+waiting are measured from the first of them. latency is measured after a warmup; 429s over
+the whole run.
+
+python bench_market_maker.py --seconds 30 --contracts 8 --latency 0.002 --jitter 0.001
+python bench_market_maker.py --place-limit 20 --max-p99 50 --max-429 0   # exits 1 if exceeded
+"""
+
+
+class TickToTrade:
+    def __init__(self, quote_generator, order_submission) -> None:
+        self.order_manager = order_submission.order_manager
+        self.first_tick: Dict[str, float] = {}  # contract -> first quote changing update not yet picked up
+        self.acting: Dict[str, float] = {}  # contract -> tick of the requote in progress
+        self.samples: List[float] = []
+        self.requotes = 0
+
+        on_update = quote_generator.on_orderbook_update
+
+        def on_orderbook_update(contract, bids, asks):
+            received = time.perf_counter()
+            was_set = quote_generator.quote_updated[contract].is_set()
+            on_update(contract, bids, asks)
+            if not was_set and quote_generator.quote_updated[contract].is_set():
+                self.first_tick.setdefault(contract, received)
+        quote_generator.orderbook_manager.on_update_callback = on_orderbook_update
+
+        wait_for_quote_update = quote_generator.wait_for_quote_update
+
+        async def wait_for_quote_update_timed(contract):
+            quotes = await wait_for_quote_update(contract)
+            # a requote that sends nothing leaves no sample behind for a later one to pick up
+            self.acting.pop(contract, None)
+            tick = self.first_tick.pop(contract, None)
+            if tick is not None:
+                self.acting[contract] = tick
+                self.requotes += 1
+            return quotes
+        quote_generator.wait_for_quote_update = wait_for_quote_update_timed
+
+        post_gateio = order_submission.post_gateio
+        self.wrap(post_gateio, 'create_order_batch', lambda orders: orders[0]['contract'] if orders else None)
+        self.wrap(post_gateio, 'cancel_order_batch', lambda order_ids: self.contract_of(order_ids[0]) if order_ids else None)
+        self.wrap(post_gateio, 'cancel_order', lambda order_id: self.contract_of(order_id))
+        self.wrap(post_gateio, 'amend_order', lambda order_id, **_: self.contract_of(order_id))
+        self.wrap(post_gateio, 'amend_order_batch', lambda amends: self.contract_of(amends[0]['order_id']) if amends else None)
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.requotes = 0
+
+    def contract_of(self, order_id) -> Optional[str]:
+        order = self.order_manager.get_order(str(order_id))
+        return order.contract if order is not None else None
+
+    def sent(self, contract: Optional[str]) -> None:
+        tick = self.acting.pop(contract, None)
+        if tick is not None:
+            self.samples.append(time.perf_counter() - tick)
+
+    def wrap(self, client, name: str, contract_of) -> None:
+        method = getattr(client, name)
+
+        async def timed(*args, **kwargs):
+            self.sent(contract_of(*args, **kwargs))
+            return await method(*args, **kwargs)
+        setattr(client, name, timed)
+
+    def percentiles(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        samples = np.array(self.samples) * 1e3
+        percentiles = {f"p{q}": float(np.percentile(samples, q)) for q in (50, 90, 99)}
+        percentiles['max'] = float(samples.max())
+        return percentiles
+
+
+async def run(args) -> int:
+    os.environ.setdefault('gateio_api_key', 'sim')
+    os.environ.setdefault('gateio_secret_key', 'sim')
+    from scheduler_gateio import RATE_LIMITS
+    from sim_gateio import SimGateio
+
+    names = [f"SIM{i}_USDT" for i in range(args.contracts)]
+    rate_limits = dict(RATE_LIMITS)
+    if args.place_limit:
+        rate_limits['place'] = (args.place_limit, 1.0)
+    sim = SimGateio(
+        {name: (100.0 + i, 0.01) for i, name in enumerate(names)},
+        port=args.port, latency=args.latency, jitter=args.jitter, update_interval=args.update_interval,
+        volatility=args.volatility, rate_limits=rate_limits, seed=args.seed,
+    )
+    await sim.start()
+    sim.use()
+
+    from market_maker import TradingExecutor
+    from oms_gateio import OrderManagerGateio
+    from open_orders_gateio import OpenOrderReconciler
+    from order_stream_gateio import OrderStreamGateio
+    from order_submission_gateio import OrderSubmissionGateio
+    from quote_gen_gateio import QuoteGenerator
+    from transport_gateio import shared_transport
+
+    order_manager = OrderManagerGateio()
+    order_stream = OrderStreamGateio(order_manager)
+    try:
+        async with OrderSubmissionGateio(order_manager=order_manager, order_stream=order_stream) as order_submission:
+            quote_generator = QuoteGenerator(names, orderbook_depth=20, scheduler=order_submission.scheduler)
+            for name in names:
+                params = quote_generator.contract_params[name]
+                params.set_quote_distances(args.distance_bps, args.distance_bps)
+                params.set_adjustment_thresholds(args.threshold_bps, args.threshold_bps)
+                params.set_price_rounding_precision(2)
+                params.set_price_step(0.01)
+            trading_executor = TradingExecutor(order_submission, quote_generator)
+            tick_to_trade = TickToTrade(quote_generator, order_submission)
+            open_orders = OpenOrderReconciler(order_manager, names, scheduler=order_submission.scheduler, order_stream=order_stream)
+            open_orders.start()
+
+            tasks = [asyncio.create_task(quote_generator.run()), asyncio.create_task(trading_executor.run())]
+            # books loading and the first quotes going out are not what is measured
+            await asyncio.sleep(args.warmup)
+            tick_to_trade.reset()
+            await asyncio.sleep(args.seconds)
+            await trading_executor.stop()
+            await open_orders.stop()
+            for task in tasks:
+                task.cancel()
+            await quote_generator.cleanup()
+            scheduler = order_submission.scheduler.stats()
+    finally:
+        await shared_transport().close()
+        await sim.stop()
+
+    percentiles = tick_to_trade.percentiles()
+    rejected = sum(sim.rate_limiter.rejected.values())
+    print(f"{args.contracts} contracts, {args.seconds}s, book every {args.update_interval * 1e3:.0f}ms, latency {args.latency * 1e3:.1f}ms + {args.jitter * 1e3:.1f}ms jitter")
+    print(f"requotes {tick_to_trade.requotes}, measured {len(tick_to_trade.samples)}, degraded {trading_executor.degraded_requotes}")
+    print("tick-to-trade ms  " + "  ".join(f"{name} {value:.2f}" for name, value in percentiles.items()))
+    print(f"429s from sim {dict(sim.rate_limiter.rejected)}, seen by scheduler {scheduler['throttled']}")
+    print(f"sent {scheduler['sent']}, max queue delay {scheduler['max_queue_delay'] * 1e3:.1f}ms")
+    print(f"open orders: sim {len(sim.open_orders)}, oms {len(order_manager.live_orders)}, drift {open_orders.drift}")
+
+    failed = False
+    if args.max_p99 is not None and percentiles.get('p99', float('inf')) > args.max_p99:
+        print(f"FAIL: p99 tick-to-trade above {args.max_p99}ms")
+        failed = True
+    if args.max_429 is not None and rejected > args.max_429:
+        print(f"FAIL: {rejected} requests rejected with 429, allowed {args.max_429}")
+        failed = True
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="market_maker.py tick-to-trade against the local simulator")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measured run time, after the warmup")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--contracts", type=int, default=4)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds added to every sim response and push")
+    parser.add_argument("--jitter", type=float, default=0.001)
+    parser.add_argument("--update-interval", type=float, default=0.02, help="seconds between sim book updates")
+    parser.add_argument("--volatility", type=float, default=0.3, help="chance the sim mid moves a tick per update")
+    parser.add_argument("--distance-bps", type=float, default=5.0)
+    parser.add_argument("--threshold-bps", type=float, default=0.5)
+    parser.add_argument("--place-limit", type=int, default=None, help="sim create/amend limit per second, below the scheduler's to force 429s")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-p99", type=float, default=None, help="fail above this p99 tick-to-trade (ms)")
+    parser.add_argument("--max-429", type=int, default=None, help="fail above this many 429s")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
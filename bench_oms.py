@@ -0,0 +1,76 @@
+import random
+import time
+from oms_gateio import OrderManagerGateio
+
+"""
+OrderManagerGateio lookups with many resting orders: filtered get_live_orders (by contract, by
+contract and side, by text), get_order by either id, and a create -> live -> cancel cycle, against
+the previous linear scan over a dict of dicts.
+
+python bench_oms.py [n_live_orders] [n_contracts]
+"""
+
+
+def legacy_get_live_orders(live_orders, text=None, contract=None):
+    # OrderManagerGateio.get_live_orders before the indexes
+    filtered_orders = live_orders.values()
+    if text:
+        filtered_orders = [order for order in filtered_orders if order['text'] == text]
+    if contract:
+        filtered_orders = [order for order in filtered_orders if order['contract'] == contract]
+    return list(filtered_orders)
+
+
+def fill(oms, n_orders, contracts):
+    rng = random.Random(1)
+    for i in range(n_orders):
+        contract = contracts[i % len(contracts)]
+        side = rng.choice(('buy', 'sell'))
+        internal_id = oms.create_order({'contract': contract, 'price': 100 + rng.random(), 'size': 1 if side == 'buy' else -1, 'side': side, 'text': f"t-{contract}"})
+        oms.update_order_with_exchange_details(internal_id, {'id': 10_000_000 + i, 'create_time': time.time(), 'refu': 0, 'status': 'open'})
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n_orders: int = 10_000, n_contracts: int = 50, n_iterations: int = 2_000):
+    contracts = [f"C{i}_USDT" for i in range(n_contracts)]
+    oms = OrderManagerGateio()
+    fill(oms, n_orders, contracts)
+    legacy = {order_id: order.to_dict() for order_id, order in oms.live_orders.items()}
+    contract = contracts[n_contracts // 2]
+    some_order = next(reversed(oms.live_orders.values()))
+
+    assert sorted(o['order_id'] for o in legacy_get_live_orders(legacy, contract=contract)) == sorted(o.order_id for o in oms.get_live_orders(contract=contract))
+    assert len(oms.get_live_orders(text=f"t-{contract}")) == len(legacy_get_live_orders(legacy, text=f"t-{contract}"))
+
+    rows = [
+        ("contract", lambda: legacy_get_live_orders(legacy, contract=contract), lambda: oms.get_live_orders(contract=contract)),
+        ("contract + side", lambda: [o for o in legacy_get_live_orders(legacy, contract=contract) if o['side'] == 'buy'], lambda: oms.get_live_orders(contract=contract, side='buy')),
+        ("text", lambda: legacy_get_live_orders(legacy, text=f"t-{contract}"), lambda: oms.get_live_orders(text=f"t-{contract}")),
+        ("by internal id", lambda: next(o for o in legacy.values() if o['internal_id'] == some_order.internal_id), lambda: oms.get_order(some_order.internal_id)),
+    ]
+
+    print(f"{n_orders} live orders over {n_contracts} contracts")
+    print(f"{'lookup':<18} {'scan us':>10} {'indexed us':>11} {'speedup':>8}")
+    for name, scan, indexed in rows:
+        before, after = timed(scan, n_iterations), timed(indexed, n_iterations)
+        print(f"{name:<18} {before:10.2f} {after:11.2f} {before / after:7.1f}x")
+
+    order_ids = iter(range(20_000_000, 30_000_000))
+
+    def cycle():
+        internal_id = oms.create_order({'contract': contract, 'price': 100.0, 'size': 1, 'side': 'buy', 'text': 't-cycle'})
+        order_id = next(order_ids)
+        oms.update_order_with_exchange_details(internal_id, {'id': order_id, 'create_time': 0.0, 'refu': 0, 'status': 'open'})
+        oms._remove_live(str(order_id))
+    print(f"{'create/live/remove':<18} {'':>10} {timed(cycle, n_iterations * 10):11.2f}")
+
+
+if __name__ == "__main__":
+    import sys
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
@@ -0,0 +1,129 @@
+import time
+import numpy as np
+from baseorderbook import Orderbook, LadderOrderbook, nbisin
+
+"""
+benchmarks orderbook engines on a synthetic stream of depth deltas shaped like
+gate.io futures.order_book_update messages (20 levels, a few levels per side per
+message, price random walk).
+
+python bench_orderbook.py [n_updates]
+"""
+
+
+class LegacyOrderbook(Orderbook):
+    """
+    The previous update path: nbisin mask, vstack and a full argsort per side.
+    Kept here only as the benchmark baseline.
+    """
+
+    def update_bids(self, bids):
+        if bids.size == 0:
+            return None
+        self.bids = self.bids[~nbisin(self.bids[:, 0], bids[:, 0])]
+        self.bids = np.vstack((self.bids, bids[bids[:, 1] != 0]))
+        self.sort_bids()
+
+    def update_asks(self, asks):
+        if asks.size == 0:
+            return None
+        self.asks = self.asks[~nbisin(self.asks[:, 0], asks[:, 0])]
+        self.asks = np.vstack((self.asks, asks[asks[:, 1] != 0]))
+        self.sort_asks()
+
+    def update_book(self, bids, asks):
+        self.update_bids(bids)
+        self.update_asks(asks)
+
+
+def make_stream(n_updates: int, depth: int = 20, tick: float = 0.01, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    mid = 10_000
+    # prices as the exchange sends them: the float of the decimal, ticks / 100 rather than ticks * 0.01
+    per_unit = round(1 / tick)
+    snap_bids = np.array([[(mid - i) / per_unit, rng.integers(1, 100)] for i in range(1, depth + 1)], dtype=np.float64)
+    snap_asks = np.array([[(mid + i) / per_unit, rng.integers(1, 100)] for i in range(1, depth + 1)], dtype=np.float64)
+
+    stream = []
+    for _ in range(n_updates):
+        mid += int(rng.integers(-2, 3))
+        n_b, n_a = rng.integers(0, 6, size=2)
+        bids = np.empty((n_b, 2), dtype=np.float64)
+        asks = np.empty((n_a, 2), dtype=np.float64)
+        bids[:, 0] = (mid - rng.choice(np.arange(1, depth + 5), size=n_b, replace=False)) / per_unit
+        asks[:, 0] = (mid + rng.choice(np.arange(1, depth + 5), size=n_a, replace=False)) / per_unit
+        bids[:, 1] = rng.integers(0, 100, size=n_b) * (rng.random(n_b) > 0.3)
+        asks[:, 1] = rng.integers(0, 100, size=n_a) * (rng.random(n_a) > 0.3)
+        stream.append((bids, asks))
+    return snap_bids, snap_asks, stream
+
+
+def run(ob, snap_bids, snap_asks, stream) -> float:
+    # updates are copied up front as the merge path sorts them in place
+    stream = [(b.copy(), a.copy()) for b, a in stream]
+    ob.load_snapshot(snap_bids.copy(), snap_asks.copy())
+    start = time.perf_counter()
+    for bids, asks in stream:
+        ob.update_book(bids, asks)
+        # what on_update_callback hands on
+        ob.bids, ob.asks
+    return time.perf_counter() - start
+
+
+def check_prices(tick_sizes=("1e-05", "1e-06", "0.0001", "0.001", "0.01", "0.05", "0.1", "0.5", "5"), depth: int = 1000, seed: int = 0) -> None:
+    """
+    Every price the ladder hands back must be the float of the decimal price, small ticks included.
+    """
+    from decimal import Decimal
+    rng = np.random.default_rng(seed)
+    for tick in tick_sizes:
+        for mid in rng.integers(1_000, 50_000_000, size=20):
+            ticks = np.arange(mid - depth, mid + depth)
+            prices = np.array([float(Decimal(int(t)) * Decimal(tick)) for t in ticks])
+            ob = LadderOrderbook(depth, float(tick), capacity=4 * depth)
+            sizes = np.ones(depth)
+            ob.load_snapshot(np.column_stack([prices[:depth], sizes]), np.column_stack([prices[depth:], sizes]))
+            assert np.array_equal(ob.bids[:, 0], prices[:depth][::-1]), f"bid prices drift with tick {tick}"
+            assert np.array_equal(ob.asks[:, 0], prices[depth:]), f"ask prices drift with tick {tick}"
+            assert ob.bba[0, 0] == prices[depth - 1] and ob.bba[1, 0] == prices[depth]
+
+
+def check_engines(snap_bids, snap_asks, stream, depth: int) -> None:
+    """
+    The ladder must agree with a sorted merge book deep enough to never drop a level on every
+    update: top `depth` levels, top of book and whether it changed.
+    """
+    merge = Orderbook(10 * depth)
+    ladder = LadderOrderbook(depth, 0.01)
+    merge.load_snapshot(snap_bids.copy(), snap_asks.copy())
+    ladder.load_snapshot(snap_bids.copy(), snap_asks.copy())
+    for bids, asks in stream:
+        changed = merge.update_book(bids.copy(), asks.copy())
+        assert ladder.update_book(bids.copy(), asks.copy()) == changed
+        assert np.array_equal(ladder.bba, merge.bba)
+        assert np.array_equal(ladder.bids, merge.bids[:depth]) and np.array_equal(ladder.asks, merge.asks[:depth])
+
+
+def main(n_updates: int = 100_000, depth: int = 20):
+    check_prices()
+    snap_bids, snap_asks, stream = make_stream(n_updates, depth)
+    check_engines(snap_bids, snap_asks, stream[:10_000], depth)
+    engines = {
+        "legacy (isin/vstack/argsort)": lambda: LegacyOrderbook(depth),
+        "sorted merge (njit)": lambda: Orderbook(depth),
+        "tick ladder": lambda: LadderOrderbook(depth, 0.01),
+    }
+    results = {}
+    for name, factory in engines.items():
+        run(factory(), snap_bids, snap_asks, stream[:100])  # jit warmup
+        results[name] = run(factory(), snap_bids, snap_asks, stream)
+
+    baseline = results["legacy (isin/vstack/argsort)"]
+    print(f"{n_updates} updates, depth {depth}")
+    for name, elapsed in results.items():
+        print(f"{name:<30} {elapsed / n_updates * 1e6:8.2f} us/update  {baseline / elapsed:6.2f}x")
+
+
+if __name__ == "__main__":
+    import sys
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,83 @@
+from array import array
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from numpy.typing import NDArray
+
+
+class LevelBuffer:
+    """
+    Reusable [[price, size], ...] buffer. Levels are written into a flat
+    `array('d')`, which takes python floats without boxing them into numpy
+    scalars, and read back through a numpy view over the same memory.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = 0
+        self.data = array('d')
+        self.view = np.zeros((0, 2), dtype=np.float64)
+        self.grow(capacity)
+
+    def grow(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.data = array('d', bytes(16 * capacity))
+        self.view = np.frombuffer(self.data, dtype=np.float64).reshape(capacity, 2)
+
+    def fill(self, levels: List[Dict[str, Any]]) -> NDArray[np.float64]:
+        """
+        Parses gate.io {'p': '1.23', 's': 10} levels into the buffer and returns
+        a view of the filled rows. The view is only valid until the next fill.
+        """
+        n = len(levels)
+        if n > self.capacity:
+            self.grow(max(n, 2 * self.capacity))
+        data = self.data
+        i = 0
+        try:
+            for level in levels:
+                data[i] = float(level['p'])
+                data[i + 1] = level['s']
+                i += 2
+        except TypeError:
+            # sizes sent as strings
+            i = 0
+            for level in levels:
+                data[i] = float(level['p'])
+                data[i + 1] = float(level['s'])
+                i += 2
+        return self.view[:n]
+
+
+class DepthDecoderGateio:
+    """
+    Decodes futures.order_book_update deltas and REST order_book snapshots
+    straight into per-contract preallocated float64 buffers, instead of
+    building lists of lists and calling np.array on every message.
+
+    Returned arrays are views into those buffers: they must be applied to the
+    book before the next message for the same contract is decoded.
+    """
+
+    def __init__(self, contracts: List[str], capacity: int = 64) -> None:
+        self.capacity = capacity
+        self.buffers: Dict[str, Tuple[LevelBuffer, LevelBuffer]] = {}
+        for contract in contracts:
+            self.add_contract(contract)
+
+    def add_contract(self, contract: str) -> None:
+        self.buffers[contract] = (LevelBuffer(self.capacity), LevelBuffer(self.capacity))
+
+    def decode(self, contract: str, bids: List[Dict[str, Any]], asks: List[Dict[str, Any]]) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        bid_buffer, ask_buffer = self.buffers[contract]
+        return bid_buffer.fill(bids), ask_buffer.fill(asks)
+
+    def decode_update(self, contract: str, update: Dict[str, Any]) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        Decodes the 'b' and 'a' levels of an order_book_update result.
+        """
+        return self.decode(contract, update.get('b', ()), update.get('a', ()))
+
+    def decode_snapshot(self, contract: str, data: Dict[str, Any]) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        Decodes the 'bids' and 'asks' levels of a REST order_book response.
+        """
+        return self.decode(contract, data['bids'], data['asks'])
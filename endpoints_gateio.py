@@ -1,9 +1,23 @@
+import os
 from dataclasses import dataclass
 
 @dataclass
 class BaseEndpoint:
-    get = "https://api.gateio.ws"
-    ws = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+    # gateio_rest_url / gateio_ws_url override the production urls, e.g. to run against sim_gateio.py
+    get = os.getenv("gateio_rest_url", "https://api.gateio.ws")
+    ws = os.getenv("gateio_ws_url", "wss://fx-ws.gateio.ws/v4/ws/usdt")
+
+    @classmethod
+    def use(cls, get: str, ws: str) -> None:
+        """
+        Points clients created afterwards at other urls.
+        """
+        cls.get = get
+        cls.ws = ws
+
+    @classmethod
+    def use_local(cls, host: str = "127.0.0.1", port: int = 8080) -> None:
+        cls.use(f"http://{host}:{port}", f"ws://{host}:{port}/v4/ws/usdt")
 
 @dataclass
 class GetLinks:
@@ -11,6 +25,7 @@ class GetLinks:
     get_positions = "/api/v4/futures/usdt/positions"
     futures_tickers = "/api/v4/futures/usdt/tickers" #lists all info about all futures tickers. funding rate, mark price etc
     open_orders = "/api/v4/futures/usdt/orders"  # New endpoint for open orders
+    server_time = "/api/v4/spot/time"  # smallest public response, used to keep pooled connections warm
 
 @dataclass
 class PostLinks:
@@ -22,6 +37,9 @@ class PostLinks:
     create_order_single = "/api/v4/futures/usdt/orders"
     create_order_batch = "/api/v4/futures/usdt/batch_orders"
 
+    amend_order_single = "/api/v4/futures/usdt/orders/{order_id}"  # PUT
+    amend_order_batch = "/api/v4/futures/usdt/batch_amend_orders"
+
 
 @dataclass
 class WSLinks:
@@ -36,7 +54,15 @@ class WSLinks:
     candlesticks = "futures.candlesticks"
 
     #private
-    user_orders = "futures.autoorders"
+    user_orders = "futures.orders"
     user_trades = "futures.usertrades"
     user_balances = "futures.balances"
 
+    #trading api (event "api", request/response over the same socket)
+    login = "futures.login"
+    order_place = "futures.order_place"
+    order_batch_place = "futures.order_batch_place"
+    order_cancel = "futures.order_cancel"
+    order_cancel_ids = "futures.order_cancel_ids"
+    order_amend = "futures.order_amend"
+
@@ -1,12 +1,14 @@
 import aiohttp
+from typing import Optional
 from endpoints_gateio import BaseEndpoint, GetLinks
 import asyncio
 import os
 from dotenv import load_dotenv
 from auth_gateio import AuthGateio
+from transport_gateio import TransportGateio, shared_transport
 
 class GetGateio:
-    def __init__(self):
+    def __init__(self, transport: Optional[TransportGateio] = None):
         self.base_endpoint = BaseEndpoint()
         self.get_links = GetLinks()
         self.base_url = self.base_endpoint.get
@@ -20,13 +22,32 @@ class GetGateio:
             raise ValueError("API key or secret not found in .env file")
         
         self.auth = AuthGateio(api_key, api_secret)
+        # called with (method, path, status, headers) after every response, e.g. RequestScheduler.observe
+        self.on_response = None
+        # sessions come from a shared, pre-warmed connection pool instead of one per client
+        self.transport = transport if transport is not None else shared_transport()
+        self.session = None
+        # this client holds one use of the transport at most, however often it is entered or exited
+        self.acquired = False
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if not self.acquired:
+            self.acquired = True
+            try:
+                self.session = await self.transport.acquire()
+            except Exception:
+                self.acquired = False
+                raise
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        await self.session.close()
+        if self.acquired:
+            self.acquired = False
+            await self.transport.release()
+
+    def observe(self, method: str, path: str, response) -> None:
+        if self.on_response is not None:
+            self.on_response(method, path, response.status, response.headers)
 
     async def get_orderbook(self, contract: str, depth: int):
         url = f"{self.base_endpoint.get}{self.get_links.orderbook}"
@@ -34,16 +55,16 @@ class GetGateio:
         print("getting orderbook for:", contract)
 
         async with self.session.get(url, params=query_param) as response:
+            self.observe('GET', self.get_links.orderbook, response)
             return await response.json()
 
     async def get_positions(self):
         url = self.get_links.get_positions
-        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
         query_param = ''
-        sign_headers = self.auth.gen_sign('GET', url, query_param)
-        headers.update(sign_headers)
+        headers = self.auth.get_headers('GET', url, query_param)
 
         async with self.session.get(f"{self.base_endpoint.get}{url}", headers=headers) as response:
+            self.observe('GET', url, response)
             response_json = await response.json()
             return [[entry['contract'], entry['size']] for entry in response_json]
 
@@ -52,20 +73,24 @@ class GetGateio:
         headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
 
         async with self.session.get(url, headers=headers) as response:
+            self.observe('GET', self.get_links.futures_tickers, response)
             return await response.json()
 
-    async def get_open_orders(self, contract: str = None):
+    async def get_open_orders(self, contract: str = None, limit: int = 100, offset: int = 0):
+        # one page; gate returns at most `limit` (up to 1000) orders, callers page with offset
         url = self.get_links.open_orders
-        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
         query_param = 'status=open'
         if contract:
             query_param += f'&contract={contract}'
-        sign_headers = self.auth.gen_sign('GET', url, query_param)
-        headers.update(sign_headers)
+        query_param += f'&limit={limit}'
+        if offset:
+            query_param += f'&offset={offset}'
+        headers = self.auth.get_headers('GET', url, query_param)
 
         full_url = f"{self.base_endpoint.get}{url}?{query_param}"
         
         async with self.session.get(full_url, headers=headers) as response:
+            self.observe('GET', url, response)
             return await response.json()
 
 # Used for testing
@@ -1,18 +1,25 @@
 import asyncio
-from typing import List, Tuple, Callable
+from typing import List, Tuple, Callable, Optional
 from get_gateio import GetGateio
+from scheduler_gateio import INFO, RequestScheduler
 from ws_gateio import WSGateio
 
 class InventoryManagerGateio:
-    def __init__(self):
+    def __init__(self, scheduler: Optional[RequestScheduler] = None):
         self.get_gateio = GetGateio()
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.get_gateio.on_response = scheduler.observe
         self.ws_gateio = WSGateio()
         self.positions: List[Tuple[str, float]] = []
         self.on_position_update: Callable[[List[Tuple[str, float]]], None] = None
 
     async def initialize_positions(self):
         async with self.get_gateio as gateio:
-            self.positions = await gateio.get_positions()
+            if self.scheduler is not None:
+                self.positions = await self.scheduler.call(INFO, 'private', gateio.get_positions)
+            else:
+                self.positions = await gateio.get_positions()
         if self.on_position_update:
             self.on_position_update(self.positions)
 
@@ -0,0 +1,224 @@
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+"""
+binary journal of raw websocket frames, for replay, benchmarking and post-mortems.
+
+file:    header, then blocks
+header:  magic b'GWSJ', uint16 version, uint16 compression, int64 wall clock ns, int64 monotonic ns
+         (the clocks at file open, to map receive timestamps back to wall time)
+block:   uint32 stored length, uint32 raw length, stored bytes (compressed if compression != 0)
+record:  int64 monotonic receive ns, uint32 frame length, frame bytes (inside the raw block)
+"""
+
+MAGIC = b"GWSJ"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHqq")
+BLOCK_HEADER = struct.Struct("<II")
+RECORD_HEADER = struct.Struct("<qI")
+COMPRESSION = {None: 0, "zstd": 1, "lz4": 2}
+# channel of the synthetic frames OrderbookGateio records for REST orderbook snapshots
+SNAPSHOT_CHANNEL = "rest.order_book"
+
+
+class JournalWriter:
+    """
+    Appends frames with their monotonic receive time. `record` only copies the frame into an
+    in-memory buffer under a lock; a background thread swaps the buffer out every
+    flush_interval, compresses it if asked, writes it and rotates files at max_file_bytes.
+    """
+
+    def __init__(self, directory: str, prefix: str = "ws", max_file_bytes: int = 256 * 1024 * 1024, flush_interval: float = 0.05, compression: Optional[str] = None) -> None:
+        if compression not in COMPRESSION:
+            raise ValueError(f"Unknown compression {compression}, use one of {list(COMPRESSION)}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package")
+        if compression == "lz4" and lz4_frame is None:
+            raise ImportError("lz4 compression needs the lz4 package")
+
+        self.directory = directory
+        self.prefix = prefix
+        self.max_file_bytes = max_file_bytes
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self.compressor = zstandard.ZstdCompressor(level=1) if compression == "zstd" else None
+
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.file = None
+        self.file_bytes = 0
+        self.file_index = 0
+        self.path: Optional[str] = None
+
+        self.frames = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> "JournalWriter":
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def record(self, frame: Union[bytes, str], recv_ns: Optional[int] = None) -> None:
+        if isinstance(frame, str):
+            frame = frame.encode()
+        if recv_ns is None:
+            recv_ns = time.monotonic_ns()
+        header = RECORD_HEADER.pack(recv_ns, len(frame))
+        with self.lock:
+            self.buffer += header
+            self.buffer += frame
+            self.frames += 1
+
+    def _swap(self) -> bytearray:
+        with self.lock:
+            buffer, self.buffer = self.buffer, bytearray()
+        return buffer
+
+    def _open(self) -> None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{self.file_index:04d}.wsj")
+        self.file_index += 1
+        self.file = open(self.path, "wb")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, COMPRESSION[self.compression], time.time_ns(), time.monotonic_ns()))
+        self.file_bytes = FILE_HEADER.size
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.compression == "zstd":
+            return self.compressor.compress(raw)
+        if self.compression == "lz4":
+            return lz4_frame.compress(raw)
+        return raw
+
+    def _write(self, raw: bytearray) -> None:
+        if not raw:
+            return
+        if self.file is None or self.file_bytes >= self.max_file_bytes:
+            if self.file is not None:
+                self.file.close()
+            self._open()
+        stored = self._compress(raw)
+        self.file.write(BLOCK_HEADER.pack(len(stored), len(raw)))
+        self.file.write(stored)
+        self.file.flush()
+        self.file_bytes += BLOCK_HEADER.size + len(stored)
+        self.raw_bytes += len(raw)
+        self.written_bytes += BLOCK_HEADER.size + len(stored)
+
+    def _run(self) -> None:
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self._write(self._swap())
+        self._write(self._swap())
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def stop(self) -> None:
+        """
+        Flushes what is buffered and closes the journal.
+        """
+        self.running = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class JournalReader:
+    """
+    Sequential reader over one journal file through mmap. Uncompressed journals yield frames as
+    memoryviews into the mapping without copying; they are valid until close().
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, compression, self.wall_ns, self.monotonic_ns = FILE_HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a websocket journal")
+        self.compression = {v: k for k, v in COMPRESSION.items()}[compression]
+        self.decompressor = None
+        if self.compression == "zstd":
+            if zstandard is None:
+                raise ImportError("reading a zstd journal needs the zstandard package")
+            self.decompressor = zstandard.ZstdDecompressor()
+        elif self.compression == "lz4" and lz4_frame is None:
+            raise ImportError("reading an lz4 journal needs the lz4 package")
+
+    def _decompress(self, stored: memoryview, raw_len: int) -> memoryview:
+        if self.compression == "zstd":
+            return memoryview(self.decompressor.decompress(stored, max_output_size=raw_len))
+        if self.compression == "lz4":
+            return memoryview(lz4_frame.decompress(stored))
+        return stored
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Yields (monotonic receive ns, frame) in the order frames were recorded.
+        """
+        view = memoryview(self.mmap)
+        offset = FILE_HEADER.size
+        end = len(self.mmap)
+        while offset + BLOCK_HEADER.size <= end:
+            stored_len, raw_len = BLOCK_HEADER.unpack_from(view, offset)
+            offset += BLOCK_HEADER.size
+            if offset + stored_len > end:
+                break  # partially written last block
+            block = self._decompress(view[offset:offset + stored_len], raw_len)
+            offset += stored_len
+            pos = 0
+            while pos < raw_len:
+                recv_ns, length = RECORD_HEADER.unpack_from(block, pos)
+                pos += RECORD_HEADER.size
+                yield recv_ns, block[pos:pos + length]
+                pos += length
+
+    def to_wall_ns(self, recv_ns: int) -> int:
+        return self.wall_ns + (recv_ns - self.monotonic_ns)
+
+    def close(self) -> None:
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass  # frames still referenced by the caller, the mapping goes when they do
+        self.file.close()
+
+
+def iter_journal(directory: str, prefix: str = "ws") -> Iterator[Tuple[int, bytes]]:
+    """
+    Yields (monotonic receive ns, frame bytes) across every journal file of `prefix` in
+    `directory`, oldest file first.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, f"{prefix}-*.wsj"))):
+        reader = JournalReader(path)
+        try:
+            for recv_ns, frame in reader:
+                yield recv_ns, bytes(frame)
+            frame = None
+        finally:
+            reader.close()
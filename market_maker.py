@@ -1,11 +1,18 @@
 import asyncio
 from post_gateio import PostGateio
 from oms_gateio import OrderManagerGateio
+from open_orders_gateio import OpenOrderReconciler
+from order_stream_gateio import OrderStreamGateio
 from order_submission_gateio import OrderSubmissionGateio
 from quote_gen_gateio import QuoteGenerator
-from typing import List
+from reconciler_gateio import QuoteReconciler
+from transport_gateio import shared_transport
+from typing import Dict, List, Optional
 """
-generates quotes each time the book updates and does NOT submit orders.
+requotes a contract each time QuoteGenerator changes its quotes. every contract has its own worker
+that sleeps until the contract's quote slot is set, so idle contracts cost no cpu or api calls and
+a slow round trip on one contract does not hold up the others. each requote only sends the
+creates/cancels/amends QuoteReconciler finds between the quotes and the live orders.
 
 """
 
@@ -14,20 +21,59 @@ class TradingExecutor:
         self.order_submission = order_submission
         self.quote_generator = quote_generator
         self.running = False
-
-    async def handle_quote_update(self, contract: str):
-        # Cancel existing orders for the contract
-        await self.cancel_existing_orders(contract)
-        
-        # Submit new orders based on the latest quotes
-        await self.submit_new_orders(contract)
+        self.workers: Dict[str, asyncio.Task] = {}
+        self.requotes: Dict[str, int] = {contract: 0 for contract in quote_generator.contracts}
+        self.reconciler = QuoteReconciler(allow_amends=True)
+        # below this fraction of the order placement budget, requotes need degrade_factor times the
+        # usual price move, so quoting slows down instead of running into the rate limit
+        self.low_budget = 0.25
+        self.degrade_factor = 4.0
+        self.degraded_requotes = 0
+        # creates run in the background so the next requote does not wait for their round trip;
+        # the reconciler sees them as working orders and cancels/amends them by client id
+        self.pipeline = True
+        self.inflight: set = set()
+
+    async def handle_quote_update(self, contract: str, quotes: Optional[Dict[str, float]] = None):
+        if quotes is None:
+            quotes = dict(self.quote_generator.current_quotes[contract])
+        params = self.quote_generator.contract_params[contract]
+        long_threshold = params.long_adjustment_threshold_bps
+        short_threshold = params.short_adjustment_threshold_bps
+        if self.order_submission.scheduler.budget('place') < self.low_budget:
+            long_threshold *= self.degrade_factor
+            short_threshold *= self.degrade_factor
+            self.degraded_requotes += 1
+        if self.pipeline:
+            live_orders = self.order_submission.get_working_orders(contract)
+        else:
+            live_orders = self.order_submission.get_live_orders(contract=contract)
+        actions = self.reconciler.reconcile(contract, quotes, live_orders, long_threshold, short_threshold)
+        if not actions:
+            return
+
+        # the two sides are independent, so cancels, creates and amends go out together
+        requests = []
+        if actions.cancels:
+            requests.append(self.order_submission.cancel_bulk_orders(actions.cancels))
+        if actions.creates:
+            create = self.order_submission.submit_bulk_orders(actions.creates)
+            if self.pipeline:
+                task = asyncio.create_task(create)
+                self.inflight.add(task)
+                task.add_done_callback(self.inflight.discard)
+            else:
+                requests.append(create)
+        if actions.amends:
+            requests.append(self.order_submission.amend_bulk_orders(actions.amends))
+        await asyncio.gather(*requests)
 
     async def cancel_existing_orders(self, contract: str):
         # Get all live orders for the contract
-        live_orders = self.order_submission.get_live_orders(contract)
+        live_orders = self.order_submission.get_live_orders(contract=contract)
         
         if live_orders:
-            order_ids = [order['order_id'] for order in live_orders]
+            order_ids = [order.order_id for order in live_orders]
             
             # Cancel the orders
             cancelled_orders = await self.order_submission.cancel_bulk_orders(order_ids)
@@ -35,9 +81,10 @@ class TradingExecutor:
             # Log the cancellation
             print(f"Cancelled {len(cancelled_orders)} orders for {contract}")
 
-    async def submit_new_orders(self, contract: str):
+    async def submit_new_orders(self, contract: str, quotes: Optional[Dict[str, float]] = None):
         # Get the latest quotes for the contract
-        quotes = self.quote_generator.current_quotes[contract]
+        if quotes is None:
+            quotes = self.quote_generator.current_quotes[contract]
         
         # Prepare the order data
         orders_data = []
@@ -65,17 +112,34 @@ class TradingExecutor:
             # Log the new orders
             print(f"Submitted {len(created_orders)} new orders for {contract}")
 
+    async def run_contract(self, contract: str):
+        while self.running:
+            # quotes that change while we are requoting are picked up on the next pass, only the
+            # latest ones are ever sent
+            quotes = await self.quote_generator.wait_for_quote_update(contract)
+            try:
+                await self.handle_quote_update(contract, quotes)
+                self.requotes[contract] += 1
+            except Exception as e:
+                print(f"Error requoting {contract}: {str(e)}")
+
     async def run(self):
         self.running = True
-        while self.running:
-            for contract in self.quote_generator.contracts:
-                await self.handle_quote_update(contract)
-            
-            # Wait for a short time before the next iteration
-            #await asyncio.sleep(1)  # Adjust this value as needed
+        for contract in self.quote_generator.contracts:
+            self.workers[contract] = asyncio.create_task(self.run_contract(contract))
+        try:
+            await asyncio.gather(*self.workers.values())
+        except asyncio.CancelledError:
+            pass
 
     async def stop(self):
         self.running = False
+        for task in self.workers.values():
+            task.cancel()
+        self.workers.clear()
+        if self.inflight:
+            # let creates already sent come back so the OMS knows about them
+            await asyncio.gather(*self.inflight, return_exceptions=True)
 
 async def main():
     # Define the contracts we want to trade
@@ -87,10 +151,13 @@ async def main():
     # Initialize OrderManagerGateio
     order_manager = OrderManagerGateio()
 
+    # Fills and exchange-side cancels come in over the private orders/usertrades channels
+    order_stream = OrderStreamGateio(order_manager)
+
     # Create OrderSubmissionGateio
-    async with OrderSubmissionGateio(post_gateio, order_manager) as order_submission:
+    async with OrderSubmissionGateio(post_gateio, order_manager, order_stream=order_stream) as order_submission:
         # Set up QuoteGenerator
-        quote_generator = QuoteGenerator(contracts, orderbook_depth=20)
+        quote_generator = QuoteGenerator(contracts, orderbook_depth=20, scheduler=order_submission.scheduler)
 
         # Set parameters for each contract in QuoteGenerator
         for contract in contracts:
@@ -98,13 +165,16 @@ async def main():
             params.set_quote_distances(40, 40)  # 10 bps away from mid price
             params.set_adjustment_thresholds(5, 5)  # Update quotes if 5 bps change
             params.set_price_rounding_precision(4)  # Round to 2 decimal places
-            params.set_quote_best_bid_ask(False, False)  # Don't quote at best bid/ask
             params.set_enable_quotes(True, True)  # Enable both buy and sell quotes
             params.set_price_step(0.01)  # Minimum price increment
 
         # Create TradingExecutor
         trading_executor = TradingExecutor(order_submission, quote_generator)
 
+        # Catch orders orphaned on the exchange (timeouts, restarts) in the background
+        open_orders = OpenOrderReconciler(order_manager, contracts, scheduler=order_submission.scheduler, order_stream=order_stream)
+        open_orders.start()
+
         # Start the quote generator
         quote_generator_task = asyncio.create_task(quote_generator.run())
 
@@ -118,8 +188,10 @@ async def main():
             print("Shutting down...")
         finally:
             await trading_executor.stop()
+            await open_orders.stop()
             await quote_generator.cleanup()
-            # Add any other necessary cleanup
+            # the pooled REST session outlives its users, close it with the process
+            await shared_transport().close()
 
 if __name__ == "__main__":
     asyncio.run(main())
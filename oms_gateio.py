@@ -1,80 +1,602 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
 from datetime import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
 import uuid
+import orjson
+
+"""
+order store: one slotted record per order, looked up in O(1) by internal id or exchange id.
+
+live orders are also indexed by contract, (contract, side) and custom text. each index maps a key
+to a dict of order_id -> record used as an ordered set, so a state move (pending -> live ->
+terminal) adds or removes an order in constant time and a filtered lookup costs the size of the
+answer, not the number of resting orders.
+
+states: pending -> open -> partially_filled -> filled / cancelled (or rejected for creates the
+exchange refused). REST and ws-api responses move orders in and out of the book; the private
+futures.orders and futures.usertrades streams (OrderStreamGateio) report fills and exchange-side
+cancels. a stream update can arrive before the create response that tells us the order id, so
+updates for unknown ids are held in a small buffer and applied when the id shows up.
+
+orders can carry a client id, the unique `t-` text sent with the create, which is indexed while
+the order is pending or live. it lets a stream update ack a create whose response is still on
+its way, and lets a cancel or amend be asked for before the exchange id is known: the request is
+kept on the pending record (pending_cancel / pending_amend) and carried out once it is acked.
+the client id also carries the order's strategy (its `text`) as a tag, `t-{tag}-{session}-{n}`,
+so an order adopted after a restart gets its strategy back. the tag must give the text back
+exactly: a text t-{tag} is used as is when the tag fits (STRATEGY_TAG_LEN of [0-9A-Za-z_.-]), any
+other text needs a short tag from register_strategy, and a text with neither is refused.
+
+finished orders (cancelled, filled, rejected) go to an OrderArchive: the newest `capacity` stay in
+memory, keyed by exchange id (internal id for orders that never got one), and older ones are
+evicted to a spill buffer that a background thread writes to a sqlite file every flush_interval,
+so nothing on the trading path touches the disk. lookups check memory, then the spill buffer,
+then the file.
+
+archive file: one table, orders(key primary key, internal_id, contract, status, closed_time,
+record) with record the orjson encoded OrderRecord
+"""
+
+
+STRATEGY_TAG_LEN = 14  # gate allows 28 characters after the t-, session and counter take up to 14
+_TAG = re.compile(r'[0-9A-Za-z_.-]{1,%d}' % STRATEGY_TAG_LEN)
+# t-{tag}-{session}-{n}, or t-{session}-{n} for an order without a strategy
+_CLIENT_ID = re.compile(r't-(?:([0-9A-Za-z_.-]+)-)?[0-9a-z]{6}-[0-9a-z]{1,6}')
+
+
+@dataclass(slots=True)
+class OrderRecord:
+    internal_id: str
+    contract: str
+    price: float
+    quantity: float
+    side: str
+    text: str = ''
+    order_id: Optional[str] = None
+    internal_creation_time: float = 0.0
+    internal_status: str = 'pending'
+    exchange_creation_time: Optional[float] = None
+    refu: Optional[bool] = None
+    status: Optional[str] = None
+    amend_count: int = 0
+    filled: float = 0.0  # absolute size filled
+    trade_filled: float = 0.0  # the same, summed from usertrades
+    finish_as: Optional[str] = None
+    update_time: float = 0.0  # local wall clock of the last change we applied
+    client_id: Optional[str] = None  # the t- text the order was created with
+    # operations asked for before the create was acked: pending_cancel is 'sent' while a cancel
+    # by client id is out and 'on_ack' once it has to wait for the exchange id
+    pending_cancel: Optional[str] = None
+    pending_amend: Optional[Dict] = None
+
+    @property
+    def ref(self) -> Optional[str]:
+        """
+        The id to cancel or amend the order by: exchange id once acked, client id before.
+        """
+        return self.order_id or self.client_id
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class OrderArchive:
+    def __init__(self, capacity: int = 10_000, path: Optional[str] = None, flush_interval: float = 0.5) -> None:
+        self.capacity = capacity
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.recent: "OrderedDict[str, OrderRecord]" = OrderedDict()
+        self.internal_keys: Dict[str, str] = {}  # internal_id -> key, for records in memory
+        self.spill: Dict[str, OrderRecord] = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.reader: Optional[sqlite3.Connection] = None
+
+        self.archived = 0
+        self.evicted = 0
+        self.spilled = 0
+
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = self._connect()
+            connection.execute(
+                "create table if not exists orders (key text primary key, internal_id text, contract text, status text, closed_time real, record blob)"
+            )
+            connection.execute("create index if not exists orders_internal_id on orders (internal_id)")
+            connection.commit()
+            connection.close()
+
+    @staticmethod
+    def key(order: OrderRecord) -> str:
+        return order.order_id or order.internal_id
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("pragma journal_mode=wal")
+        connection.execute("pragma synchronous=normal")
+        return connection
+
+    def add(self, order: OrderRecord) -> None:
+        key = self.key(order)
+        self.recent[key] = order
+        self.recent.move_to_end(key)
+        self.internal_keys[order.internal_id] = key
+        self.archived += 1
+        if len(self.recent) <= self.capacity:
+            return
+        _, evicted = self.recent.popitem(last=False)
+        self.internal_keys.pop(evicted.internal_id, None)
+        self.evicted += 1
+        if self.path is None:
+            return
+        with self.lock:
+            self.spill[self.key(evicted)] = evicted
+        if not self.running:
+            self.start()
+
+    def get(self, order_id: str) -> Optional[OrderRecord]:
+        """
+        Archived order by exchange id or internal id. Misses in memory read the file, which
+        blocks, so this is for reconciliation and analysis rather than the quoting path.
+        """
+        order = self.recent.get(order_id) or self.recent.get(self.internal_keys.get(order_id, ''))
+        if order is not None:
+            return order
+        if self.path is None:
+            return None
+        with self.lock:
+            order = self.spill.get(order_id) or next((spilled for spilled in self.spill.values() if spilled.internal_id == order_id), None)
+        if order is not None:
+            return order
+        if self.reader is None:
+            self.reader = self._connect()
+        row = self.reader.execute("select record from orders where key = ? or internal_id = ? limit 1", (order_id, order_id)).fetchone()
+        return OrderRecord(**orjson.loads(row[0])) if row else None
+
+    def recent_orders(self, contract: Optional[str] = None, status: Optional[str] = None) -> List[OrderRecord]:
+        """
+        In-memory records, oldest first, optionally filtered by contract and internal status.
+        """
+        return [
+            order for order in self.recent.values()
+            if (contract is None or order.contract == contract) and (status is None or order.internal_status == status)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.recent)
+
+    def start(self) -> "OrderArchive":
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="order-archive", daemon=True)
+        self.thread.start()
+        return self
+
+    def _write(self, connection: sqlite3.Connection) -> None:
+        with self.lock:
+            spill = list(self.spill.values())
+        if not spill:
+            return
+        connection.executemany(
+            "insert or replace into orders values (?, ?, ?, ?, ?, ?)",
+            [
+                (self.key(order), order.internal_id, order.contract, order.internal_status, order.exchange_creation_time or order.internal_creation_time, orjson.dumps(order.to_dict()))
+                for order in spill
+            ],
+        )
+        connection.commit()
+        with self.lock:
+            # only drop what was written; a record spilled again meanwhile stays queued
+            for order in spill:
+                key = self.key(order)
+                if self.spill.get(key) is order:
+                    del self.spill[key]
+        self.spilled += len(spill)
+
+    def _run(self) -> None:
+        connection = self._connect()
+        try:
+            while self.running:
+                self.wake.wait(self.flush_interval)
+                self.wake.clear()
+                self._write(connection)
+            self._write(connection)
+        finally:
+            connection.close()
+
+    def stop(self) -> None:
+        """
+        Writes what is waiting to spill and stops the writer; a later eviction starts it again.
+        """
+        self.running = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
 
 class OrderManagerGateio:
-    def __init__(self):
-        self.pending_orders: Dict[str, Dict] = {}
-        self.live_orders: Dict[str, Dict] = {}
-        self.cancelled_orders: Dict[str, Dict] = {}
-        self.filled_orders: Dict[str, Dict] = {}
+    def __init__(self, archive: Optional[OrderArchive] = None, max_early_updates: int = 1000):
+        self.pending_orders: Dict[str, OrderRecord] = {}  # internal_id -> record
+        self.live_orders: Dict[str, OrderRecord] = {}  # order_id -> record
+        # cancelled, filled and rejected orders; pass OrderArchive(path=...) to keep evicted ones on disk
+        self.archive = archive if archive is not None else OrderArchive()
+
+        # every non-terminal order under its internal id and client id
+        self.by_internal_id: Dict[str, OrderRecord] = {}
+        self.by_client_id: Dict[str, OrderRecord] = {}
+        # pending orders only, contract -> internal_id -> record
+        self.pending_by_contract: Dict[str, Dict[str, OrderRecord]] = {}
+        # live orders only
+        self.by_contract: Dict[str, Dict[str, OrderRecord]] = {}
+        self.by_contract_side: Dict[Tuple[str, str], Dict[str, OrderRecord]] = {}
+        self.by_text: Dict[str, Dict[str, OrderRecord]] = {}
+        # client id tag -> strategy text, for strategies whose text is not a tag itself
+        self.strategy_tags: Dict[str, str] = {}
+
+        # order id -> latest stream update for orders whose create response has not arrived yet
+        self.early_updates: "OrderedDict[str, Dict]" = OrderedDict()
+        self.max_early_updates = max_early_updates
+        self.stream_updates = 0
+        self.stream_fills = 0
+        self.already_finished = 0
+
+    @staticmethod
+    def _index_add(index: Dict, key, order: OrderRecord) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = index[key] = {}
+        bucket[order.order_id] = order
+
+    @staticmethod
+    def _index_remove(index: Dict, key, order: OrderRecord) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(order.order_id, None)
+            if not bucket:
+                del index[key]
+
+    def _add_live(self, order: OrderRecord) -> None:
+        order.internal_status = 'open'
+        order.update_time = time.time()
+        self.live_orders[order.order_id] = order
+        self._index_add(self.by_contract, order.contract, order)
+        self._index_add(self.by_contract_side, (order.contract, order.side), order)
+        self._index_add(self.by_text, order.text, order)
 
+    def _remove_live(self, order_id: str) -> Optional[OrderRecord]:
+        order = self.live_orders.pop(order_id, None)
+        if order is None:
+            return None
+        self._index_remove(self.by_contract, order.contract, order)
+        self._index_remove(self.by_contract_side, (order.contract, order.side), order)
+        self._index_remove(self.by_text, order.text, order)
+        self.by_internal_id.pop(order.internal_id, None)
+        if order.client_id is not None:
+            self.by_client_id.pop(order.client_id, None)
+        return order
 
-    def create_order(self, order_data: Dict) -> str:
+    def _pop_pending(self, internal_id: str) -> Optional[OrderRecord]:
+        order = self.pending_orders.pop(internal_id, None)
+        if order is not None:
+            bucket = self.pending_by_contract.get(order.contract)
+            if bucket is not None:
+                bucket.pop(internal_id, None)
+                if not bucket:
+                    del self.pending_by_contract[order.contract]
+        return order
+
+    def _finish(self, order: OrderRecord, internal_status: str) -> None:
+        order.internal_status = internal_status
+        order.update_time = time.time()
+        self.archive.add(order)
+
+    def create_order(self, order_data: Dict, client_id: Optional[str] = None) -> str:
         internal_id = str(uuid.uuid4())
-        order = {
-            'order_id': None,
-            'internal_id': internal_id,
-            'internal_creation_time': float(datetime.now().timestamp()),
-            'internal_status': 'pending',
-            'contract': order_data['contract'],
-            'price': float(order_data['price']),
-            'quantity': float(order_data['size']),
-            'side': order_data['side'],
-            'text': order_data['text'],
-            'exchange_creation_time': None,
-            'refu': None,
-            'status': None
-        }
+        order = OrderRecord(
+            internal_id=internal_id,
+            contract=order_data['contract'],
+            price=float(order_data['price']),
+            quantity=float(order_data['size']),
+            side=order_data['side'],
+            text=order_data.get('text', ''),
+            internal_creation_time=float(datetime.now().timestamp()),
+            client_id=client_id,
+        )
         self.pending_orders[internal_id] = order
+        self.pending_by_contract.setdefault(order.contract, {})[internal_id] = order
+        self.by_internal_id[internal_id] = order
+        if client_id is not None:
+            self.by_client_id[client_id] = order
         return internal_id
 
-    def create_orders_from_list(self, orders_data: List[Dict]) -> List[str]:
-        return [self.create_order(order_data) for order_data in orders_data]
+    def create_orders_from_list(self, orders_data: List[Dict], client_ids: Optional[List[str]] = None) -> List[str]:
+        if client_ids is None:
+            return [self.create_order(order_data) for order_data in orders_data]
+        return [self.create_order(order_data, client_id) for order_data, client_id in zip(orders_data, client_ids)]
+
+    def update_order_with_exchange_details(self, internal_id: str, exchange_order: Dict) -> Optional[OrderRecord]:
+        order = self._pop_pending(internal_id)
+        if order is not None:
+            order.order_id = str(exchange_order['id'])
+            order.exchange_creation_time = exchange_order['create_time']
+            order.refu = bool(exchange_order['refu'])
+            order.status = exchange_order['status']
+            self._add_live(order)
+            early = self.early_updates.pop(order.order_id, None)
+            if early is not None:
+                self._apply_update(order, early)
+        return order
 
-    def update_order_with_exchange_details(self, internal_id: str, exchange_order: Dict):
-        if internal_id in self.pending_orders:
-            order = self.pending_orders.pop(internal_id)
-            order['order_id'] = str(exchange_order['id'])
-            order['exchange_creation_time'] = exchange_order['create_time']
-            order['refu'] = bool(exchange_order['refu'])
-            order['status'] = exchange_order['status']
-            order['internal_status'] = 'live'
-            self.live_orders[order['order_id']] = order
+    def close_pending_order(self, internal_id: str, internal_status: str, exchange_order: Optional[Dict] = None) -> Optional[OrderRecord]:
+        # a create that never went live: rejected, failed in transport, or filled/expired on arrival
+        order = self._pop_pending(internal_id)
+        if order is None:
+            return None
+        self.by_internal_id.pop(internal_id, None)
+        if order.client_id is not None:
+            self.by_client_id.pop(order.client_id, None)
+        if exchange_order is not None and 'id' in exchange_order:
+            order.order_id = str(exchange_order['id'])
+            order.status = exchange_order.get('status')
+            order.finish_as = exchange_order.get('finish_as')
+            if 'left' in exchange_order:
+                order.filled = abs(float(exchange_order.get('size', order.quantity))) - abs(float(exchange_order['left']))
+            self.early_updates.pop(order.order_id, None)
+        self._finish(order, internal_status)
+        return order
 
     def update_order_after_lifecycle(self, internal_id: str):
-        if internal_id in self.live_orders:
-            order = self.live_orders.pop(internal_id)
+        order = self.by_internal_id.get(internal_id)
+        if order is not None and order.order_id is not None and self._remove_live(order.order_id):
+            self._finish(order, 'finished')
 
+    def amend_order(self, order_id: str, exchange_order: Dict) -> Optional[OrderRecord]:
+        # amends keep the exchange id, so the record is updated in place
+        order = self.live_orders.get(order_id)
+        if order is None:
+            return None
+        order.price = float(exchange_order['price'])
+        order.quantity = float(exchange_order['size'])
+        order.status = exchange_order.get('status', order.status)
+        order.amend_count += 1
+        order.update_time = time.time()
+        if exchange_order.get('status') == 'finished':
+            # an amend below the filled size finishes the order
+            self._remove_live(order_id)
+            order.finish_as = exchange_order.get('finish_as')
+            self._finish(order, 'filled' if order.finish_as == 'filled' else 'cancelled')
+        return order
 
-    def get_live_orders(self, text: Optional[str] = None, contract: Optional[str] = None) -> List[Dict]:
-        filtered_orders = self.live_orders.values()
-        
-        if text:
-            filtered_orders = [order for order in filtered_orders if order['text'] == text]
-        
-        if contract:
-            filtered_orders = [order for order in filtered_orders if order['contract'] == contract]
-        
-        return list(filtered_orders)
+    def _apply_update(self, order: OrderRecord, update: Dict) -> OrderRecord:
+        order.status = update.get('status', order.status)
+        order.update_time = time.time()
+        if 'size' in update:
+            order.quantity = float(update['size'])
+        if 'price' in update:
+            order.price = float(update['price'])
+        if 'left' in update:
+            order.filled = max(order.filled, abs(order.quantity) - abs(float(update['left'])))
+        if order.status == 'finished':
+            order.finish_as = update.get('finish_as') or 'finished'
+            internal_status = 'filled' if order.finish_as == 'filled' else 'cancelled'
+            if self._remove_live(order.order_id) is not None:
+                self._finish(order, internal_status)
+            else:
+                # already archived from a cancel response; the stream says how it really ended
+                order.internal_status = internal_status
+        elif order.filled > 0:
+            order.internal_status = 'partially_filled'
+        return order
 
-    def get_order(self, order_id: str) -> Optional[Dict]:
-        return self.live_orders.get(order_id)
-    
+    def on_order_update(self, update: Dict) -> Optional[OrderRecord]:
+        """
+        Applies one futures.orders update. Returns the record, or None for an order we do not know
+        (yet): those are held until the create response brings the id.
+        """
+        self.stream_updates += 1
+        order_id = str(update['id'])
+        order = self.live_orders.get(order_id) or self.archive.recent.get(order_id)
+        if order is not None:
+            return self._apply_update(order, update)
+        order = self.ack_by_client_id(update)
+        if order is not None:
+            return order
+        self.early_updates[order_id] = update
+        self.early_updates.move_to_end(order_id)
+        if len(self.early_updates) > self.max_early_updates:
+            self.early_updates.popitem(last=False)
+        return None
 
-    def cancel_orders(self, order_ids: List[str]):
-        for order_id in order_ids:
-            if order_id in self.live_orders:
-                order = self.live_orders.pop(order_id)
-                order['internal_status'] = 'cancelled'
-                order['status'] = 'cancelled'
-                #self.cancelled_orders[order_id] = order
-                print("uncomment line 71 oms_gateio.py file when running this properly. this to keep ram usage low, otherwise cancelled orders pile in memory")
-            else:
-                print(f"Order ID {order_id} not found in live orders.")
+    def on_user_trade(self, trade: Dict) -> Optional[OrderRecord]:
+        """
+        Applies one futures.usertrades fill to its live order.
+        """
+        order = self.live_orders.get(str(trade.get('order_id')))
+        if order is None:
+            return None
+        self.stream_fills += 1
+        order.update_time = time.time()
+        order.trade_filled += abs(float(trade['size']))
+        order.filled = max(order.filled, order.trade_filled)
+        if order.filled >= abs(order.quantity):
+            order.status = 'finished'
+            order.finish_as = 'filled'
+            self._remove_live(order.order_id)
+            self._finish(order, 'filled')
+        else:
+            order.internal_status = 'partially_filled'
+        return order
+
+    def get_live_orders(self, text: Optional[str] = None, contract: Optional[str] = None, side: Optional[str] = None) -> List[OrderRecord]:
+        # start from the narrowest index that applies, then filter what is left
+        if contract and side:
+            orders: Iterable[OrderRecord] = self.by_contract_side.get((contract, side), {}).values()
+        elif contract:
+            orders = self.by_contract.get(contract, {}).values()
+        elif text:
+            orders = self.by_text.get(text, {}).values()
+        else:
+            orders = self.live_orders.values()
+
+        if text and contract:
+            orders = [order for order in orders if order.text == text]
+        if side and not contract:
+            orders = [order for order in orders if order.side == side]
+        return list(orders)
+
+    def get_order(self, order_id: str) -> Optional[OrderRecord]:
+        """
+        Live or pending order by exchange id, client id or internal id.
+        """
+        order = self.live_orders.get(order_id)
+        if order is None:
+            order = self.by_client_id.get(order_id) or self.by_internal_id.get(order_id)
+        return order
+
+    def get_working_orders(self, contract: str) -> List[OrderRecord]:
+        """
+        Live orders of `contract` plus creates still in flight that nobody asked to cancel.
+        """
+        orders = list(self.by_contract.get(contract, {}).values())
+        orders.extend(order for order in self.pending_by_contract.get(contract, {}).values() if order.pending_cancel is None)
+        return orders
+
+    def ack_by_client_id(self, exchange_order: Dict) -> Optional[OrderRecord]:
+        """
+        Acks a pending order from an exchange view of it (stream update, open orders) that carries
+        its client id, when that arrives before the create response.
+        """
+        order = self.by_client_id.get(exchange_order.get('text') or '')
+        if order is None or order.internal_status != 'pending':
+            return None
+        self.update_order_with_exchange_details(order.internal_id, exchange_order)
+        return self._apply_update(order, exchange_order)
+
+    def register_strategy(self, text: str, tag: str) -> None:
+        """
+        Gives a strategy whose text does not fit in a client id a short tag to go by. Register the
+        same tags again after a restart so adopted orders map back to their strategy.
+        """
+        if not _TAG.fullmatch(tag):
+            raise ValueError(f"Strategy tag {tag!r} must be 1 to {STRATEGY_TAG_LEN} of [0-9A-Za-z_.-]")
+        registered = self.strategy_tags.get(tag)
+        if registered is not None and registered != text:
+            raise ValueError(f"Strategy tag {tag!r} is already registered for {registered!r}")
+        self.strategy_tags[tag] = text
 
+    def strategy_tag(self, text: Optional[str]) -> Optional[str]:
+        """
+        The client id tag of a strategy text, None for no strategy. Raises ValueError for a text
+        that no tag gives back exactly.
+        """
+        if not text:
+            return None
+        for tag, registered in self.strategy_tags.items():
+            if registered == text:
+                return tag
+        tag = text[2:]
+        if text.startswith('t-') and _TAG.fullmatch(tag):
+            if tag in self.strategy_tags:
+                raise ValueError(f"Strategy {text!r} would share tag {tag!r} with {self.strategy_tags[tag]!r}")
+            return tag
+        raise ValueError(
+            f"Strategy {text!r} does not fit in a client id: use t- and up to {STRATEGY_TAG_LEN} of "
+            f"[0-9A-Za-z_.-], or register_strategy it with a short tag"
+        )
 
+    def client_id_strategy(self, client_id: str) -> Optional[str]:
+        """
+        The strategy text of one of our client ids ('' for none), None for any other text.
+        """
+        match = _CLIENT_ID.fullmatch(client_id)
+        if match is None:
+            return None
+        tag = match.group(1)
+        if tag is None:
+            return ''
+        return self.strategy_tags.get(tag, f"t-{tag}")
 
+    def adopt_order(self, exchange_order: Dict) -> OrderRecord:
+        """
+        Takes an open order found on the exchange but unknown here (a create that timed out, or
+        one left over from before a restart) into the book.
+        """
+        size = float(exchange_order['size'])
+        order = OrderRecord(
+            internal_id=str(uuid.uuid4()),
+            contract=exchange_order['contract'],
+            price=float(exchange_order['price']),
+            quantity=size,
+            side='buy' if size > 0 else 'sell',
+            text=exchange_order.get('text', ''),
+            order_id=str(exchange_order['id']),
+            internal_creation_time=float(datetime.now().timestamp()),
+            exchange_creation_time=exchange_order.get('create_time'),
+            refu=bool(exchange_order.get('refu')),
+        )
+        if order.text.startswith('t-'):
+            order.client_id = order.text
+            self.by_client_id[order.client_id] = order
+            strategy = self.client_id_strategy(order.client_id)
+            if strategy is not None:
+                order.text = strategy
+        self.by_internal_id[order.internal_id] = order
+        self._add_live(order)
+        return self._apply_update(order, exchange_order)
 
+    def evict_order(self, order_id: str) -> Optional[OrderRecord]:
+        """
+        Drops a live order the exchange no longer has. How it ended is unknown, finish_as says so.
+        """
+        order = self._remove_live(order_id)
+        if order is not None:
+            order.status = 'finished'
+            order.finish_as = 'evicted'
+            self._finish(order, 'cancelled')
+        return order
 
+    def sync_order(self, order_id: str, exchange_order: Dict) -> Optional[OrderRecord]:
+        """
+        Overwrites price, size and fill of a live order with the exchange's view of it.
+        """
+        order = self.live_orders.get(order_id)
+        return self._apply_update(order, exchange_order) if order is not None else None
+
+    def is_live(self, order_id: str) -> bool:
+        return order_id in self.live_orders
+
+    def get_archived_order(self, order_id: str) -> Optional[OrderRecord]:
+        """
+        Finished order by exchange id or internal id, from memory or the archive file.
+        """
+        return self.archive.get(order_id)
+
+    def cancel_orders(self, order_ids: List[str]):
+        for order_id in order_ids:
+            order = self._remove_live(order_id)
+            if order is not None:
+                order.status = 'cancelled'
+                self._finish(order, 'cancelled')
+            else:
+                # finished by the order stream before the cancel response came back
+                self.already_finished += 1
 
+    def close(self) -> None:
+        """
+        Flushes archived orders waiting to be written to disk.
+        """
+        self.archive.stop()
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from get_gateio import GetGateio
+from oms_gateio import OrderManagerGateio
+from order_stream_gateio import OrderStreamGateio
+from scheduler_gateio import INFO, RequestScheduler
+
+"""
+background check of OrderManagerGateio against the exchange's open orders, one contract at a time.
+
+contracts are polled in turn, spread evenly over `interval` so the private rate limit group sees
+a steady trickle instead of bursts, and through the scheduler's INFO lane so the polls never hold
+up a cancel or a create. each answer is diffed against the OMS contract index by order id and only
+the differences are applied:
+
+  adopted  open on the exchange, unknown here (a create that timed out, a previous run)
+  evicted  live here, gone from the exchange in two polls in a row (a fill or cancel we never
+           heard about; one miss may just be a stream update still on its way)
+  fixed    both agree it is open but price, size or fill differ
+
+open orders are fetched in pages of `page_size` (gate allows 1000, its default is 100). a contract
+that needs more than one page is read with offsets while orders come and go, so an order can fall
+between two pages: such a pass adopts and fixes but does not evict.
+
+anything the OMS changed after the poll was sent is left alone, since the answer may predate it.
+while the order stream is healthy the fills and cancels already arrive over it, so the polls slow
+down to `healthy_interval`; a stream reconnect (updates may have been lost) triggers a full pass.
+"""
+
+
+class OpenOrderReconciler:
+    def __init__(
+        self,
+        order_manager: OrderManagerGateio,
+        contracts: List[str],
+        get_gateio: Optional[GetGateio] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        order_stream: Optional[OrderStreamGateio] = None,
+        interval: float = 10.0,
+        healthy_interval: float = 120.0,
+        grace: float = 2.0,
+        page_size: int = 1000,
+        max_pages: int = 10,
+    ) -> None:
+        self.order_manager = order_manager
+        self.contracts = contracts
+        self.get_gateio = get_gateio if get_gateio is not None else GetGateio()
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.get_gateio.on_response = scheduler.observe
+        self.order_stream = order_stream
+        if order_stream is not None:
+            order_stream.reconnect_callback = self.request_sync
+        self.interval = interval
+        self.healthy_interval = healthy_interval
+        # orders created on the exchange less than `grace` seconds before a poll may still be on
+        # their way back to us as a create response, so they are not adopted yet
+        self.grace = grace
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self.wake = asyncio.Event()
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+
+        # live order ids missing from the last poll of their contract
+        self.suspects: Dict[str, set] = {contract: set() for contract in contracts}
+
+        self.polls = 0
+        self.errors = 0
+        self.paged = 0  # passes that needed more than one page and skipped evictions
+        self.drift: Dict[str, int] = {'adopted': 0, 'evicted': 0, 'fixed': 0}
+        self.last_drift: Dict[str, float] = {}  # contract -> time of the last pass that found any
+
+    def current_interval(self) -> float:
+        if self.order_stream is not None and self.order_stream.healthy:
+            return self.healthy_interval
+        return self.interval
+
+    def request_sync(self) -> None:
+        """
+        Starts a full pass now instead of waiting for the next slot.
+        """
+        self.wake.set()
+
+    async def fetch_page(self, contract: str, offset: int) -> List[Dict]:
+        if self.scheduler is not None:
+            return await self.scheduler.call(INFO, 'private', lambda: self.get_gateio.get_open_orders(contract, self.page_size, offset))
+        return await self.get_gateio.get_open_orders(contract, self.page_size, offset)
+
+    async def fetch(self, contract: str) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        All open orders of `contract`, page by page until a short page. Returns (orders, complete),
+        complete False when more than one page was needed; orders is the error response on failure.
+        """
+        orders: List[Dict] = []
+        for page in range(self.max_pages):
+            response = await self.fetch_page(contract, page * self.page_size)
+            if not isinstance(response, list):
+                return response, False
+            orders.extend(response)
+            if len(response) < self.page_size:
+                return orders, page == 0
+        return orders, False
+
+    @staticmethod
+    def differs(order, exchange_order: Dict) -> bool:
+        size = float(exchange_order['size'])
+        filled = abs(size) - abs(float(exchange_order.get('left', size)))
+        return order.price != float(exchange_order['price']) or order.quantity != size or order.filled != filled
+
+    def reconcile_contract(self, contract: str, exchange_orders: List[Dict], started: float, complete: bool = True) -> Dict[str, int]:
+        """
+        Applies the difference between the exchange's open orders for `contract`, fetched at
+        `started`, and the OMS. Orders are only evicted when the list is `complete`. Returns the
+        counts of what it changed.
+        """
+        counts = {'adopted': 0, 'evicted': 0, 'fixed': 0}
+        exchange = {str(exchange_order['id']): exchange_order for exchange_order in exchange_orders}
+        live = self.order_manager.by_contract.get(contract, {})
+
+        if complete:
+            missing = {order_id for order_id, order in live.items() if order_id not in exchange and order.update_time < started}
+            suspects = self.suspects.setdefault(contract, set())
+            for order_id in missing & suspects:
+                self.order_manager.evict_order(order_id)
+                counts['evicted'] += 1
+            self.suspects[contract] = missing - suspects
+        else:
+            self.paged += 1
+
+        for order_id, exchange_order in exchange.items():
+            order = live.get(order_id)
+            if order is None:
+                if self.order_manager.ack_by_client_id(exchange_order) is not None:
+                    continue  # a create whose response is still on its way, not drift
+                if float(exchange_order.get('create_time') or 0) >= started - self.grace:
+                    continue
+                archived = self.order_manager.archive.recent.get(order_id)
+                if archived is not None and archived.update_time >= started:
+                    continue  # finished here after the poll went out
+                self.order_manager.adopt_order(exchange_order)
+                counts['adopted'] += 1
+            elif order.update_time < started and self.differs(order, exchange_order):
+                self.order_manager.sync_order(order_id, exchange_order)
+                counts['fixed'] += 1
+
+        for kind, count in counts.items():
+            self.drift[kind] += count
+        if any(counts.values()):
+            self.last_drift[contract] = time.time()
+            print(f"open orders {contract}: adopted {counts['adopted']}, evicted {counts['evicted']}, fixed {counts['fixed']}")
+        return counts
+
+    async def sync_contract(self, contract: str) -> Optional[Dict[str, int]]:
+        started = time.time()
+        try:
+            exchange_orders, complete = await self.fetch(contract)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error fetching open orders for {contract}: {str(e)}")
+            return None
+        if not isinstance(exchange_orders, list):
+            self.errors += 1
+            print(f"Error fetching open orders for {contract}: {exchange_orders}")
+            return None
+        self.polls += 1
+        return self.reconcile_contract(contract, exchange_orders, started, complete)
+
+    async def sync_all(self) -> None:
+        await asyncio.gather(*(self.sync_contract(contract) for contract in self.contracts))
+
+    async def run(self) -> None:
+        self.running = True
+        async with self.get_gateio:
+            while self.running:
+                for contract in self.contracts:
+                    # one contract per slot, so a full round takes current_interval()
+                    try:
+                        await asyncio.wait_for(self.wake.wait(), self.current_interval() / max(1, len(self.contracts)))
+                    except asyncio.TimeoutError:
+                        await self.sync_contract(contract)
+                        continue
+                    self.wake.clear()
+                    await self.sync_all()
+                    break
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self) -> Dict:
+        return {'polls': self.polls, 'errors': self.errors, 'paged': self.paged, 'drift': dict(self.drift), 'interval': self.current_interval()}
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from endpoints_gateio import BaseEndpoint, WSLinks
+from oms_gateio import OrderManagerGateio
+from ws_gateio import PrivateWSConnection
+
+"""
+feeds OrderManagerGateio from the authenticated futures.orders and futures.usertrades channels,
+so fills and exchange-side cancels reach the OMS without polling REST for order status.
+
+both channels share one socket that resubscribes after a reconnect. updates missed while it was
+down are not replayed by gate; reconnect_callback is called so the open-order reconciler can
+fetch open orders straight away. `healthy` tells callers whether the stream can be trusted right now.
+"""
+
+
+class OrderStreamGateio:
+    def __init__(
+        self,
+        order_manager: OrderManagerGateio,
+        user_id: Optional[str] = None,
+        url: Optional[str] = None,
+        ping_interval: float = 5.0,
+        stale_timeout: float = 15.0,
+    ) -> None:
+        self.order_manager = order_manager
+        self.ws_links = WSLinks()
+
+        load_dotenv()
+        api_key = os.getenv('gateio_api_key')
+        api_secret = os.getenv('gateio_secret_key')
+        if not api_key or not api_secret:
+            raise ValueError("API key or secret not found in .env file")
+        # gate wants the user id in front of the contract on private channels; "!all" is every contract
+        user_id = user_id or os.getenv('gateio_user_id')
+        payload = [str(user_id), "!all"] if user_id else ["!all"]
+
+        self.channels = (self.ws_links.user_orders, self.ws_links.user_trades)
+        self.connection = PrivateWSConnection(
+            url or BaseEndpoint.ws,
+            [(channel, payload) for channel in self.channels],
+            self.on_message,
+            api_key,
+            api_secret,
+            on_reconnect=self._on_reconnect,
+            ping_interval=ping_interval,
+            stale_timeout=stale_timeout,
+            name="ws-orders",
+        )
+        self.subscribed: set = set()
+        self.task: Optional[asyncio.Task] = None
+        # called with each futures.usertrades fill, e.g. to update positions
+        self.trade_callbacks: List[Callable[[Dict], None]] = []
+        # called after the socket reconnected; updates sent while it was down are lost
+        self.reconnect_callback: Optional[Callable[[], None]] = None
+
+        self.order_updates = 0
+        self.trades = 0
+        self.last_update = 0.0
+
+    def on_message(self, data: Dict) -> None:
+        channel = data.get('channel')
+        event = data.get('event')
+        if event == 'update':
+            self.last_update = time.monotonic()
+            if channel == self.ws_links.user_orders:
+                for update in data.get('result') or []:
+                    self.order_updates += 1
+                    self.order_manager.on_order_update(update)
+            elif channel == self.ws_links.user_trades:
+                for trade in data.get('result') or []:
+                    self.trades += 1
+                    self.order_manager.on_user_trade(trade)
+                    for callback in self.trade_callbacks:
+                        callback(trade)
+        elif event == 'subscribe':
+            if data.get('error'):
+                print(f"ws-orders: subscribing to {channel} failed: {data['error']}")
+                self.subscribed.discard(channel)
+            else:
+                self.subscribed.add(channel)
+
+    def _on_reconnect(self, subscriptions) -> None:
+        if self.reconnect_callback:
+            self.reconnect_callback()
+
+    @property
+    def healthy(self) -> bool:
+        return self.connection.connected and self.subscribed.issuperset(self.channels)
+
+    async def start(self, timeout: float = 5.0) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.connection.run())
+        deadline = time.monotonic() + timeout
+        while not self.healthy and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    async def close(self) -> None:
+        await self.connection.close()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.subscribed.clear()
+
+
+async def main():
+    order_manager = OrderManagerGateio()
+    stream = OrderStreamGateio(order_manager)
+    stream.trade_callbacks.append(lambda trade: print(f"fill: {trade['contract']} {trade['size']} @ {trade['price']}"))
+    await stream.start()
+    print(f"order stream healthy: {stream.healthy}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(f"order updates: {stream.order_updates}, trades: {stream.trades}, live orders: {len(order_manager.live_orders)}")
+    finally:
+        await stream.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,96 +1,403 @@
 import asyncio
-from typing import List, Dict, Optional, Tuple
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple, Union
 from post_gateio import PostGateio
 from oms_gateio import OrderManagerGateio
+from order_stream_gateio import OrderStreamGateio
+from scheduler_gateio import CANCEL, CREATE, RequestScheduler
+from ws_trade_gateio import WSTradeError, WSTradeGateio
 
 
-
-from post_gateio import PostGateio
-import asyncio
+@dataclass
+class AmendBatch:
+    contract: Optional[str]
+    amends: Dict[str, Dict]  # order_id -> amend, the latest per order
+    done: asyncio.Future
+    sent: bool = False
 
 
 class OrderSubmissionGateio:
-    def __init__(self):
-        self.post_gateio = PostGateio()
-        self.order_manager = OrderManagerGateio()
+    def __init__(self, post_gateio: Optional[PostGateio] = None, order_manager: Optional[OrderManagerGateio] = None, scheduler: Optional[RequestScheduler] = None, ws_trade: Optional[WSTradeGateio] = None, route: str = 'rest', order_stream: Optional[OrderStreamGateio] = None):
+        self.post_gateio = post_gateio if post_gateio is not None else PostGateio()
+        self.order_manager = order_manager if order_manager is not None else OrderManagerGateio()
         self.session = None
+        # every call to the exchange goes through the scheduler: cancels first, then creates/amends
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.post_gateio.on_response = self.scheduler.observe
+        # connection warming probes share the public budget with snapshots
+        transport = self.post_gateio.transport
+        if transport.scheduler is None:
+            transport.scheduler = self.scheduler
+        # 'ws' sends orders over the websocket trading api when it is logged in and falls back to
+        # REST if the socket is down; each call can override it with via=
+        self.ws_trade = ws_trade
+        self.route = route
+        self.ws_fallbacks = 0
+        # private orders/usertrades stream keeping the OMS in step with fills and exchange cancels
+        self.order_stream = order_stream
+        self.skipped_cancels = 0
+        # every order is sent with a unique t- text, so it can be cancelled or amended before its
+        # create response (and exchange id) is back. it starts with the order's strategy tag, which
+        # is how orders picked up after a restart are told apart; the session part is random so
+        # ids from other processes and earlier runs do not collide
+        self.client_session = self.base36(int.from_bytes(os.urandom(8), 'big') % 36 ** 6).rjust(6, '0')
+        self.client_ids = itertools.count(1)
+        self.early_cancels = 0
+        self.late_cancels = 0
+        self.late_amends = 0
+        # contract -> amends waiting in the scheduler that later amends of the contract join
+        self.amend_batches: Dict[str, AmendBatch] = {}
+        self.merged_amends = 0
 
     async def __aenter__(self):
         self.session = await self.post_gateio.__aenter__()
+        self.scheduler.start()
+        if self.ws_trade is not None:
+            try:
+                await self.ws_trade.start()
+            except asyncio.TimeoutError:
+                print("WS order entry not logged in yet, using REST until it is")
+        if self.order_stream is not None:
+            await self.order_stream.start()
+            if not self.order_stream.healthy:
+                print("Order stream not subscribed yet, fills show up once it is")
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
+        await self.scheduler.stop()
+        if self.post_gateio.transport.scheduler is self.scheduler:
+            self.post_gateio.transport.scheduler = None
+        if self.ws_trade is not None:
+            await self.ws_trade.close()
+        if self.order_stream is not None:
+            await self.order_stream.close()
         await self.post_gateio.__aexit__(exc_type, exc, tb)
-
-    async def submit_bulk_orders(self, orders_data: List[Dict]) -> List[Dict]:
+        self.order_manager.close()
+
+    async def _send(self, lane: int, group: str, rest_call, ws_call, via: Optional[str], retry_on_timeout: bool, cost: Union[float, Callable[[], float]] = 1.0, ws_cost: Union[float, Callable[[], float], None] = None):
+        """
+        Sends through the websocket trading api when routed there and ready, otherwise (or when
+        the request never reached the exchange) through REST. Creates are not retried after a
+        timeout as they may have gone through; cancels and amends are. `ws_cost` is what the
+        websocket route is charged where it differs from REST, `cost` otherwise.
+        """
+        if (via or self.route) == 'ws' and self.ws_trade is not None and self.ws_trade.ready:
+            retry = (ConnectionError, asyncio.TimeoutError) if retry_on_timeout else (ConnectionError,)
+            try:
+                return await self.scheduler.call(lane, group, ws_call, cost=cost if ws_cost is None else ws_cost)
+            except retry as e:
+                self.ws_fallbacks += 1
+                print(f"WS order entry failed ({e!r}), falling back to REST")
+        return await self.scheduler.call(lane, group, rest_call, cost=cost)
+
+    @staticmethod
+    def base36(n: int) -> str:
+        digits = ''
+        while True:
+            n, digit = divmod(n, 36)
+            digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+            if not n:
+                return digits
+
+    def next_client_id(self, tag: Optional[str] = None) -> str:
+        # gate allows 28 characters after the t-: a tag of up to 14, then the session and a
+        # counter that lasts 36**6 orders
+        client_id = f"{self.client_session}-{self.base36(next(self.client_ids))}"
+        return f"t-{tag}-{client_id}" if tag else f"t-{client_id}"
+
+    @staticmethod
+    def chunks(items: List, size: int) -> List[List]:
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    @staticmethod
+    def chunk_error(result) -> Optional[str]:
+        # a whole batch request failing comes back as an exception or a single error dict
+        if isinstance(result, BaseException):
+            return repr(result)
+        if isinstance(result, dict):
+            return result.get('label') or 'UNKNOWN_ERROR'
+        return None
+
+    async def submit_orders(self, orders_data: List[Dict], via: Optional[str] = None) -> List[Dict]:
+        """
+        Creates any number of orders: split into exchange sized batches that are sent concurrently
+        (the scheduler paces them). Returns one {'internal_id', 'order', 'error'} per input, in
+        input order; `order` is the live OMS record or None, `error` the exchange label if any.
+        An order's `text` is its strategy: the OMS keeps it as given and the client id carries
+        its tag (see OrderManagerGateio.strategy_tag, which raises ValueError for a text without
+        one; nothing is sent then).
+        """
         if not self.session:
             raise RuntimeError("Session not initialized. Use 'async with' to create OrderSubmissionGateio instance.")
-        
-        try:
-            # Create pending orders in the order manager
-            internal_ids = self.order_manager.create_orders_from_list(orders_data)
 
-            # Submit orders to the exchange
-            exchange_submission = await self.post_gateio.create_order_batch(orders_data)
-
-            # Process the exchange response and update order manager
-            submitted_orders = []
-            for internal_id, exchange_order in zip(internal_ids, exchange_submission):
+        # Create pending orders in the order manager, each under its own client id, which carries
+        # the strategy text's tag
+        tags = [self.order_manager.strategy_tag(order.get('text')) for order in orders_data]
+        client_ids = [self.next_client_id(tag) for tag in tags]
+        internal_ids = self.order_manager.create_orders_from_list(orders_data, client_ids)
+        orders_data = [dict(order, text=client_id) for order, client_id in zip(orders_data, client_ids)]
+
+        def send(batch):
+            return self._send(
+                CREATE, 'place',
+                lambda: self.post_gateio.create_order_batch(batch),
+                lambda: self.ws_trade.place_orders([self.post_gateio.create_order_payload(**order) for order in batch]),
+                via, retry_on_timeout=False,
+            )
+
+        batches = self.chunks(orders_data, self.post_gateio.max_batch_orders)
+        id_batches = self.chunks(internal_ids, self.post_gateio.max_batch_orders)
+        responses = await asyncio.gather(*(send(batch) for batch in batches), return_exceptions=True)
+
+        # Process the exchange responses and update order manager
+        results = []
+        for ids, response in zip(id_batches, responses):
+            error = self.chunk_error(response)
+            if error is not None:
+                print(f"Error submitting batch of {len(ids)} orders: {error}")
+                response = [{'label': error}] * len(ids)
+            for internal_id, exchange_order in zip(ids, response):
                 if exchange_order.get('status') == 'open':
                     self.order_manager.update_order_with_exchange_details(internal_id, exchange_order)
-                    submitted_order = self.order_manager.get_order(str(exchange_order['id']))
-                    if submitted_order:
-                        submitted_orders.append(submitted_order)
+                    results.append({'internal_id': internal_id, 'order': self.order_manager.get_order(str(exchange_order['id'])), 'error': None})
+                elif exchange_order.get('succeeded', False) or exchange_order.get('status') == 'finished':
+                    # accepted but done on arrival (filled, ioc)
+                    self.order_manager.close_pending_order(internal_id, exchange_order.get('finish_as') or 'finished', exchange_order)
+                    results.append({'internal_id': internal_id, 'order': None, 'error': None})
                 else:
-                    # Handle failed orders if necessary
-                    print(f"Order submission failed for internal ID: {internal_id}")
-
-            return submitted_orders
+                    label = exchange_order.get('label') or 'REJECTED'
+                    self.order_manager.close_pending_order(internal_id, 'rejected', exchange_order)
+                    if error is None:
+                        print(f"Order submission failed for internal ID: {internal_id}: {label}")
+                    results.append({'internal_id': internal_id, 'order': None, 'error': label})
+        await self.run_late_operations(internal_ids)
+        return results
+
+    async def run_late_operations(self, internal_ids: List[str]) -> None:
+        """
+        Carries out cancels and amends that were asked for before these orders were acked.
+        """
+        cancels, amends = [], []
+        for internal_id in internal_ids:
+            order = self.order_manager.get_order(internal_id)
+            if order is None or order.order_id is None or not self.order_manager.is_live(order.order_id):
+                continue
+            if order.pending_cancel == 'on_ack':
+                order.pending_cancel = None
+                cancels.append(order.order_id)
+            elif order.pending_amend is not None:
+                amends.append(dict(order.pending_amend, order_id=order.order_id))
+                order.pending_amend = None
+        self.late_cancels += len(cancels)
+        self.late_amends += len(amends)
+        requests = []
+        if cancels:
+            requests.append(self.cancel_bulk_orders(cancels))
+        if amends:
+            requests.append(self.amend_bulk_orders(amends))
+        if requests:
+            await asyncio.gather(*requests)
+
+    async def cancel_before_ack(self, order) -> None:
+        """
+        Cancels a pending order by its client id. If the create has not reached the book yet the
+        exchange does not know the id, and the cancel waits for the ack instead.
+        """
+        order.pending_cancel = 'sent'
+        self.early_cancels += 1
+        try:
+            result = await self._send(
+                CANCEL, 'cancel',
+                lambda: self.post_gateio.cancel_order(order.client_id),
+                lambda: self.ws_trade.cancel_order(order.client_id),
+                None, retry_on_timeout=True,
+            )
+        except Exception as e:
+            result = {'label': e.label if isinstance(e, WSTradeError) else repr(e)}
+        if isinstance(result, dict) and 'id' in result:
+            order.pending_cancel = None
+            if order.order_id is not None and self.order_manager.is_live(order.order_id):
+                self.order_manager.cancel_orders([order.order_id])
+            else:
+                self.order_manager.close_pending_order(order.internal_id, 'cancelled', result)
+        elif order.order_id is not None and self.order_manager.is_live(order.order_id):
+            # acked while the cancel was out; now the exchange id works
+            order.pending_cancel = None
+            await self.cancel_bulk_orders([order.order_id])
+        elif order.internal_status == 'pending':
+            order.pending_cancel = 'on_ack'
+
+    async def submit_bulk_orders(self, orders_data: List[Dict], via: Optional[str] = None) -> List[Dict]:
+        """
+        Creates orders and returns the OMS records of those that went live, in input order.
+        """
+        try:
+            results = await self.submit_orders(orders_data, via)
+            return [result['order'] for result in results if result['order'] is not None]
 
+        except RuntimeError:
+            raise
         except Exception as e:
             print(f"Error submitting bulk orders: {str(e)}")
             return []
-        
 
+    async def cancel_bulk_orders(self, order_ids: List[str], via: Optional[str] = None) -> List[Dict]:
+        if not self.session:
+            raise RuntimeError("Session not initialized. Use 'async with' to create OrderSubmissionGateio instance.")
+        
+        # ids may be exchange ids or client ids. orders the stream already saw finish (filled, or
+        # cancelled on the exchange) are not sent, creates still in flight are cancelled by client id
+        live_ids, early = [], []
+        for order_id in order_ids:
+            order = self.order_manager.get_order(str(order_id))
+            if order is None or order.pending_cancel is not None:
+                self.skipped_cancels += 1
+            elif order.order_id is None:
+                early.append(order)
+            else:
+                live_ids.append(order.order_id)
+        order_ids = live_ids
+        # these go out alongside the batches below
+        early_cancels = asyncio.gather(*(self.cancel_before_ack(order) for order in early), return_exceptions=True)
 
+        try:
+            def send(batch):
+                return self._send(
+                    CANCEL, 'cancel',
+                    lambda: self.post_gateio.cancel_order_batch(batch),
+                    lambda: self.ws_trade.cancel_orders(batch),
+                    via, retry_on_timeout=True,
+                )
+
+            # Cancel orders on the exchange, every batch in one concurrent wave
+            batches = self.chunks(order_ids, self.post_gateio.max_batch_cancels)
+            responses = await asyncio.gather(*(send(batch) for batch in batches), return_exceptions=True)
+            cancellation_results = []
+            unsent = set()
+            for batch, response in zip(batches, responses):
+                error = self.chunk_error(response)
+                if error is None:
+                    cancellation_results.extend(response)
+                else:
+                    # the batch never went through, these orders are still live
+                    print(f"Error cancelling batch of {len(batch)} orders: {error}")
+                    unsent.update(batch)
+                    cancellation_results.extend({'id': str(order_id), 'succeeded': False, 'message': error} for order_id in batch)
+
+            # Update order manager; an order whose cancel failed because it had just filled is
+            # corrected to filled when its futures.orders update arrives
+            self.order_manager.cancel_orders([order_id for order_id in order_ids if order_id not in unsent])
+            return cancellation_results
 
+        except Exception as e:
+            print(f"Error cancelling bulk orders: {str(e)}")
+            return []
+        finally:
+            await early_cancels
 
 
-    async def cancel_bulk_orders(self, order_ids: List[str]) -> List[Dict]:
+    async def amend_bulk_orders(self, amends: List[Dict], via: Optional[str] = None) -> List[Dict]:
+        """
+        amends: [{'order_id', 'price', 'size'}], price and/or size. Returns the amended OMS records.
+        """
         if not self.session:
             raise RuntimeError("Session not initialized. Use 'async with' to create OrderSubmissionGateio instance.")
-        
+
+        # ids may be exchange ids or client ids; an amend of a create still in flight is kept on
+        # the order (the latest one wins) and sent once it is acked
+        resolved = []
+        for amend in amends:
+            order = self.order_manager.get_order(str(amend['order_id']))
+            if order is not None and order.order_id is None:
+                if order.pending_cancel is None:
+                    order.pending_amend = {field: value for field, value in amend.items() if field != 'order_id'}
+                continue
+            resolved.append(dict(amend, order_id=order.order_id) if order is not None else amend)
+        amends = resolved
+        if not amends:
+            return []
+
+        by_id = {str(amend['order_id']): amend for amend in amends}
+        contracts = {getattr(self.order_manager.get_order(order_id), 'contract', None) for order_id in by_id}
+        contract = contracts.pop() if len(contracts) == 1 else None
+        batch = self.amend_batches.get(contract) if contract is not None else None
         try:
-            # Cancel orders on the exchange
-            cancellation_results = await self.post_gateio.cancel_order_batch(order_ids)
-            for order in cancellation_results:
-                if order['succeeded'] == 'False':
-                    retry_count = 0
-                    max_retries = 3
-                    while retry_count < max_retries:
-                        try:
-                            print(f"Retrying cancellation for order ID: {order['order_id']}. Attempt {retry_count + 1}")
-                            # Attempt to cancel the order again
-                            retry_result = await self.post_gateio.cancel_order(order['order_id'])
-                            if retry_result['succeeded'] == 'True':
-                                print(f"Retry successful for order ID: {order['order_id']}")
-                                break
-                        except Exception as retry_error:
-                            print(f"Retry failed for order ID: {order['order_id']}. Error: {str(retry_error)}")
-                        retry_count += 1
-                    
-                    # will cause issues if an order is already filled???
-                    # if retry_count == max_retries:
-                    #     raise RuntimeError(f"Order cancellation failed after {max_retries} attempts for order ID: {order['order_id']}")
-
-            # Update order manager
-            self.order_manager.cancel_orders(order_ids)
-            return cancellation_results
+            if batch is not None and not batch.sent:
+                # the contract's previous amends are still queued: these go out with them,
+                # replacing an earlier amend of the same order
+                batch.amends.update(by_id)
+                self.merged_amends += len(by_id)
+                outcome = await asyncio.shield(batch.done)
+            else:
+                batch = AmendBatch(contract, dict(by_id), asyncio.get_running_loop().create_future())
+                if contract is not None:
+                    self.amend_batches[contract] = batch
+                outcome = await self._send_amends(batch, via)
+            return [outcome[order_id] for order_id in by_id if outcome.get(order_id) is not None]
 
         except Exception as e:
-            print(f"Error cancelling bulk orders: {str(e)}")
+            print(f"Error amending bulk orders: {str(e)}")
             return []
 
+    async def _send_amends(self, batch: AmendBatch, via: Optional[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Sends a batch of amends and applies the results to the OMS. Returns order_id -> amended
+        OMS record (None where the amend failed), which is also what every caller of the batch gets.
+        """
+        def close() -> List[Dict]:
+            # called by the scheduler as it sends the batch; nothing is added after this
+            batch.sent = True
+            if self.amend_batches.get(batch.contract) is batch:
+                del self.amend_batches[batch.contract]
+            return list(batch.amends.values())
+
+        async def send(amends):
+            if len(amends) == 1:
+                return amends, [await self.post_gateio.amend_order(**amends[0])]
+            # batch amends are capped lower than creates, larger lists go out as concurrent batches
+            batches = self.chunks(amends, self.post_gateio.max_batch_amends)
+            responses = await asyncio.gather(*(self.post_gateio.amend_order_batch(batch) for batch in batches), return_exceptions=True)
+            results = []
+            for batch, response in zip(batches, responses):
+                error = self.chunk_error(response)
+                results.extend([{'succeeded': False, 'label': error}] * len(batch) if error is not None else response)
+            return amends, results
+
+        async def send_ws(amends):
+            # the ws api amends one order per request; they go out together
+            results = await asyncio.gather(*(self.ws_trade.amend_order(**amend) for amend in amends), return_exceptions=True)
+            for result in results:
+                if isinstance(result, (ConnectionError, asyncio.TimeoutError)):
+                    raise result
+            return amends, [
+                {'succeeded': False, 'label': result.label} if isinstance(result, WSTradeError) else result
+                for result in results
+            ]
+
+        # priced when sent, by then the batch may have grown: a request per batch on REST, a request
+        # per amend on the websocket
+        cost = lambda: len(self.chunks(list(batch.amends), self.post_gateio.max_batch_amends))
+        ws_cost = lambda: len(batch.amends)
+        outcome: Dict[str, Optional[Dict]] = {}
+        try:
+            amends, results = await self._send(CREATE, 'place', lambda: send(close()), lambda: send_ws(close()), via, retry_on_timeout=True, cost=cost, ws_cost=ws_cost)
+            for amend, result in zip(amends, results):
+                order_id = str(amend['order_id'])
+                outcome[order_id] = None
+                if result.get('succeeded', 'id' in result):
+                    outcome[order_id] = self.order_manager.amend_order(order_id, result)
+                else:
+                    print(f"Order amend failed for order ID: {order_id}: {result.get('label')}")
+            return outcome
+        finally:
+            # also when the send failed or was cancelled: callers that joined get what there is
+            close()
+            if not batch.done.done():
+                batch.done.set_result(outcome)
+
 
     async def cancel_orders_by_strategy(self, strategy: str) -> List[Dict]:
         if not self.session:
@@ -104,7 +411,7 @@ class OrderSubmissionGateio:
                 print(f"No live orders found for strategy: {strategy}")
                 return []
 
-            order_ids = [order['order_id'] for order in live_orders]
+            order_ids = [order.order_id for order in live_orders]
             
             # Cancel the filtered orders
             cancelled_orders = await self.cancel_bulk_orders(order_ids)
@@ -128,7 +435,7 @@ class OrderSubmissionGateio:
                 print(f"No live orders found for contract: {contract}")
                 return []
 
-            order_ids = [order['order_id'] for order in live_orders]
+            order_ids = [order.order_id for order in live_orders]
             
             # Cancel the filtered orders
             cancelled_orders = await self.cancel_bulk_orders(order_ids)
@@ -142,6 +449,9 @@ class OrderSubmissionGateio:
     def get_live_orders(self, text: str = None, contract: str = None) -> List[Dict]:
         return self.order_manager.get_live_orders(text, contract)
 
+    def get_working_orders(self, contract: str) -> List[Dict]:
+        return self.order_manager.get_working_orders(contract)
+
     def get_order(self, order_id: str) -> Dict:
         return self.order_manager.get_order(order_id)  
 
@@ -1,26 +1,88 @@
 import asyncio
+import time
 import numpy as np
-from typing import Dict, Any, List, Callable
-from baseorderbook import Orderbook
+import orjson
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Any, List, Callable, Optional
+from baseorderbook import Orderbook, LadderOrderbook
+from decode_gateio import DepthDecoderGateio
+from shm_store_gateio import SharedOrderbookStore
+from journal_gateio import SNAPSHOT_CHANNEL
 from ws_gateio import WSGateio
 from get_gateio import GetGateio
+from scheduler_gateio import INFO, RequestScheduler
+
+
+@dataclass
+class ResyncStats:
+    count: int = 0  # snapshots requested after a gap (or at startup)
+    failures: int = 0  # snapshot requests that errored and were retried
+    last_started: float = 0.0  # wall clock time of the last resync
+    last_duration: float = 0.0  # seconds from gap to book live again
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+
 
 class OrderbookGateio:
-    def __init__(self, contracts: List[str], size: int) -> None:
-        self.ws_gateio = WSGateio()
-        self.get_gateio = GetGateio()
+    def __init__(self, contracts: List[str], size: int, tick_sizes: Optional[Dict[str, float]] = None, max_backlog: int = 10_000, conflate_threshold: Optional[int] = None, ws_connections: int = 1, shared_store_name: Optional[str] = None, get_gateio: Optional[GetGateio] = None, scheduler: Optional[RequestScheduler] = None) -> None:
+        self.ws_gateio = WSGateio(num_connections=ws_connections)
+        self.get_gateio = get_gateio if get_gateio is not None else GetGateio()
+        # snapshots go through the scheduler's INFO lane when there is one, behind orders
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.get_gateio.on_response = scheduler.observe
         self.contracts = contracts
         self.size = size
-        self.orderbooks: Dict[str, Orderbook] = {contract: Orderbook(size) for contract in contracts}
+        # contracts with a known tick size use the tick-indexed ladder engine, the rest the sorted book
+        self.tick_sizes = tick_sizes or {}
+        self.orderbooks: Dict[str, Orderbook] = {contract: self.make_orderbook(contract) for contract in contracts}
+        self.decoder = DepthDecoderGateio(contracts, capacity=max(2 * size, 64))
+        # optional copy of every book in named shared memory for readers in other processes
+        self.shared_store = SharedOrderbookStore(shared_store_name, contracts, size) if shared_store_name else None
         self.base_ids: Dict[str, int] = {contract: None for contract in contracts}
-        self.cached_updates: Dict[str, List[Dict[str, Any]]] = {contract: [] for contract in contracts}
+        # deltas received while a contract is waiting for a snapshot, applied in order once it arrives.
+        # bounded so a stuck resync cannot grow memory; dropped deltas just trigger another resync
+        self.cached_updates: Dict[str, Deque[Dict[str, Any]]] = {contract: deque(maxlen=max_backlog) for contract in contracts}
         self.is_initialized: Dict[str, bool] = {contract: False for contract in contracts}
+
+        # conflation (opt-in): live deltas are queued and drained once the ws reader yields. if more
+        # than conflate_threshold are pending they are merged into one net delta and applied once
+        self.conflate_threshold = conflate_threshold
+        self.pending_updates: Dict[str, Deque[Dict[str, Any]]] = {contract: deque() for contract in contracts}
+        self.drain_scheduled: Dict[str, bool] = {contract: False for contract in contracts}
+        self.conflated_updates: Dict[str, int] = {contract: 0 for contract in contracts}
+        self.conflated_batches: Dict[str, int] = {contract: 0 for contract in contracts}
+
+        # at most one snapshot in flight per contract, fetched over the shared get_gateio session
+        self.resync_tasks: Dict[str, asyncio.Task] = {}
+        self.resync_stats: Dict[str, ResyncStats] = {contract: ResyncStats() for contract in contracts}
+        self.resync_max_delay = 5.0
+        # optional JournalWriter: ws frames and REST snapshots are recorded for replay
+        self.recorder = None
         self.running = False
+        # called with (contract, bids, asks) after each update. bids and asks are views into the
+        # book's reused buffers, valid only during the call: copy them to keep them past it
         self.on_update_callback = None
-
+        # called with a contract whose book stopped being current (its socket dropped); the next
+        # on_update_callback for it comes once it is resynced
+        self.on_stale_callback: Optional[Callable[[str], None]] = None
+        # snapshots checking whether a contract without updates is quiet or on a frozen socket
+        self.feed_checks: Dict[str, asyncio.Task] = {}
+        self.frozen_feeds: Dict[str, int] = {contract: 0 for contract in contracts}
+
+    def make_orderbook(self, contract: str):
+        if contract in self.tick_sizes:
+            return LadderOrderbook(self.size, self.tick_sizes[contract])
+        return Orderbook(self.size)
 
     async def initialize_orderbooks(self) -> None:
         self.ws_gateio.message_callback = self.process_ws_message
+        self.ws_gateio.reconnect_callback = self.on_ws_reconnect
+        self.ws_gateio.disconnect_callback = self.on_ws_disconnect
+        self.ws_gateio.stale_callback = self.on_ws_stale
+        if self.recorder is not None:
+            self.ws_gateio.recorder = self.recorder
         for contract in self.contracts:
             self.ws_gateio.add_orderbook_subscription(contract)
         
@@ -28,47 +90,164 @@ class OrderbookGateio:
 
         await asyncio.sleep(2)
 
-        async with self.get_gateio as gateio:
-            for contract in self.contracts:
-                initial_data = await gateio.get_orderbook(contract, self.size)
-                self.process_ob_snapshot(contract, initial_data)
-
+        # one session for the lifetime of the manager, shared by every snapshot request
+        await self.get_gateio.__aenter__()
+        await asyncio.gather(*(self.request_resync(contract) for contract in self.contracts))
         for contract in self.contracts:
-            self.is_initialized[contract] = True
             print(f"Orderbook for {contract} initialized successfully")
-            await self.apply_updates(contract)
 
 
     def process_ws_message(self, data: Dict[str, Any]) -> None:
+        # deltas arrive in order on a single socket, so applying them synchronously here keeps
+        # strict U/u ordering per contract without a task per message
         if 'result' in data and isinstance(data['result'], dict):
             update = data['result']
             contract = update.get('s')
             if contract in self.contracts and ('a' in update or 'b' in update):
-                if self.is_initialized[contract]:
-                    asyncio.create_task(self.apply_single_update(contract, update))
-                else:
+                if not self.is_initialized[contract]:
                     self.cached_updates[contract].append(update)
+                elif self.conflate_threshold:
+                    self.pending_updates[contract].append(update)
+                    if not self.drain_scheduled[contract]:
+                        self.drain_scheduled[contract] = True
+                        asyncio.get_running_loop().call_soon(self.drain_pending, contract)
+                else:
+                    self.apply_single_update(contract, update)
+
+    def drain_pending(self, contract: str) -> None:
+        self.drain_scheduled[contract] = False
+        pending = self.pending_updates[contract]
+        if self.is_initialized[contract]:
+            self.apply_batch(contract, pending)
+        # a gap while draining leaves the contract resyncing: the rest wait for the snapshot
+        self.cached_updates[contract].extend(pending)
+        pending.clear()
+
+    def on_ws_reconnect(self, contracts: List[str]) -> None:
+        # deltas were lost while the socket was down: rebuild those books from a snapshot
+        for contract in contracts:
+            if contract in self.is_initialized:
+                print(f"Websocket reconnected, resyncing {contract}")
+                self.request_resync(contract)
+
+    def on_ws_disconnect(self, contracts: List[str]) -> None:
+        # nothing arrives for these until the socket is back and they are resynced
+        for contract in contracts:
+            if contract in self.is_initialized:
+                self.is_initialized[contract] = False
+                if self.on_stale_callback:
+                    self.on_stale_callback(contract)
+
+    def on_ws_stale(self, contracts: List[str]) -> None:
+        for contract in contracts:
+            if self.is_initialized.get(contract) and contract not in self.feed_checks:
+                self.feed_checks[contract] = asyncio.create_task(self.check_feed(contract))
+
+    async def check_feed(self, contract: str) -> None:
+        """
+        A contract without updates for a while is either quiet or on a socket that stopped sending
+        them while still answering pings. A snapshot tells which: if the book moved past the last
+        delta applied, the socket is reconnected, which marks its books stale and resyncs them.
+        """
+        try:
+            snapshot = await self.fetch_snapshot(contract)
+        except Exception as e:
+            print(f"Checking the feed of {contract} failed: {e}")
+            return
+        finally:
+            self.feed_checks.pop(contract, None)
+        base_id = self.base_ids[contract]
+        if isinstance(snapshot, dict) and self.is_initialized[contract] and base_id is not None and self.extract_obid(snapshot) > base_id:
+            print(f"No updates for {contract} although its book moved, reconnecting its websocket")
+            self.frozen_feeds[contract] += 1
+            await self.ws_gateio.reconnect(contract)
+
+    def backlog(self, contract: str) -> int:
+        """
+        Number of deltas buffered for a contract, either waiting for a snapshot or for the
+        conflation drain.
+        """
+        return len(self.cached_updates[contract]) + len(self.pending_updates[contract])
 
 
     def process_ob_snapshot(self, contract: str, data: Dict[str, Any]) -> None:
         if isinstance(data, dict) and 'asks' in data and 'bids' in data:
+            if self.recorder is not None:
+                self.recorder.record(orjson.dumps({'channel': SNAPSHOT_CHANNEL, 'contract': contract, 'result': data}))
             ob = self.orderbooks[contract]
-            ob.asks = np.array([[float(ask['p']), float(ask['s'])] for ask in data['asks']])
-            ob.bids = np.array([[float(bid['p']), float(bid['s'])] for bid in data['bids']])
+            bids, asks = self.decoder.decode_snapshot(contract, data)
+            ob.load_snapshot(bids, asks)
             self.base_ids[contract] = self.extract_obid(data)
+            if self.shared_store is not None:
+                self.shared_store.write(contract, ob.bids, ob.asks, self.base_ids[contract], int(float(data.get('current', 0)) * 1000))
             if self.on_update_callback:
                 self.on_update_callback(contract, ob.bids, ob.asks)
         else:
             raise ValueError(f"Unexpected orderbook snapshot data structure for {contract}")
 
 
-    async def apply_updates(self, contract: str) -> None:
-        for update in self.cached_updates[contract]:
-            await self.apply_single_update(contract, update)
-        self.cached_updates[contract].clear()
-
-
-    async def apply_single_update(self, contract: str, update: Dict[str, Any]) -> None:
+    def apply_updates(self, contract: str) -> None:
+        """
+        Marks the contract live and drains its buffered deltas in arrival order. Stops early
+        if a delta reveals a gap, leaving the rest buffered for the next snapshot.
+        """
+        self.is_initialized[contract] = True
+        self.apply_batch(contract, self.cached_updates[contract])
+
+    def apply_batch(self, contract: str, updates: Deque[Dict[str, Any]]) -> None:
+        """
+        Applies queued deltas in order, conflating them when conflation is enabled and more
+        than conflate_threshold are queued. Stops at a gap, leaving the rest in `updates`.
+        """
+        while updates and self.is_initialized[contract]:
+            if self.conflate_threshold and len(updates) > self.conflate_threshold:
+                update, count = self.conflate(contract, updates)
+                if count > 1:
+                    self.conflated_updates[contract] += count - 1
+                    self.conflated_batches[contract] += 1
+                self.apply_single_update(contract, update)
+            else:
+                self.apply_single_update(contract, updates.popleft())
+
+    def conflate(self, contract: str, updates: Deque[Dict[str, Any]]) -> tuple[Dict[str, Any], int]:
+        """
+        Pops the longest run of contiguous deltas off `updates` and merges it into one delta
+        spanning the run's U/u range, last write wins per price. Deltas already covered by the
+        book are dropped first. Returns the merged delta and how many deltas it replaces.
+        """
+        base_id = self.base_ids[contract]
+        while len(updates) > 1 and base_id is not None and int(updates[0].get('u', base_id + 1)) <= base_id:
+            updates.popleft()
+
+        first = updates.popleft()
+        try:
+            U, u = self.extract_identifier(first)
+        except KeyError:
+            return first, 1
+        bids = {level['p']: level for level in first.get('b', ())}
+        asks = {level['p']: level for level in first.get('a', ())}
+        count = 1
+        while updates:
+            try:
+                next_U, next_u = self.extract_identifier(updates[0])
+            except KeyError:
+                break
+            if next_U > u + 1:
+                break
+            update = updates.popleft()
+            for level in update.get('b', ()):
+                bids[level['p']] = level
+            for level in update.get('a', ()):
+                asks[level['p']] = level
+            u = next_u
+            count += 1
+
+        if count == 1:
+            return first, 1
+        return {'s': contract, 'U': U, 'u': u, 'b': list(bids.values()), 'a': list(asks.values())}, count
+
+
+    def apply_single_update(self, contract: str, update: Dict[str, Any]) -> None:
         try:
             U, u = self.extract_identifier(update)
         except KeyError:
@@ -79,19 +258,20 @@ class OrderbookGateio:
 
         ob = self.orderbooks[contract]
         if U <= self.base_ids[contract] + 1 <= u:
-            if 'a' in update:
-                asks = np.array([[float(ask['p']), float(ask['s'])] for ask in update['a']])
-                ob.update_asks(asks)
-
-            if 'b' in update:
-                bids = np.array([[float(bid['p']), float(bid['s'])] for bid in update['b']])
-                ob.update_bids(bids)
+            bids, asks = self.decoder.decode_update(contract, update)
+            ob.update_book(bids, asks)
 
             self.base_ids[contract] = u
+            if self.shared_store is not None:
+                self.shared_store.write(contract, ob.bids, ob.asks, u, int(update.get('t', 0)))
             if self.on_update_callback:
                 self.on_update_callback(contract, ob.bids, ob.asks)
         elif U > self.base_ids[contract] + 1:
-            await self.reconstruct_orderbook(contract)
+            # gap: buffer from here on and resync. is_initialized stays False until the
+            # snapshot is in, so later deltas queue up behind this one instead of resyncing again
+            self.is_initialized[contract] = False
+            self.cached_updates[contract].appendleft(update)
+            self.request_resync(contract)
 
     @staticmethod
     def extract_identifier(data: Dict[str, Any]) -> tuple[int, int]:
@@ -104,14 +284,50 @@ class OrderbookGateio:
         return int(data.get('id', 0))
 
 
+    async def fetch_snapshot(self, contract: str) -> Dict[str, Any]:
+        if self.scheduler is not None:
+            return await self.scheduler.call(INFO, 'public', lambda: self.get_gateio.get_orderbook(contract, self.size))
+        return await self.get_gateio.get_orderbook(contract, self.size)
+
+    def request_resync(self, contract: str) -> asyncio.Task:
+        """
+        Starts a background snapshot resync for a contract unless one is already in flight, and
+        returns its task. Deltas are buffered until it completes; other contracts are unaffected.
+        """
+        self.is_initialized[contract] = False
+        task = self.resync_tasks.get(contract)
+        if task is None or task.done():
+            task = asyncio.create_task(self.reconstruct_orderbook(contract))
+            self.resync_tasks[contract] = task
+        return task
+
     async def reconstruct_orderbook(self, contract: str) -> None:
-        self.cached_updates[contract].clear()
         self.is_initialized[contract] = False
-        async with self.get_gateio as gateio:
-            initial_data = await gateio.get_orderbook(contract, self.size)
-        self.process_ob_snapshot(contract, initial_data)
-        self.is_initialized[contract] = True
-        await self.apply_updates(contract)
+        stats = self.resync_stats[contract]
+        stats.count += 1
+        stats.last_started = time.time()
+        start = time.perf_counter()
+
+        delay = 0.1
+        while True:
+            try:
+                initial_data = await self.fetch_snapshot(contract)
+                self.process_ob_snapshot(contract, initial_data)
+                break
+            except Exception as e:
+                stats.failures += 1
+                print(f"Resync of {contract} failed: {e}. Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, self.resync_max_delay)
+
+        # done fetching: a gap found while replaying the buffer must be able to start a new resync
+        self.resync_tasks.pop(contract, None)
+        self.apply_updates(contract)
+
+        duration = time.perf_counter() - start
+        stats.last_duration = duration
+        stats.max_duration = max(stats.max_duration, duration)
+        stats.total_duration += duration
 
 
     async def run(self) -> None:
@@ -124,8 +340,19 @@ class OrderbookGateio:
     async def cleanup(self) -> None:
         print("Cleaning up OrderbookGateio...")
         self.running = False
+        for task in self.resync_tasks.values():
+            task.cancel()
+        self.resync_tasks.clear()
+        for task in self.feed_checks.values():
+            task.cancel()
+        self.feed_checks.clear()
+        if getattr(self.get_gateio, 'acquired', False):
+            await self.get_gateio.__aexit__(None, None, None)
         if hasattr(self.ws_gateio, 'cleanup'):
             await self.ws_gateio.cleanup()
+        if self.shared_store is not None:
+            self.shared_store.close()
+            self.shared_store = None
         print("OrderbookGateio cleanup completed")
 
 
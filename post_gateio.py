@@ -1,14 +1,22 @@
 import aiohttp
 import json
+import orjson
+from typing import Optional
 from endpoints_gateio import BaseEndpoint, GetLinks, PostLinks
 import asyncio
 import os
 from dotenv import load_dotenv
 from auth_gateio import AuthGateio
+from transport_gateio import TransportGateio, shared_transport
 import asyncio
 
 class PostGateio:
-    def __init__(self):
+    # exchange limits per batch request
+    max_batch_orders = 20
+    max_batch_cancels = 20
+    max_batch_amends = 10
+
+    def __init__(self, transport: Optional[TransportGateio] = None):
         self.base_endpoint = BaseEndpoint()
         self.get_links = GetLinks()
         self.post_links = PostLinks()
@@ -23,13 +31,32 @@ class PostGateio:
             raise ValueError("API key or secret not found in .env file")
         
         self.auth = AuthGateio(api_key, api_secret)
+        # called with (method, path, status, headers) after every response, e.g. RequestScheduler.observe
+        self.on_response = None
+        # sessions come from a shared, pre-warmed connection pool instead of one per client
+        self.transport = transport if transport is not None else shared_transport()
+        self.session = None
+        # this client holds one use of the transport at most, however often it is entered or exited
+        self.acquired = False
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if not self.acquired:
+            self.acquired = True
+            try:
+                self.session = await self.transport.acquire()
+            except Exception:
+                self.acquired = False
+                raise
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        await self.session.close()
+        if self.acquired:
+            self.acquired = False
+            await self.transport.release()
+
+    def observe(self, method: str, path: str, response) -> None:
+        if self.on_response is not None:
+            self.on_response(method, path, response.status, response.headers)
 
 
     # # endpoint does not seem to work. POTENTIALLY DEPRICATED DO NOT USE THIS METHOD
@@ -99,18 +126,17 @@ class PostGateio:
         }
     
     async def create_order_batch(self, orders_data: list):
-        if len(orders_data) > 20:
-            raise ValueError("Can only create up to 20 orders in a batch")
+        if len(orders_data) > self.max_batch_orders:
+            raise ValueError(f"Can only create up to {self.max_batch_orders} orders in a batch")
 
         url = self.post_links.create_order_batch
-        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
 
         orders = [self.create_order_payload(**order) for order in orders_data]
-        payload = json.dumps(orders)
-        sign_headers = self.auth.gen_sign('POST', url, '', payload)
-        headers.update(sign_headers)
+        payload = orjson.dumps(orders)
+        headers = self.auth.get_headers('POST', url, '', payload)
 
         async with self.session.post(f"{self.base_url}{url}", headers=headers, data=payload) as response:
+            self.observe('POST', url, response)
             return await response.json()
         
 
@@ -145,18 +171,63 @@ class PostGateio:
     #         return processed_response
         
 
+    async def cancel_order(self, order_id: str):
+        # order_id is the exchange id or, while the order is in the book, its t- text
+        url = self.post_links.cancel_single_order.format(order_id=order_id)
+        headers = self.auth.get_headers('DELETE', url, '')
+
+        async with self.session.delete(f"{self.base_url}{url}", headers=headers) as response:
+            self.observe('DELETE', url, response)
+            return await response.json()
+
     async def cancel_order_batch(self, order_ids: list):
-        if len(order_ids) > 20:
-            raise ValueError("Can only cancel up to 20 orders in a batch")
+        if len(order_ids) > self.max_batch_cancels:
+            raise ValueError(f"Can only cancel up to {self.max_batch_cancels} orders in a batch")
 
         url = self.post_links.cancel_order_batch
-        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-        
-        body = json.dumps(order_ids)
-        sign_headers = self.auth.gen_sign('POST', url, '', body)
-        headers.update(sign_headers)
+
+        body = orjson.dumps(order_ids)
+        headers = self.auth.get_headers('POST', url, '', body)
+
+        async with self.session.post(f"{self.base_url}{url}", headers=headers, data=body) as response:
+            self.observe('POST', url, response)
+            return await response.json()
+
+    @staticmethod
+    def amend_order_payload(price: Optional[float] = None, size: Optional[float] = None, amend_text: str = '', order_id: Optional[str] = None):
+        # size is the new total size including what has filled, same sign as the order
+        payload = {}
+        if order_id is not None:
+            payload["order_id"] = int(order_id)
+        if price is not None:
+            payload["price"] = str(price)
+        if size is not None:
+            payload["size"] = int(size)
+        if amend_text:
+            payload["amend_text"] = amend_text
+        return payload
+
+    async def amend_order(self, order_id: str, price: Optional[float] = None, size: Optional[float] = None, amend_text: str = ''):
+        url = self.post_links.amend_order_single.format(order_id=order_id)
+
+        body = orjson.dumps(self.amend_order_payload(price, size, amend_text))
+        headers = self.auth.get_headers('PUT', url, '', body)
+
+        async with self.session.put(f"{self.base_url}{url}", headers=headers, data=body) as response:
+            self.observe('PUT', url, response)
+            return await response.json()
+
+    async def amend_order_batch(self, amends: list):
+        if len(amends) > self.max_batch_amends:
+            raise ValueError(f"Can only amend up to {self.max_batch_amends} orders in a batch")
+
+        url = self.post_links.amend_order_batch
+
+        body = orjson.dumps([self.amend_order_payload(**amend) for amend in amends])
+        headers = self.auth.get_headers('POST', url, '', body)
 
         async with self.session.post(f"{self.base_url}{url}", headers=headers, data=body) as response:
+            self.observe('POST', url, response)
             return await response.json()
 
 
@@ -1,9 +1,10 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from orderbook_gateio import OrderbookGateio
+from scheduler_gateio import RequestScheduler
+from shard_gateio import ShardedOrderbookGateio
 from inventory_manager_gateio import InventoryManagerGateio
 import asyncio
-from features_gateio import FeaturesGateio
 
 class ContractParams:
     def __init__(self, contract: str):
@@ -59,19 +60,36 @@ class ContractParams:
         self.price_step = step
 
 class QuoteGenerator:
-    def __init__(self, contracts: List[str], orderbook_depth: int = 20):
+    def __init__(self, contracts: List[str], orderbook_depth: int = 20, tick_sizes: Dict[str, float] = None, shards: int = 0, scheduler: Optional[RequestScheduler] = None):
         self.contracts = contracts
-        self.orderbook_manager = OrderbookGateio(contracts=contracts, size=orderbook_depth)
+        if shards > 1:
+            # market data in worker processes, delivered through the same callback. their snapshot
+            # requests cannot share this process's scheduler
+            self.orderbook_manager = ShardedOrderbookGateio(contracts=contracts, size=orderbook_depth, shards=shards, tick_sizes=tick_sizes)
+        else:
+            self.orderbook_manager = OrderbookGateio(contracts=contracts, size=orderbook_depth, tick_sizes=tick_sizes, scheduler=scheduler)
         self.orderbook_manager.on_update_callback = self.on_orderbook_update
-        self.inventory_manager = InventoryManagerGateio()
+        self.orderbook_manager.on_stale_callback = self.on_orderbook_stale
+        self.inventory_manager = InventoryManagerGateio(scheduler)
         self.inventory_manager.on_position_update = self.on_position_update
         self.positions: Dict[str, float] = {contract: 0.0 for contract in contracts}
         self.contract_params: Dict[str, ContractParams] = {contract: ContractParams(contract) for contract in contracts}
         self.current_quotes: Dict[str, Dict[str, float]] = {contract: {'buy_price': 0, 'sell_price': 0, 'buy_size': 0, 'sell_size': 0} for contract in contracts}
+        # one "latest quote wins" slot per contract: current_quotes holds the value, the event says it
+        # changed since the executor last looked. repeated updates before then collapse into one wake up
+        self.quote_updated: Dict[str, asyncio.Event] = {contract: asyncio.Event() for contract in contracts}
 
     def on_orderbook_update(self, contract: str, bids: np.ndarray, asks: np.ndarray):
         self.generate_quotes(contract, bids[0][0], asks[0][0])
 
+    def on_orderbook_stale(self, contract: str):
+        # no quotes off a book that is not current: zeroed quotes make the executor pull the
+        # orders, and the next update after the resync quotes afresh
+        quote = self.current_quotes[contract]
+        if any(quote.values()):
+            quote.update(buy_price=0, sell_price=0, buy_size=0, sell_size=0)
+            self.quote_updated[contract].set()
+
     def on_position_update(self, positions: List[Tuple[str, float]]):
         for contract, size in positions:
             if contract in self.positions:
@@ -119,16 +137,16 @@ class QuoteGenerator:
                 current_quote['sell_price'] = new_sell_price
                 current_quote['sell_size'] = new_sell_size
 
-            asyncio.create_task(self.quote_update_queue.put(contract))
-
-
+            self.quote_updated[contract].set()
 
-
-
-
-    
-    async def wait_for_quote_update(self):
-        return await self.quote_update_queue.get()
+    async def wait_for_quote_update(self, contract: str) -> Dict[str, float]:
+        """
+        Waits until the quotes for `contract` change, then returns a copy of the latest ones.
+        """
+        event = self.quote_updated[contract]
+        await event.wait()
+        event.clear()
+        return dict(self.current_quotes[contract])
     
     async def run(self):
         await asyncio.gather(
@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+from oms_gateio import OrderRecord
+
+"""
+turns the desired quotes for a contract into the smallest set of order actions against what is
+live in OrderManagerGateio, instead of cancelling everything and resubmitting.
+
+per side: nothing wanted -> cancel what is live. nothing live -> create. otherwise the live order
+closest to the quote is kept if its price is within the side's adjustment threshold and its size
+matches, amended (or cancelled and recreated when amends are off) if not, and any extra orders on
+that side are cancelled.
+"""
+
+
+@dataclass
+class ReconcileActions:
+    creates: List[Dict] = field(default_factory=list)
+    cancels: List[str] = field(default_factory=list)
+    amends: List[Dict] = field(default_factory=list)  # {'order_id', 'price', 'size'}
+
+    def count(self) -> int:
+        return len(self.creates) + len(self.cancels) + len(self.amends)
+
+    def __bool__(self) -> bool:
+        return self.count() > 0
+
+
+class QuoteReconciler:
+    def __init__(self, allow_amends: bool = False, window: float = 60.0) -> None:
+        self.allow_amends = allow_amends
+        self.window = window
+        # (time, actions sent, actions cancel-all-then-resubmit would have sent)
+        self.history: Deque[Tuple[float, int, int]] = deque()
+        self.total_actions = 0
+        self.total_baseline = 0
+
+    @staticmethod
+    def desired_orders(contract: str, quotes: Dict[str, float]) -> Dict[str, Optional[Dict]]:
+        desired = {'buy': None, 'sell': None}
+        if quotes['buy_size'] != 0:
+            desired['buy'] = {"contract": contract, "size": quotes['buy_size'], "price": str(quotes['buy_price']), "side": "buy"}
+        if quotes['sell_size'] != 0:
+            desired['sell'] = {"contract": contract, "size": quotes['sell_size'], "price": str(quotes['sell_price']), "side": "sell"}
+        return desired
+
+    def reconcile_side(self, desired: Optional[Dict], live_orders: List[OrderRecord], threshold_bps: float, actions: ReconcileActions) -> None:
+        if desired is None:
+            actions.cancels.extend(order.ref for order in live_orders)
+            return
+        if not live_orders:
+            actions.creates.append(desired)
+            return
+
+        price = float(desired['price'])
+        size = abs(float(desired['size']))
+        keep = min(live_orders, key=lambda order: abs(order.price - price))
+        actions.cancels.extend(order.ref for order in live_orders if order is not keep)
+
+        price_ok = price != 0 and abs(keep.price - price) / price < threshold_bps / 10000
+        size_ok = abs(keep.quantity) == size
+        if price_ok and size_ok:
+            return
+        if self.allow_amends:
+            actions.amends.append({'order_id': keep.ref, 'price': desired['price'], 'size': desired['size']})
+        else:
+            actions.cancels.append(keep.ref)
+            actions.creates.append(desired)
+
+    def reconcile(self, contract: str, quotes: Dict[str, float], live_orders: List[OrderRecord], long_threshold_bps: float, short_threshold_bps: float) -> ReconcileActions:
+        """
+        Returns the actions that move `live_orders` (OrderManagerGateio records for `contract`,
+        creates still in flight included) to `quotes` (a QuoteGenerator.current_quotes entry).
+        Cancels and amends name orders by `ref`, the client id for those not acked yet.
+        """
+        desired = self.desired_orders(contract, quotes)
+        actions = ReconcileActions()
+        self.reconcile_side(desired['buy'], [order for order in live_orders if order.side == 'buy'], long_threshold_bps, actions)
+        self.reconcile_side(desired['sell'], [order for order in live_orders if order.side == 'sell'], short_threshold_bps, actions)
+
+        baseline = len(live_orders) + sum(order is not None for order in desired.values())
+        self.record(actions.count(), baseline)
+        return actions
+
+    def record(self, sent: int, baseline: int) -> None:
+        now = time.time()
+        self.history.append((now, sent, baseline))
+        self.total_actions += sent
+        self.total_baseline += baseline
+        while self.history and self.history[0][0] < now - self.window:
+            self.history.popleft()
+
+    def saved_per_minute(self) -> float:
+        """
+        API actions saved over the last `window` seconds versus cancel-all-then-resubmit, per minute.
+        """
+        if not self.history:
+            return 0.0
+        saved = sum(baseline - sent for _, sent, baseline in self.history)
+        return saved * 60.0 / self.window
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'actions': self.total_actions,
+            'baseline_actions': self.total_baseline,
+            'saved': self.total_baseline - self.total_actions,
+            'saved_per_minute': self.saved_per_minute(),
+        }
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import time
+import numpy as np
+import orjson
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from endpoints_gateio import WSLinks
+from baseorderbook import LadderOrderbook, Orderbook
+from journal_gateio import SNAPSHOT_CHANNEL, iter_journal
+from orderbook_gateio import OrderbookGateio
+
+"""
+replays a recorded journal (see journal_gateio.py) straight into OrderbookGateio, bypassing
+WSGateio, either as fast as possible or paced on the recorded receive times.
+
+python replay_gateio.py <journal dir> [--paced] [--speed 2] [--contracts BTC_USDT,ETH_USDT]
+"""
+
+
+class RecordedSnapshots:
+    """
+    Stands in for GetGateio during a replay: a resync after a gap waits for the next snapshot
+    recorded for that contract instead of calling the exchange.
+    """
+
+    session = None
+
+    def __init__(self) -> None:
+        self.waiting: Dict[str, asyncio.Future] = {}
+
+    async def get_orderbook(self, contract: str, depth: int):
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[contract] = future
+        return await future
+
+    def deliver(self, contract: str, data: Dict) -> bool:
+        future = self.waiting.pop(contract, None)
+        if future is None or future.done():
+            return False
+        future.set_result(data)
+        return True
+
+
+@dataclass
+class ReplayStats:
+    frames: int = 0
+    updates: int = 0
+    snapshots: int = 0
+    other: int = 0
+    elapsed: float = 0.0
+    decode_ns: int = 0
+    book_ns: int = 0
+    callback_ns: int = 0
+    callbacks: int = 0
+    latencies_ns: List[int] = field(default_factory=list)
+
+    def report(self) -> str:
+        handled = self.updates + self.snapshots
+        lines = [
+            f"frames {self.frames} (updates {self.updates}, snapshots {self.snapshots}, other {self.other}) in {self.elapsed:.3f}s",
+            f"throughput {self.frames / self.elapsed if self.elapsed else 0:,.0f} frames/s",
+        ]
+        if handled:
+            lines.append(
+                f"per message: decode {self.decode_ns / handled / 1e3:.2f} us, "
+                f"book {(self.book_ns - self.callback_ns) / handled / 1e3:.2f} us, "
+                f"callback {self.callback_ns / max(self.callbacks, 1) / 1e3:.2f} us x {self.callbacks}"
+            )
+            latencies = np.array(self.latencies_ns) / 1e3
+            lines.append(
+                f"decode+book+callback p50 {np.percentile(latencies, 50):.2f} us, "
+                f"p99 {np.percentile(latencies, 99):.2f} us, max {latencies.max():.2f} us"
+            )
+        return "\n".join(lines)
+
+
+class ReplayGateio:
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "ws",
+        contracts: Optional[List[str]] = None,
+        size: int = 20,
+        paced: bool = False,
+        speed: float = 1.0,
+        yield_every: int = 100,
+        on_update_callback: Optional[Callable] = None,
+        **orderbook_kwargs,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.contracts = contracts
+        self.size = size
+        self.paced = paced
+        self.speed = speed
+        # max speed mode yields to the loop every this many frames, like a socket reader would,
+        # so conflation drains and resync tasks get to run
+        self.yield_every = yield_every
+        # same contract as OrderbookGateio.on_update_callback: bids and asks only valid during the call
+        self.on_update_callback = on_update_callback
+        self.orderbook_kwargs = orderbook_kwargs
+        self.ws_links = WSLinks()
+        self.stats = ReplayStats()
+        self.orderbook_manager: Optional[OrderbookGateio] = None
+
+    def scan_contracts(self) -> List[str]:
+        contracts = set()
+        for _, frame in iter_journal(self.directory, self.prefix):
+            data = orjson.loads(frame)
+            if data.get('channel') == SNAPSHOT_CHANNEL:
+                contracts.add(data['contract'])
+            elif data.get('channel') == self.ws_links.orderbook_update and isinstance(data.get('result'), dict):
+                contracts.add(data['result'].get('s'))
+        contracts.discard(None)
+        return sorted(contracts)
+
+    def warmup(self) -> None:
+        # compile the numba book kernels up front so jit time does not land in the first frames
+        levels = np.array([[1.0, 1.0], [0.5, 0.0]])
+        for ob in (Orderbook(self.size), LadderOrderbook(self.size, 0.5)):
+            ob.load_snapshot(levels.copy(), levels.copy())
+            ob.update_book(levels.copy(), levels.copy())
+            ob.bids, ob.asks
+
+    def _timed_callback(self, contract: str, bids: np.ndarray, asks: np.ndarray) -> None:
+        start = time.perf_counter_ns()
+        self.on_update_callback(contract, bids, asks)
+        self.stats.callback_ns += time.perf_counter_ns() - start
+        self.stats.callbacks += 1
+
+    async def run(self) -> ReplayStats:
+        contracts = self.contracts or self.scan_contracts()
+        self.warmup()
+        snapshots = RecordedSnapshots()
+        ob = OrderbookGateio(contracts, self.size, get_gateio=snapshots, **self.orderbook_kwargs)
+        self.orderbook_manager = ob
+        if self.on_update_callback:
+            ob.on_update_callback = self._timed_callback
+
+        stats = self.stats
+        orderbook_channel = self.ws_links.orderbook_update
+        perf_counter_ns = time.perf_counter_ns
+        first_recv = None
+        start_ns = perf_counter_ns()
+
+        for recv_ns, frame in iter_journal(self.directory, self.prefix):
+            stats.frames += 1
+            if self.paced:
+                if first_recv is None:
+                    first_recv = recv_ns
+                delay = (recv_ns - first_recv) / self.speed - (perf_counter_ns() - start_ns)
+                if delay > 0:
+                    await asyncio.sleep(delay / 1e9)
+            elif stats.frames % self.yield_every == 0:
+                await asyncio.sleep(0)
+
+            t0 = perf_counter_ns()
+            data = orjson.loads(frame)
+            t1 = perf_counter_ns()
+            channel = data.get('channel')
+            if channel == orderbook_channel:
+                ob.process_ws_message(data)
+                stats.updates += 1
+            elif channel == SNAPSHOT_CHANNEL and data['contract'] in ob.is_initialized:
+                contract = data['contract']
+                stats.snapshots += 1
+                if snapshots.deliver(contract, data['result']):
+                    # a resync is waiting on this snapshot; let its task apply it
+                    await asyncio.sleep(0)
+                else:
+                    ob.process_ob_snapshot(contract, data['result'])
+                    ob.apply_updates(contract)
+            else:
+                stats.other += 1
+                continue
+            t2 = perf_counter_ns()
+            stats.decode_ns += t1 - t0
+            stats.book_ns += t2 - t1
+            stats.latencies_ns.append(t2 - t0)
+
+        await asyncio.sleep(0)
+        stats.elapsed = (perf_counter_ns() - start_ns) / 1e9
+        for task in ob.resync_tasks.values():
+            task.cancel()
+        return stats
+
+
+async def main():
+    from shard_gateio import compute_features
+
+    parser = argparse.ArgumentParser(description="Replay a recorded websocket journal through OrderbookGateio")
+    parser.add_argument("directory")
+    parser.add_argument("--prefix", default="ws")
+    parser.add_argument("--contracts", default=None, help="comma separated, default: every contract in the journal")
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--paced", action="store_true", help="replay on the recorded receive times")
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier")
+    parser.add_argument("--conflate", type=int, default=None, help="conflate_threshold for OrderbookGateio")
+    args = parser.parse_args()
+
+    def features(contract, bids, asks):
+        compute_features(bids, asks, 5)
+
+    replay = ReplayGateio(
+        args.directory,
+        prefix=args.prefix,
+        contracts=args.contracts.split(",") if args.contracts else None,
+        size=args.size,
+        paced=args.paced,
+        speed=args.speed,
+        on_update_callback=features,
+        conflate_threshold=args.conflate,
+    )
+    stats = await replay.run()
+    print(stats.report())
+    ob = replay.orderbook_manager
+    for contract in ob.contracts:
+        resync = ob.resync_stats[contract]
+        print(f"{contract}: resyncs {resync.count}, conflated {ob.conflated_updates[contract]}, backlog {ob.backlog(contract)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,235 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+from collections import deque
+from endpoints_gateio import GetLinks, PostLinks
+
+"""
+owns outbound REST calls: every call is queued on a priority lane and sent when the token bucket
+of its endpoint group has budget. cancels go before creates/amends, which go before informational
+GETs. buckets start from the documented limits and are corrected from gate's
+X-Gate-RateLimit-* response headers, and a 429 empties the bucket until the reset time.
+"""
+
+# group: (requests, window seconds)
+RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+    'place': (100, 1.0),
+    'cancel': (200, 1.0),
+    'private': (200, 10.0),
+    'public': (300, 10.0),
+}
+
+CANCEL, CREATE, INFO = range(3)  # lanes, lowest number goes first
+
+_get_links = GetLinks()
+_post_links = PostLinks()
+
+
+def endpoint_group(method: str, path: str) -> Optional[str]:
+    """
+    Rate limit group of a REST call, None for paths that are not rate limited.
+    """
+    if method == 'PUT' or (method == 'POST' and path in (_post_links.create_order_batch, _post_links.create_order_single, _post_links.amend_order_batch)):
+        return 'place'
+    if method == 'DELETE' or path == _post_links.cancel_order_batch:
+        return 'cancel'
+    if path in (_get_links.orderbook, _get_links.futures_tickers, _get_links.server_time):
+        return 'public'
+    if path.startswith('/api/'):
+        return 'private'
+    return None
+
+
+class TokenBucket:
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float = 1.0) -> None:
+        self.tokens -= cost
+
+    def sync(self, remaining: int, limit: Optional[int] = None, reset_ms: Optional[int] = None) -> None:
+        """
+        Corrects the bucket from what the exchange says is left in its window.
+        """
+        now = time.monotonic()
+        self.refill(now)
+        if limit and limit != self.limit:
+            self.limit = limit
+            self.rate = limit / self.window
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_ms:
+            self.block(reset_ms)
+
+    def block(self, reset_ms: Optional[int] = None) -> None:
+        now = time.monotonic()
+        self.tokens = 0.0
+        delay = reset_ms / 1000 - time.time() if reset_ms else self.window
+        self.blocked_until = max(self.blocked_until, now + max(0.0, min(delay, self.window)))
+
+    def budget(self) -> float:
+        if time.monotonic() < self.blocked_until:
+            return 0.0
+        self.refill(time.monotonic())
+        return self.tokens / self.limit
+
+
+@dataclass
+class ScheduledRequest:
+    group: str
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    # a callable is priced when the request is sent, for requests whose payload grows while queued
+    cost: Union[float, Callable[[], float]] = 1.0
+    queued: float = field(default_factory=time.monotonic)
+
+    def price(self) -> float:
+        return self.cost() if callable(self.cost) else self.cost
+
+
+class RequestScheduler:
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None) -> None:
+        limits = limits or RATE_LIMITS
+        self.buckets: Dict[str, TokenBucket] = {group: TokenBucket(limit, window) for group, (limit, window) in limits.items()}
+        self.lanes: List[Deque[ScheduledRequest]] = [deque() for _ in range(3)]
+        self.wake = asyncio.Event()
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.inflight: set = set()
+
+        self.sent: Dict[str, int] = {group: 0 for group in self.buckets}
+        self.throttled: Dict[str, int] = {group: 0 for group in self.buckets}
+        self.max_queue_delay = 0.0
+
+    def start(self) -> None:
+        if self.dispatcher is None:
+            self.dispatcher = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        for lane in self.lanes:
+            while lane:
+                request = lane.popleft()
+                if not request.future.done():
+                    request.future.cancel()
+
+    def submit(self, lane: int, group: str, factory: Callable[[], Awaitable[Any]], cost: Union[float, Callable[[], float]] = 1.0) -> asyncio.Future:
+        """
+        Queues `factory` (a coroutine function making one REST call, called when the request is
+        sent) and returns a future for its result.
+        """
+        request = ScheduledRequest(group, factory, asyncio.get_running_loop().create_future(), cost)
+        self.lanes[lane].append(request)
+        self.wake.set()
+        return request.future
+
+    async def call(self, lane: int, group: str, factory: Callable[[], Awaitable[Any]], cost: Union[float, Callable[[], float]] = 1.0) -> Any:
+        if self.dispatcher is None:
+            self.start()
+        return await self.submit(lane, group, factory, cost)
+
+    def next_request(self) -> Tuple[Optional[ScheduledRequest], float]:
+        # highest priority lane first; within a lane requests keep their order. a lane whose head is
+        # waiting on its bucket does not hold up lanes below it that use other groups
+        wait = float('inf')
+        for lane in self.lanes:
+            if not lane:
+                continue
+            request = lane[0]
+            delay = self.buckets[request.group].wait_time(request.price())
+            if delay == 0:
+                lane.popleft()
+                return request, 0.0
+            wait = min(wait, delay)
+        return None, wait
+
+    async def run(self) -> None:
+        while True:
+            request, wait = self.next_request()
+            if request is None:
+                self.wake.clear()
+                try:
+                    await asyncio.wait_for(self.wake.wait(), None if wait == float('inf') else wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if request.future.done():
+                continue
+            self.buckets[request.group].take(request.price())
+            self.sent[request.group] += 1
+            self.max_queue_delay = max(self.max_queue_delay, time.monotonic() - request.queued)
+            # the factory is called here, so whatever it reads is fixed at the point it is charged
+            try:
+                call = request.factory()
+            except Exception as e:
+                request.future.set_exception(e)
+                continue
+            task = asyncio.create_task(self.execute(request, call))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+
+    async def execute(self, request: ScheduledRequest, call: Awaitable[Any]) -> None:
+        try:
+            result = await call
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def observe(self, method: str, path: str, status: int, headers) -> None:
+        """
+        Response hook for PostGateio/GetGateio: syncs the group's bucket with the rate limit headers.
+        """
+        group = endpoint_group(method, path)
+        bucket = self.buckets.get(group)
+        if bucket is None:
+            return
+        reset = headers.get('X-Gate-RateLimit-Reset-Timestamp')
+        reset_ms = int(reset) if reset else None
+        if status == 429:
+            self.throttled[group] += 1
+            bucket.block(reset_ms)
+            return
+        remaining = headers.get('X-Gate-RateLimit-Requests-Remain')
+        if remaining is not None:
+            limit = headers.get('X-Gate-RateLimit-Limit')
+            bucket.sync(int(remaining), int(limit) if limit else None, reset_ms)
+
+    def budget(self, group: str) -> float:
+        """
+        Fraction of the group's budget left right now, 0 when throttled.
+        """
+        return self.buckets[group].budget()
+
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self.lanes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'sent': dict(self.sent),
+            'throttled': dict(self.throttled),
+            'queued': self.queued(),
+            'max_queue_delay': self.max_queue_delay,
+            'budget': {group: round(self.budget(group), 3) for group in self.buckets},
+        }
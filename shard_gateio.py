@@ -0,0 +1,225 @@
+import asyncio
+import multiprocessing as mp
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+from features_gateio import Features
+from shm_store_gateio import attach, unlink
+
+"""
+sharded market data: contracts are split over worker processes, each running its own
+WSGateio + OrderbookGateio, and every book update is published as a fixed size top-N record
+into a shared memory ring read by the strategy process.
+"""
+
+N_FEATURES = 3  # mid, volume weighted mid, imbalance
+HEADER = 5  # contract index, update id, n bids, n asks, publish time
+
+
+class ShmRing:
+    """
+    Single producer / single consumer ring of fixed size float64 records in shared memory.
+
+    The producer only writes `head`, the consumer only writes `tail`, and a record is fully
+    written before `head` moves past it, so no lock is needed. On a full ring the producer drops
+    the record and counts it: every record carries the whole top-N book, so the next one for the
+    same contract supersedes it.
+    """
+
+    def __init__(self, size: int, capacity: int = 4096, name: Optional[str] = None) -> None:
+        self.size = size
+        self.capacity = capacity
+        self.record_len = HEADER + N_FEATURES + 4 * size
+        nbytes = 8 * (4 + capacity * self.record_len)
+        self.owner = name is None
+        # the consumer owns the block, the producer in the worker only attaches to it
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes) if self.owner else attach(name)
+        self.name = self.shm.name
+        # [head, tail, dropped, spare]
+        self.counters = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((capacity, self.record_len), dtype=np.float64, buffer=self.shm.buf, offset=32)
+        if self.owner:
+            self.counters[:] = 0
+
+    def publish(self, contract_idx: int, update_id: int, bids: np.ndarray, asks: np.ndarray, features: np.ndarray) -> bool:
+        head = int(self.counters[0])
+        if head - int(self.counters[1]) >= self.capacity:
+            self.counters[2] += 1
+            return False
+        record = self.records[head % self.capacity]
+        n_bids = min(len(bids), self.size)
+        n_asks = min(len(asks), self.size)
+        record[0] = contract_idx
+        record[1] = update_id
+        record[2] = n_bids
+        record[3] = n_asks
+        record[4] = time.time()
+        offset = HEADER
+        record[offset:offset + N_FEATURES] = features
+        offset += N_FEATURES
+        record[offset:offset + 2 * n_bids] = bids[:n_bids].ravel()
+        offset += 2 * self.size
+        record[offset:offset + 2 * n_asks] = asks[:n_asks].ravel()
+        self.counters[0] = head + 1
+        return True
+
+    def pending(self) -> int:
+        return int(self.counters[0] - self.counters[1])
+
+    def read(self, index: int):
+        """
+        Returns (contract index, update id, bids, asks, features) for the record at `index`.
+        The arrays are views into shared memory, valid until the consumer advances past it.
+        """
+        record = self.records[index % self.capacity]
+        n_bids = int(record[2])
+        n_asks = int(record[3])
+        offset = HEADER + N_FEATURES
+        bids = record[offset:offset + 2 * n_bids].reshape(-1, 2)
+        offset += 2 * self.size
+        asks = record[offset:offset + 2 * n_asks].reshape(-1, 2)
+        return int(record[0]), int(record[1]), bids, asks, record[HEADER:HEADER + N_FEATURES]
+
+    def close(self) -> None:
+        # drop the numpy views first, SharedMemory refuses to close with exported buffers
+        del self.counters, self.records
+        self.shm.close()
+        if self.owner:
+            unlink(self.shm)
+
+
+def compute_features(bids: np.ndarray, asks: np.ndarray, depth: int) -> np.ndarray:
+    if len(bids) == 0 or len(asks) == 0:
+        return np.full(N_FEATURES, np.nan)
+    features = Features(bids, asks)
+    return np.array([
+        (bids[0, 0] + asks[0, 0]) / 2,
+        features.volume_weighted_mid_price(depth),
+        features.order_book_imbalance(depth),
+    ])
+
+
+def run_shard(contracts: List[str], contract_index: Dict[str, int], size: int, ring_name: str, ring_capacity: int, feature_depth: int, orderbook_kwargs: Dict) -> None:
+    """
+    Worker process entry point: maintains the books for `contracts` and publishes each update.
+    """
+    from orderbook_gateio import OrderbookGateio
+
+    ring = ShmRing(size, ring_capacity, name=ring_name)
+    orderbook_manager = OrderbookGateio(contracts=contracts, size=size, **orderbook_kwargs)
+
+    def publish(contract: str, bids: np.ndarray, asks: np.ndarray) -> None:
+        features = compute_features(bids, asks, feature_depth)
+        ring.publish(contract_index[contract], orderbook_manager.base_ids[contract] or 0, bids, asks, features)
+
+    orderbook_manager.on_update_callback = publish
+    # a stale book goes through the ring as a record without levels
+    empty = np.zeros((0, 2))
+    orderbook_manager.on_stale_callback = lambda contract: ring.publish(contract_index[contract], orderbook_manager.base_ids[contract] or 0, empty, empty, np.full(N_FEATURES, np.nan))
+
+    async def main():
+        try:
+            await orderbook_manager.run()
+        finally:
+            await orderbook_manager.cleanup()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+class ShardedOrderbookGateio:
+    """
+    Drop-in for OrderbookGateio that partitions contracts over `shards` worker processes.
+    Updates are delivered through the same on_update_callback(contract, bids, asks), with bids
+    and asks copied out of the ring so callbacks may keep them, and on_stale_callback(contract);
+    the latest published features per contract are kept in `features` as {'mid', 'vwmp', 'imbalance'}.
+    """
+
+    def __init__(self, contracts: List[str], size: int, shards: int = 2, ring_capacity: int = 4096, feature_depth: int = 5, poll_interval: float = 0.0005, max_batch: int = 256, **orderbook_kwargs) -> None:
+        self.contracts = contracts
+        self.size = size
+        self.shards = max(1, min(shards, len(contracts)))
+        self.ring_capacity = ring_capacity
+        self.feature_depth = feature_depth
+        self.poll_interval = poll_interval
+        # records delivered per poll; run() yields to the event loop between polls
+        self.max_batch = max_batch
+        self.orderbook_kwargs = orderbook_kwargs
+        self.contract_index = {contract: i for i, contract in enumerate(contracts)}
+        self.features: Dict[str, Dict[str, float]] = {contract: {} for contract in contracts}
+        self.update_ids: Dict[str, int] = {contract: 0 for contract in contracts}
+        self.rings: List[ShmRing] = []
+        self.processes: List[mp.Process] = []
+        self.running = False
+        self.on_update_callback: Optional[Callable[[str, np.ndarray, np.ndarray], None]] = None
+        self.on_stale_callback: Optional[Callable[[str], None]] = None
+
+    def start(self) -> None:
+        ctx = mp.get_context("spawn")
+        for i in range(self.shards):
+            ring = ShmRing(self.size, self.ring_capacity)
+            process = ctx.Process(
+                target=run_shard,
+                args=(self.contracts[i::self.shards], self.contract_index, self.size, ring.name, self.ring_capacity, self.feature_depth, self.orderbook_kwargs),
+                name=f"md-shard-{i}",
+                daemon=True,
+            )
+            process.start()
+            self.rings.append(ring)
+            self.processes.append(process)
+
+    def poll(self) -> int:
+        """
+        Delivers up to max_batch pending records, shared between the rings, to on_update_callback.
+        Returns the number delivered.
+        """
+        delivered = 0
+        per_ring = max(1, self.max_batch // max(1, len(self.rings)))
+        for ring in self.rings:
+            tail = int(ring.counters[1])
+            head = min(int(ring.counters[0]), tail + per_ring)
+            while tail < head:
+                idx, update_id, bids, asks, features = ring.read(tail)
+                contract = self.contracts[idx]
+                self.update_ids[contract] = update_id
+                latest = self.features[contract]
+                latest['mid'], latest['vwmp'], latest['imbalance'] = features
+                if not len(bids) and not len(asks):
+                    if self.on_stale_callback:
+                        self.on_stale_callback(contract)
+                elif self.on_update_callback:
+                    # the producer reuses the slot once tail moves past it
+                    self.on_update_callback(contract, bids.copy(), asks.copy())
+                tail += 1
+                ring.counters[1] = tail
+                delivered += 1
+        return delivered
+
+    def dropped(self) -> int:
+        return sum(int(ring.counters[2]) for ring in self.rings)
+
+    async def run(self) -> None:
+        self.running = True
+        if not self.processes:
+            self.start()
+        while self.running:
+            # yield after every batch too, a busy market must not starve the other tasks
+            await asyncio.sleep(0 if self.poll() else self.poll_interval)
+
+    async def cleanup(self) -> None:
+        print("Cleaning up ShardedOrderbookGateio...")
+        self.running = False
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+        for ring in self.rings:
+            ring.close()
+        self.processes.clear()
+        self.rings.clear()
+        print("ShardedOrderbookGateio cleanup completed")
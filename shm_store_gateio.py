@@ -0,0 +1,148 @@
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Tuple
+
+"""
+orderbooks in a named shared memory block, so other processes (quoting, risk, analytics) can
+read live books without IPC messages or load on the market data loop.
+
+layout, all little endian:
+    meta      int64[4]                        magic, n contracts, depth, name width
+    names     bytes[n_contracts, name width]  ascii contract names
+    headers   int64[n_contracts, 5]           seq, update id, exchange time ms, n bids, n asks
+    levels    float64[n_contracts, 2, depth, 2]  [contract][bids/asks][level][price, size]
+
+each contract is guarded by a seqlock: the writer makes `seq` odd, writes, then makes it even
+again. readers copy the contract out and retry if `seq` was odd or changed meanwhile.
+
+only the writer unlinks the block. readers take their attachment off the resource tracker, which
+would otherwise unlink the block when the first reader process exits.
+"""
+
+MAGIC = 0x67617465626B7331  # "gatebks1"
+NAME_WIDTH = 32
+SEQ, UPDATE_ID, EXCHANGE_TIME, N_BIDS, N_ASKS = range(5)
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Opens an existing block without handing it to this process's resource tracker (python < 3.13
+    registers every attachment, and the tracker unlinks what is registered when the process exits).
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def unlink(shm: shared_memory.SharedMemory) -> None:
+    """
+    Removes a block this process created. A reader started by multiprocessing shares our
+    resource tracker and its `attach` took the block off it, so it is put back first for
+    unlink to take off again.
+    """
+    resource_tracker.register(shm._name, "shared_memory")
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        # already removed by someone else
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+
+class SharedOrderbookStore:
+    """
+    Writer side creates the block with `contracts` and `depth`; readers attach with only `name`.
+    """
+
+    def __init__(self, name: Optional[str] = None, contracts: Optional[List[str]] = None, depth: int = 20) -> None:
+        self.owner = contracts is not None
+        if self.owner:
+            n = len(contracts)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.nbytes(n, depth))
+            meta = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+            meta[:] = [MAGIC, n, depth, NAME_WIDTH]
+            names = np.ndarray((n,), dtype=f"S{NAME_WIDTH}", buffer=self.shm.buf, offset=32)
+            names[:] = [contract.encode("ascii") for contract in contracts]
+        else:
+            self.shm = attach(name)
+            meta = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+            if meta[0] != MAGIC:
+                raise ValueError(f"Shared memory block {name} is not an orderbook store")
+            n, depth = int(meta[1]), int(meta[2])
+            names = np.ndarray((n,), dtype=f"S{NAME_WIDTH}", buffer=self.shm.buf, offset=32)
+
+        self.name = self.shm.name
+        self.depth = depth
+        self.contracts = [contract.decode("ascii") for contract in names]
+        self.index = {contract: i for i, contract in enumerate(self.contracts)}
+        offset = 32 + n * NAME_WIDTH
+        self.headers = np.ndarray((n, 5), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += self.headers.nbytes
+        self.levels = np.ndarray((n, 2, depth, 2), dtype=np.float64, buffer=self.shm.buf, offset=offset)
+        if self.owner:
+            self.headers[:] = 0
+            self.levels[:] = 0
+        self.retries = 0
+
+    @staticmethod
+    def nbytes(n_contracts: int, depth: int) -> int:
+        return 32 + n_contracts * NAME_WIDTH + 8 * n_contracts * 5 + 8 * n_contracts * 4 * depth
+
+    def write(self, contract: str, bids: np.ndarray, asks: np.ndarray, update_id: int, exchange_time: int = 0) -> None:
+        """
+        Publishes the top `depth` levels of a book. Single writer per contract.
+        """
+        i = self.index[contract]
+        header = self.headers[i]
+        levels = self.levels[i]
+        n_bids = min(len(bids), self.depth)
+        n_asks = min(len(asks), self.depth)
+
+        header[SEQ] += 1
+        levels[0, :n_bids] = bids[:n_bids]
+        levels[1, :n_asks] = asks[:n_asks]
+        header[UPDATE_ID] = update_id
+        header[EXCHANGE_TIME] = exchange_time
+        header[N_BIDS] = n_bids
+        header[N_ASKS] = n_asks
+        header[SEQ] += 1
+
+    def read_into(self, contract: str, bids_out: np.ndarray, asks_out: np.ndarray, max_retries: int = 1000) -> Tuple[int, int, int, int]:
+        """
+        Copies a consistent snapshot of a book into `bids_out`/`asks_out` (shape (depth, 2)).
+        Returns (n bids, n asks, update id, exchange time ms).
+        """
+        i = self.index[contract]
+        header = self.headers[i]
+        levels = self.levels[i]
+        for _ in range(max_retries):
+            seq = int(header[SEQ])
+            if seq & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            n_bids = int(header[N_BIDS])
+            n_asks = int(header[N_ASKS])
+            update_id = int(header[UPDATE_ID])
+            exchange_time = int(header[EXCHANGE_TIME])
+            bids_out[:n_bids] = levels[0, :n_bids]
+            asks_out[:n_asks] = levels[1, :n_asks]
+            if int(header[SEQ]) == seq:
+                return n_bids, n_asks, update_id, exchange_time
+            self.retries += 1
+        raise TimeoutError(f"Could not read a consistent book for {contract}")
+
+    def read(self, contract: str) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Returns (bids, asks, update id, exchange time ms) as fresh arrays.
+        """
+        bids = np.empty((self.depth, 2), dtype=np.float64)
+        asks = np.empty((self.depth, 2), dtype=np.float64)
+        n_bids, n_asks, update_id, exchange_time = self.read_into(contract, bids, asks)
+        return bids[:n_bids], asks[:n_asks], update_id, exchange_time
+
+    def close(self) -> None:
+        del self.headers, self.levels
+        self.shm.close()
+        if self.owner:
+            unlink(self.shm)
@@ -0,0 +1,667 @@
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import orjson
+from aiohttp import web, WSMsgType
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from endpoints_gateio import BaseEndpoint, GetLinks, PostLinks, WSLinks
+from scheduler_gateio import RATE_LIMITS, endpoint_group
+
+"""
+local stand-in for the gate.io usdt futures endpoints this project uses, with a synthetic market,
+a simple matching engine, injected latency/jitter and gate style rate limits. no keys or network.
+
+REST: order_book, spot/time, positions, orders (create / list open / cancel / amend), batch_orders, batch_cancel_orders,
+      batch_amend_orders
+WS:   futures.ping, futures.order_book_update, futures.orders, futures.usertrades, trading api (login, order_place,
+      order_batch_place, order_cancel, order_cancel_ids, order_amend)
+
+python sim_gateio.py --port 8080 --latency 0.002 --jitter 0.001 --contracts AERO_USDT:1.2:0.0001
+gateio_api_key=sim gateio_secret_key=sim gateio_rest_url=http://127.0.0.1:8080 gateio_ws_url=ws://127.0.0.1:8080/v4/ws/usdt python market_maker.py
+
+bench_market_maker.py runs the same stack against an in-process sim and reports tick-to-trade
+percentiles and 429 counts.
+
+signatures are not checked. the market is a random walk of the mid in ticks with `depth` synthetic
+levels either side; resting orders fill as makers when the synthetic book trades through their
+price, crossing orders fill immediately as takers.
+"""
+
+
+
+@dataclass
+class SimOrder:
+    id: int
+    contract: str
+    size: int  # signed, negative sells
+    left: int
+    tick: int
+    price: str
+    tif: str
+    text: str
+    create_time: float
+    update_time: float
+    status: str = 'open'
+    finish_as: str = ''
+    fill_price: str = '0'
+
+    def to_dict(self, succeeded: bool = True) -> Dict:
+        return {
+            'id': self.id,
+            'user': 1,
+            'contract': self.contract,
+            'create_time': self.create_time,
+            'update_time': self.update_time,
+            'finish_time': self.update_time if self.status == 'finished' else None,
+            'finish_as': self.finish_as,
+            'status': self.status,
+            'size': self.size,
+            'left': self.left,
+            'price': self.price,
+            'fill_price': self.fill_price,
+            'tif': self.tif,
+            'iceberg': 0,
+            'text': self.text,
+            'refu': 0,
+            'is_reduce_only': False,
+            'is_close': False,
+            'is_liq': False,
+            'stp_act': '-',
+            'stp_id': 0,
+            'amend_text': '-',
+            'biz_info': '-',
+            'tkfr': '0.0005',
+            'mkfr': '0.0002',
+            'succeeded': succeeded,
+        }
+
+
+@dataclass
+class SimContract:
+    name: str
+    tick_size: float
+    decimals: int
+    mid: int  # in ticks
+    bids: Dict[int, int] = field(default_factory=dict)  # synthetic liquidity, tick -> size
+    asks: Dict[int, int] = field(default_factory=dict)
+    published_bids: Dict[int, int] = field(default_factory=dict)  # last published book incl. our orders
+    published_asks: Dict[int, int] = field(default_factory=dict)
+    update_id: int = 1
+    position: int = 0
+    entry_price: float = 0.0
+
+    def price(self, tick: int) -> str:
+        return f"{tick * self.tick_size:.{self.decimals}f}"
+
+    def tick(self, price) -> int:
+        return int(round(float(price) / self.tick_size))
+
+
+class RateLimiter:
+    """
+    Fixed window request counters per endpoint group, reported with gate's
+    X-Gate-RateLimit-* headers.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]]) -> None:
+        self.limits = limits
+        self.windows: Dict[str, Tuple[float, int]] = {}
+        self.rejected: Dict[str, int] = {group: 0 for group in limits}
+
+    def hit(self, group: str) -> Tuple[bool, Dict[str, str]]:
+        limit, window = self.limits[group]
+        now = time.time()
+        start, count = self.windows.get(group, (now, 0))
+        if now - start >= window:
+            start, count = now, 0
+        count += 1
+        self.windows[group] = (start, count)
+        allowed = count <= limit
+        if not allowed:
+            self.rejected[group] += 1
+        headers = {
+            'X-Gate-RateLimit-Requests-Remain': str(max(0, limit - count)),
+            'X-Gate-RateLimit-Limit': str(limit),
+            'X-Gate-RateLimit-Reset-Timestamp': str(int((start + window) * 1000)),
+        }
+        return allowed, headers
+
+
+class SimGateio:
+    def __init__(
+        self,
+        contracts: Optional[Dict[str, Tuple[float, float]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        depth: int = 20,
+        update_interval: float = 0.02,
+        volatility: float = 0.3,
+        rate_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        contracts maps name -> (start price, tick size). latency and jitter (seconds) delay every
+        REST response and every websocket push by latency + uniform(0, jitter).
+        """
+        contracts = contracts or {"BTC_USDT": (60000.0, 0.1), "ETH_USDT": (3000.0, 0.01)}
+        self.contracts: Dict[str, SimContract] = {}
+        for name, (price, tick_size) in contracts.items():
+            decimals = max(0, len(f"{tick_size:f}".rstrip('0').split('.')[1]) if '.' in f"{tick_size:f}" else 0)
+            self.contracts[name] = SimContract(name, tick_size, decimals, int(round(price / tick_size)))
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.depth = depth
+        self.update_interval = update_interval
+        self.volatility = volatility
+        self.rate_limiter = RateLimiter(rate_limits or RATE_LIMITS)
+        self.random = random.Random(seed)
+
+        self.get_links = GetLinks()
+        self.post_links = PostLinks()
+        self.ws_links = WSLinks()
+        self.order_ids = itertools.count(100_000_000)
+        self.trade_ids = itertools.count(1)
+        self.orders: Dict[int, SimOrder] = {}
+        self.open_orders: Dict[int, SimOrder] = {}
+        # ws client -> (outgoing queue, subscribed book contracts, subscribed to user trades)
+        self.clients: Dict[web.WebSocketResponse, Tuple[asyncio.Queue, Set[str], Set[str]]] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.market_task: Optional[asyncio.Task] = None
+
+        for contract in self.contracts.values():
+            self.rebuild_synthetic(contract, refresh=1.0)
+            contract.published_bids, contract.published_asks = self.published(contract)
+
+    # ---- market
+
+    def delay(self) -> float:
+        return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def rebuild_synthetic(self, contract: SimContract, refresh: float = 0.2) -> None:
+        bids = {}
+        asks = {}
+        for k in range(1, self.depth + 1):
+            bid_tick = contract.mid - k
+            ask_tick = contract.mid + k
+            bids[bid_tick] = contract.bids[bid_tick] if bid_tick in contract.bids and self.random.random() > refresh else self.random.randint(1, 500)
+            asks[ask_tick] = contract.asks[ask_tick] if ask_tick in contract.asks and self.random.random() > refresh else self.random.randint(1, 500)
+        contract.bids = bids
+        contract.asks = asks
+
+    def published(self, contract: SimContract) -> Tuple[Dict[int, int], Dict[int, int]]:
+        bids = dict(contract.bids)
+        asks = dict(contract.asks)
+        for order in self.open_orders.values():
+            if order.contract == contract.name:
+                side = bids if order.size > 0 else asks
+                side[order.tick] = side.get(order.tick, 0) + abs(order.left)
+        return bids, asks
+
+    def step(self, contract: SimContract) -> None:
+        move = self.random.random()
+        if move < self.volatility / 2:
+            contract.mid -= 1
+        elif move < self.volatility:
+            contract.mid += 1
+        self.rebuild_synthetic(contract)
+
+        # the synthetic book trading through our resting orders fills them as makers
+        best_bid = contract.mid - 1
+        best_ask = contract.mid + 1
+        for order in list(self.open_orders.values()):
+            if order.contract != contract.name:
+                continue
+            if (order.size > 0 and order.tick >= best_ask) or (order.size < 0 and order.tick <= best_bid):
+                self.fill(order, order.tick, 'maker')
+
+        self.publish_book(contract)
+
+    def publish_book(self, contract: SimContract) -> None:
+        bids, asks = self.published(contract)
+        bid_changes = self.diff(contract, contract.published_bids, bids)
+        ask_changes = self.diff(contract, contract.published_asks, asks)
+        contract.published_bids, contract.published_asks = bids, asks
+        if not bid_changes and not ask_changes:
+            return
+        contract.update_id += 1
+        now = time.time()
+        message = {
+            'time': int(now),
+            'time_ms': int(now * 1000),
+            'channel': self.ws_links.orderbook_update,
+            'event': 'update',
+            'result': {
+                't': int(now * 1000),
+                's': contract.name,
+                'U': contract.update_id,
+                'u': contract.update_id,
+                'b': bid_changes,
+                'a': ask_changes,
+            },
+        }
+        self.broadcast(message, contract=contract.name)
+
+    @staticmethod
+    def diff(contract: SimContract, old: Dict[int, int], new: Dict[int, int]) -> List[Dict]:
+        changes = [{'p': contract.price(tick), 's': size} for tick, size in new.items() if old.get(tick) != size]
+        changes += [{'p': contract.price(tick), 's': 0} for tick in old if tick not in new]
+        return changes
+
+    async def run_market(self) -> None:
+        while True:
+            await asyncio.sleep(self.update_interval)
+            for contract in self.contracts.values():
+                self.step(contract)
+
+    # ---- orders
+
+    def fill(self, order: SimOrder, tick: int, role: str) -> None:
+        contract = self.contracts[order.contract]
+        size = order.left
+        price = contract.price(tick)
+        now = time.time()
+        order.left = 0
+        order.status = 'finished'
+        order.finish_as = 'filled'
+        order.fill_price = price
+        order.update_time = now
+        self.open_orders.pop(order.id, None)
+
+        new_position = contract.position + size
+        if contract.position == 0 or (contract.position > 0) == (size > 0):
+            contract.entry_price = (contract.entry_price * abs(contract.position) + float(price) * abs(size)) / abs(new_position)
+        elif new_position != 0 and (new_position > 0) != (contract.position > 0):
+            contract.entry_price = float(price)
+        contract.position = new_position
+
+        trade = {
+            'id': str(next(self.trade_ids)),
+            'create_time': int(now),
+            'create_time_ms': int(now * 1000),
+            'contract': order.contract,
+            'order_id': str(order.id),
+            'size': size,
+            'price': price,
+            'role': role,
+            'text': order.text,
+            'fee': 0.0,
+            'point_fee': 0,
+        }
+        self.broadcast({'time': int(now), 'time_ms': int(now * 1000), 'channel': self.ws_links.user_trades, 'event': 'update', 'result': [trade]}, private=self.ws_links.user_trades)
+        self.order_update(order)
+
+    def order_update(self, order: SimOrder) -> None:
+        now = time.time()
+        update = order.to_dict()
+        del update['succeeded']
+        self.broadcast({'time': int(now), 'time_ms': int(now * 1000), 'channel': self.ws_links.user_orders, 'event': 'update', 'result': [update]}, private=self.ws_links.user_orders)
+
+    def create(self, payload: Dict) -> Dict:
+        contract = self.contracts.get(payload.get('contract'))
+        if contract is None:
+            return {'label': 'CONTRACT_NOT_FOUND', 'message': f"contract {payload.get('contract')} not found", 'succeeded': False}
+        size = int(float(payload.get('size', 0)))
+        if payload.get('side') == 'sell' and size > 0:
+            size = -size
+        if size == 0:
+            return {'label': 'INVALID_PARAM_VALUE', 'message': 'size must not be 0', 'succeeded': False}
+        tick = contract.tick(payload.get('price', 0))
+        now = time.time()
+        order = SimOrder(
+            id=next(self.order_ids),
+            contract=contract.name,
+            size=size,
+            left=size,
+            tick=tick,
+            price=contract.price(tick),
+            tif=payload.get('tif', 'gtc'),
+            text=payload.get('text') or 'api',
+            create_time=now,
+            update_time=now,
+        )
+        self.orders[order.id] = order
+
+        best_bid = contract.mid - 1
+        best_ask = contract.mid + 1
+        crosses = (size > 0 and tick >= best_ask) or (size < 0 and tick <= best_bid)
+        if crosses and order.tif == 'poc':
+            order.status = 'finished'
+            order.finish_as = 'cancelled'
+            return {'label': 'ORDER_POC_IMMEDIATE', 'message': 'order would match immediately', 'succeeded': False, 'text': order.text}
+        if crosses:
+            self.fill(order, best_ask if size > 0 else best_bid, 'taker')
+        elif order.tif == 'ioc':
+            order.status = 'finished'
+            order.finish_as = 'ioc'
+            self.order_update(order)
+        else:
+            self.open_orders[order.id] = order
+            self.order_update(order)
+        self.publish_book(contract)
+        return order.to_dict()
+
+    def find(self, order_id) -> Optional[SimOrder]:
+        # like gate, a t- text only finds an order while it rests in the book
+        if isinstance(order_id, str) and order_id.startswith('t-'):
+            return next((order for order in self.open_orders.values() if order.text == order_id), None)
+        try:
+            return self.orders.get(int(order_id))
+        except (TypeError, ValueError):
+            return None
+
+    def cancel(self, order_id) -> Tuple[Optional[SimOrder], str]:
+        order = self.find(order_id)
+        if order is None:
+            return None, 'ORDER_NOT_FOUND'
+        if order.status != 'open':
+            return order, 'ORDER_FINISHED'
+        order.status = 'finished'
+        order.finish_as = 'cancelled'
+        order.update_time = time.time()
+        self.open_orders.pop(order.id, None)
+        self.order_update(order)
+        self.publish_book(self.contracts[order.contract])
+        return order, ''
+
+    def amend(self, payload: Dict, order_id=None) -> Dict:
+        order = self.find(order_id if order_id is not None else payload.get('order_id'))
+        if order is None:
+            return {'label': 'ORDER_NOT_FOUND', 'message': 'order not found', 'succeeded': False}
+        if order.status != 'open':
+            return {'label': 'ORDER_FINISHED', 'message': 'order finished', 'succeeded': False}
+        contract = self.contracts[order.contract]
+        if 'price' in payload:
+            order.tick = contract.tick(payload['price'])
+            order.price = contract.price(order.tick)
+        if 'size' in payload:
+            size = int(payload['size'])
+            if size != 0 and (size > 0) != (order.size > 0):
+                return {'label': 'INVALID_PARAM_VALUE', 'message': 'amend cannot change the order side', 'succeeded': False}
+            filled = order.size - order.left
+            order.size = size
+            order.left = size - filled
+            if abs(size) <= abs(filled):
+                order.left = 0
+                order.status = 'finished'
+                order.finish_as = 'cancelled'
+                self.open_orders.pop(order.id, None)
+        order.update_time = time.time()
+        if order.status == 'open':
+            best_bid = contract.mid - 1
+            best_ask = contract.mid + 1
+            if (order.size > 0 and order.tick >= best_ask) or (order.size < 0 and order.tick <= best_bid):
+                self.fill(order, best_ask if order.size > 0 else best_bid, 'taker')
+            else:
+                self.order_update(order)
+        else:
+            self.order_update(order)
+        self.publish_book(contract)
+        return order.to_dict()
+
+    # ---- rest
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        group = endpoint_group(request.method, request.path)
+        if group is None:
+            return await handler(request)
+
+        allowed, headers = self.rate_limiter.hit(group)
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        if not allowed:
+            return web.json_response({'label': 'TOO_MANY_REQUESTS', 'message': 'Request Rate limit Exceeded'}, status=429, headers=headers)
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    @staticmethod
+    def json(data, status: int = 200) -> web.Response:
+        return web.Response(body=orjson.dumps(data), status=status, content_type='application/json')
+
+    async def handle_order_book(self, request: web.Request) -> web.Response:
+        contract = self.contracts.get(request.query.get('contract'))
+        if contract is None:
+            return self.json({'label': 'CONTRACT_NOT_FOUND', 'message': 'contract not found'}, 400)
+        limit = int(request.query.get('limit', 10))
+        now = time.time()
+        bids = sorted(contract.published_bids.items(), reverse=True)[:limit]
+        asks = sorted(contract.published_asks.items())[:limit]
+        data = {
+            'current': now,
+            'update': now,
+            'asks': [{'p': contract.price(tick), 's': size} for tick, size in asks],
+            'bids': [{'p': contract.price(tick), 's': size} for tick, size in bids],
+        }
+        if request.query.get('with_id') == 'true':
+            data['id'] = contract.update_id
+        return self.json(data)
+
+    async def handle_server_time(self, request: web.Request) -> web.Response:
+        return self.json({'server_time': int(time.time() * 1000)})
+
+    async def handle_positions(self, request: web.Request) -> web.Response:
+        return self.json([
+            {
+                'contract': contract.name,
+                'size': contract.position,
+                'entry_price': str(contract.entry_price),
+                'mark_price': contract.price(contract.mid),
+                'leverage': '0',
+                'mode': 'single',
+            }
+            for contract in self.contracts.values()
+        ])
+
+    async def handle_list_orders(self, request: web.Request) -> web.Response:
+        status = request.query.get('status', 'open')
+        contract = request.query.get('contract')
+        limit = min(int(request.query.get('limit', 100)), 1000)
+        offset = int(request.query.get('offset', 0))
+        orders = self.open_orders.values() if status == 'open' else [o for o in self.orders.values() if o.status == status]
+        orders = [order for order in orders if contract is None or order.contract == contract]
+        return self.json([order.to_dict() for order in orders[offset:offset + limit]])
+
+    async def handle_create_order(self, request: web.Request) -> web.Response:
+        result = self.create(orjson.loads(await request.read()))
+        return self.json(result, 201 if result.get('succeeded') else 400)
+
+    async def handle_cancel_order(self, request: web.Request) -> web.Response:
+        order, error = self.cancel(request.match_info['order_id'])
+        if order is None:
+            return self.json({'label': error, 'message': 'order not found'}, 404)
+        return self.json(order.to_dict())
+
+    async def handle_amend_order(self, request: web.Request) -> web.Response:
+        result = self.amend(orjson.loads(await request.read()), request.match_info['order_id'])
+        return self.json(result, 200 if result.get('succeeded') else 400)
+
+    async def handle_batch_amend(self, request: web.Request) -> web.Response:
+        payload = orjson.loads(await request.read())
+        if len(payload) > 10:
+            return self.json({'label': 'TOO_MANY_ORDERS', 'message': 'at most 10 orders per batch'}, 400)
+        return self.json([self.amend(amend) for amend in payload])
+
+    async def handle_batch_orders(self, request: web.Request) -> web.Response:
+        payload = orjson.loads(await request.read())
+        if len(payload) > 20:
+            return self.json({'label': 'TOO_MANY_ORDERS', 'message': 'at most 20 orders per batch'}, 400)
+        return self.json([self.create(order) for order in payload])
+
+    async def handle_batch_cancel(self, request: web.Request) -> web.Response:
+        order_ids = orjson.loads(await request.read())
+        if len(order_ids) > 20:
+            return self.json({'label': 'TOO_MANY_ORDERS', 'message': 'at most 20 orders per batch'}, 400)
+        results = []
+        for order_id in order_ids:
+            order, error = self.cancel(order_id)
+            results.append({'id': str(order_id), 'user_id': 1, 'succeeded': not error, 'message': error})
+        return self.json(results)
+
+    # ---- websocket
+
+    def broadcast(self, message: Dict, contract: Optional[str] = None, private: Optional[str] = None) -> None:
+        frame = orjson.dumps(message)
+        due = time.monotonic() + self.delay()
+        for queue, contracts, channels in self.clients.values():
+            if (contract is not None and contract in contracts) or (private is not None and private in channels):
+                queue.put_nowait((due, frame))
+
+    async def sender(self, ws: web.WebSocketResponse, queue: asyncio.Queue) -> None:
+        # one sender per client keeps injected delays from reordering its frames
+        while True:
+            due, frame = await queue.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await ws.send_str(frame.decode())
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        queue: asyncio.Queue = asyncio.Queue()
+        contracts: Set[str] = set()
+        channels: Set[str] = set()
+        self.clients[ws] = (queue, contracts, channels)
+        sender = asyncio.create_task(self.sender(ws, queue))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT and msg.type != WSMsgType.BINARY:
+                    continue
+                data = orjson.loads(msg.data)
+                channel = data.get('channel')
+                now = int(time.time())
+                if channel == self.ws_links.ping:
+                    queue.put_nowait((0.0, orjson.dumps({'time': now, 'channel': self.ws_links.pong, 'event': '', 'result': None})))
+                    continue
+                if data.get('event') == 'api':
+                    for response in self.ws_api(channel, data.get('payload') or {}):
+                        queue.put_nowait((time.monotonic() + self.delay(), orjson.dumps(response)))
+                    continue
+                subscribe = data.get('event') == 'subscribe'
+                if channel == self.ws_links.orderbook_update:
+                    contract = (data.get('payload') or [None])[0]
+                    (contracts.add if subscribe else contracts.discard)(contract)
+                elif channel in (self.ws_links.user_trades, self.ws_links.user_orders):
+                    (channels.add if subscribe else channels.discard)(channel)
+                queue.put_nowait((0.0, orjson.dumps({'time': now, 'channel': channel, 'event': data.get('event'), 'error': None, 'result': {'status': 'success'}})))
+        finally:
+            sender.cancel()
+            self.clients.pop(ws, None)
+        return ws
+
+    def ws_api(self, channel: str, payload: Dict) -> List[Dict]:
+        """
+        Websocket trading api: an ack and then the result (or an error), tagged with the req_id.
+        """
+        req_id = payload.get('req_id')
+        param = payload.get('req_param')
+
+        def response(status: int, ack: bool = False, result=None, label: str = '', message: str = '') -> Dict:
+            return {
+                'request_id': req_id,
+                'ack': ack,
+                'header': {'response_time': str(int(time.time() * 1000)), 'status': str(status), 'channel': channel, 'event': 'api'},
+                'data': {'errors': {'label': label, 'message': message}} if label else {'result': result},
+            }
+
+        if channel == self.ws_links.login:
+            return [response(200, result={'api_key': payload.get('api_key'), 'uid': '1'})]
+        links = self.ws_links
+        group = 'cancel' if channel in (links.order_cancel, links.order_cancel_ids) else 'place'
+        if channel not in (links.order_place, links.order_batch_place, links.order_cancel, links.order_cancel_ids, links.order_amend):
+            return [response(400, label='INVALID_REQUEST', message=f'unknown channel {channel}')]
+        if not self.rate_limiter.hit(group)[0]:
+            return [response(429, label='TOO_MANY_REQUESTS', message='Request Rate limit Exceeded')]
+
+        ack = response(200, ack=True, result={'req_id': req_id, 'req_param': param})
+        if channel == links.order_place:
+            result = self.create(param)
+        elif channel == links.order_batch_place:
+            result = [self.create(order) for order in param]
+        elif channel == links.order_cancel:
+            order, error = self.cancel(param.get('order_id'))
+            result = {'label': error, 'message': error, 'succeeded': False} if error else order.to_dict()
+        elif channel == links.order_cancel_ids:
+            result = []
+            for order_id in param:
+                order, error = self.cancel(order_id)
+                result.append({'id': str(order_id), 'user_id': 1, 'succeeded': not error, 'message': error})
+        else:
+            result = self.amend(param)
+        if isinstance(result, dict) and result.get('succeeded') is False:
+            return [ack, response(400, label=result.get('label', ''), message=result.get('message', ''))]
+        return [ack, response(200, result=result)]
+
+    # ---- lifecycle
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(self.get_links.orderbook, self.handle_order_book)
+        app.router.add_get(self.get_links.server_time, self.handle_server_time)
+        app.router.add_get(self.get_links.get_positions, self.handle_positions)
+        app.router.add_get(self.get_links.open_orders, self.handle_list_orders)
+        app.router.add_post(self.post_links.create_order_single, self.handle_create_order)
+        app.router.add_delete(self.post_links.cancel_single_order, self.handle_cancel_order)
+        app.router.add_put(self.post_links.amend_order_single, self.handle_amend_order)
+        app.router.add_post(self.post_links.amend_order_batch, self.handle_batch_amend)
+        app.router.add_post(self.post_links.create_order_batch, self.handle_batch_orders)
+        app.router.add_post(self.post_links.cancel_order_batch, self.handle_batch_cancel)
+        app.router.add_get('/v4/ws/usdt', self.handle_ws)
+        return app
+
+    async def start(self) -> None:
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.market_task = asyncio.create_task(self.run_market())
+
+    def use(self) -> None:
+        """
+        Points BaseEndpoint at this simulator.
+        """
+        BaseEndpoint.use_local(self.host, self.port)
+
+    async def stop(self) -> None:
+        if self.market_task is not None:
+            self.market_task.cancel()
+        for ws in list(self.clients):
+            await ws.close()
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local gate.io futures simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response and push")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform extra delay in seconds")
+    parser.add_argument("--contracts", default="BTC_USDT:60000:0.1,ETH_USDT:3000:0.01", help="name:price:tick,...")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    contracts = {}
+    for spec in args.contracts.split(","):
+        name, price, tick = spec.split(":")
+        contracts[name] = (float(price), float(tick))
+
+    sim = SimGateio(contracts, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter, seed=args.seed)
+    await sim.start()
+    print(f"gate.io simulator on http://{args.host}:{args.port}, ws://{args.host}:{args.port}/v4/ws/usdt")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sim.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
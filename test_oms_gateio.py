@@ -0,0 +1,102 @@
+import asyncio
+import os
+import pytest
+from oms_gateio import OrderManagerGateio
+
+"""
+strategies against the simulator: each keeps its own orders, also across a restart.
+"""
+
+os.environ.setdefault('gateio_api_key', 'sim')
+os.environ.setdefault('gateio_secret_key', 'sim')
+
+
+def run(coro, port: int):
+    from sim_gateio import SimGateio
+
+    async def main():
+        sim = SimGateio(port=port, seed=1)
+        await sim.start()
+        sim.use()
+        try:
+            return await coro(sim)
+        finally:
+            await sim.stop()
+    return asyncio.run(main())
+
+
+def quotes(texts):
+    return [{'contract': 'BTC_USDT', 'size': 1, 'price': 50000 - i, 'side': 'buy', 'text': text} for i, text in enumerate(texts)]
+
+
+def test_strategies_stay_separate():
+    from order_submission_gateio import OrderSubmissionGateio
+
+    async def go(sim):
+        async with OrderSubmissionGateio() as submission:
+            await submission.submit_orders(quotes(['t-example-1', 't-example-2', 't-example-2']))
+            assert len(submission.get_live_orders('t-example-1')) == 1
+            assert len(submission.get_live_orders('t-example-2')) == 2
+            assert len(await submission.cancel_orders_by_strategy('t-example-1')) == 1
+            assert submission.get_live_orders('t-example-1') == []
+            assert len(submission.get_live_orders('t-example-2')) == 2
+            assert len(sim.open_orders) == 2
+    run(go, 18121)
+
+
+def test_strategies_come_back_after_restart():
+    from open_orders_gateio import OpenOrderReconciler
+    from order_submission_gateio import OrderSubmissionGateio
+
+    async def go(sim):
+        async with OrderSubmissionGateio() as submission:
+            submission.order_manager.register_strategy('market making', 'mm')
+            await submission.submit_orders(quotes(['t-example-1', 't-example-2', 'market making', '']))
+
+        oms = OrderManagerGateio()
+        oms.register_strategy('market making', 'mm')
+        async with OrderSubmissionGateio(order_manager=oms) as submission:
+            reconciler = OpenOrderReconciler(oms, ['BTC_USDT'], scheduler=submission.scheduler, grace=0.0)
+            reconciler.start()
+            await asyncio.sleep(0.1)
+            reconciler.request_sync()
+            await asyncio.sleep(0.3)
+            await reconciler.stop()
+            assert sorted(order.text for order in oms.live_orders.values()) == ['', 'market making', 't-example-1', 't-example-2']
+            assert len(await submission.cancel_orders_by_strategy('t-example-2')) == 1
+            assert len(submission.get_live_orders('t-example-1')) == 1
+    run(go, 18122)
+
+
+def test_lossy_strategies_are_refused():
+    oms = OrderManagerGateio()
+    assert oms.strategy_tag('t-example-1') == 'example-1'
+    assert oms.strategy_tag(None) is None
+    for text in ('mm', 't-a very long strategy', 't-' + 'x' * 15):
+        with pytest.raises(ValueError):
+            oms.strategy_tag(text)
+    oms.register_strategy('mm', 'mm')
+    assert oms.strategy_tag('mm') == 'mm'
+    with pytest.raises(ValueError):
+        oms.strategy_tag('t-mm')
+    with pytest.raises(ValueError):
+        oms.register_strategy('other', 'mm')
+
+
+def test_live_orders_by_text_and_side():
+    oms = OrderManagerGateio()
+    for i, (contract, side, text) in enumerate([
+        ('BTC_USDT', 'buy', 't-a'), ('BTC_USDT', 'sell', 't-a'), ('ETH_USDT', 'buy', 't-a'), ('BTC_USDT', 'buy', 't-b'),
+    ]):
+        internal_id = oms.create_order({'contract': contract, 'price': 100.0, 'size': 1 if side == 'buy' else -1, 'side': side, 'text': text})
+        oms.update_order_with_exchange_details(internal_id, {'id': str(i), 'create_time': 0.0, 'refu': 0, 'status': 'open'})
+
+    def ids(**filters):
+        return sorted(order.order_id for order in oms.get_live_orders(**filters))
+    assert ids(text='t-a') == ['0', '1', '2']
+    assert ids(text='t-a', side='buy') == ['0', '2']
+    assert ids(text='t-a', side='sell') == ['1']
+    assert ids(text='t-a', contract='BTC_USDT') == ['0', '1']
+    assert ids(text='t-a', contract='BTC_USDT', side='buy') == ['0']
+    assert ids(side='buy') == ['0', '2', '3']
+    assert ids(contract='BTC_USDT', side='buy') == ['0', '3']
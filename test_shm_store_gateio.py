@@ -0,0 +1,67 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+from shard_gateio import ShmRing, compute_features
+from shm_store_gateio import SharedOrderbookStore
+
+"""
+shared memory blocks must outlive the processes that attach to them: only the owner unlinks.
+"""
+
+READER = """
+import sys
+sys.path.insert(0, {path!r})
+from shm_store_gateio import SharedOrderbookStore
+store = SharedOrderbookStore({name!r})
+print(store.read('BTC_USDT')[2])
+store.close()
+"""
+
+
+def test_store_survives_reader_processes():
+    store = SharedOrderbookStore(contracts=['BTC_USDT'], depth=5)
+    store.write('BTC_USDT', np.array([[100.0, 1.0]]), np.array([[101.0, 2.0]]), update_id=7)
+    try:
+        # each reader is its own interpreter, with its own resource tracker
+        for _ in range(2):
+            reader = subprocess.run(
+                [sys.executable, '-c', READER.format(path=os.path.dirname(os.path.abspath(__file__)), name=store.name)],
+                capture_output=True, text=True, timeout=60,
+            )
+            assert reader.returncode == 0, reader.stderr
+            assert reader.stdout.strip() == '7'
+            assert 'leaked' not in reader.stderr
+    finally:
+        store.close()
+
+
+def test_store_close_after_block_is_gone():
+    store = SharedOrderbookStore(contracts=['BTC_USDT'], depth=5)
+    shared_memory.SharedMemory(name=store.name).unlink()
+    store.close()
+
+
+def produce(name: str, size: int, capacity: int, update_id: int) -> None:
+    ring = ShmRing(size, capacity, name=name)
+    bids = np.array([[100.0, 1.0]])
+    asks = np.array([[101.0, 2.0]])
+    ring.publish(0, update_id, bids, asks, compute_features(bids, asks, 5))
+    ring.close()
+
+
+def test_ring_survives_producer_processes():
+    ring = ShmRing(5, 16)
+    try:
+        for update_id in (1, 2):
+            producer = mp.get_context('spawn').Process(target=produce, args=(ring.name, 5, 16, update_id))
+            producer.start()
+            producer.join(60)
+            assert producer.exitcode == 0
+            assert ring.pending() == 1
+            assert ring.read(int(ring.counters[1]))[1] == update_id
+            ring.counters[1] += 1
+    finally:
+        ring.close()
@@ -0,0 +1,159 @@
+import asyncio
+import socket
+import time
+from typing import Optional
+import aiohttp
+from endpoints_gateio import BaseEndpoint, GetLinks
+from scheduler_gateio import INFO
+
+"""
+one long lived aiohttp session shared by every REST client (GetGateio, PostGateio and whatever
+holds them), so orders never pay a tcp + tls handshake on the critical path.
+
+the pool keeps connections alive, sockets get TCP_NODELAY and SO_KEEPALIVE, dns answers are
+cached, `warm` opens connections up front and a background probe touches them every
+`keepalive_interval` so the exchange and any middleboxes do not close them while we are idle.
+the session stays open for the life of the process (or event loop) once opened, whoever comes
+and goes; `close` it at shutdown.
+probes go through `scheduler` (a RequestScheduler, INFO lane) once one is set, so they never
+get ahead of orders or spend the public budget behind its back.
+"""
+
+
+def _socket_factory(addr_info) -> socket.socket:
+    family, type_, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    return sock
+
+
+class TransportGateio:
+    def __init__(
+        self,
+        limit: int = 64,
+        keepalive_timeout: float = 60.0,
+        dns_ttl: int = 300,
+        warm_connections: int = 4,
+        keepalive_interval: float = 20.0,
+        request_timeout: float = 10.0,
+    ) -> None:
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.warm_connections = warm_connections
+        self.keepalive_interval = keepalive_interval
+        self.request_timeout = request_timeout
+        self.get_links = GetLinks()
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.users = 0
+        self.lock = asyncio.Lock()
+        self.keepalive_task: Optional[asyncio.Task] = None
+        self.probes = 0
+        self.probe_failures = 0
+        self.last_probe_latency = 0.0
+        self.scheduler = None
+
+    def connector(self) -> aiohttp.TCPConnector:
+        kwargs = dict(
+            limit=self.limit,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+            enable_cleanup_closed=True,
+        )
+        try:
+            return aiohttp.TCPConnector(socket_factory=_socket_factory, **kwargs)
+        except TypeError:
+            # aiohttp < 3.11 has no socket_factory; it still sets TCP_NODELAY on every connection
+            return aiohttp.TCPConnector(**kwargs)
+
+    async def start(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # a session (and lock) belongs to the loop it was made on, e.g. a second asyncio.run
+            self.session = None
+            self.keepalive_task = None
+            self.lock = asyncio.Lock()
+            self.loop = loop
+        async with self.lock:
+            if self.session is None or self.session.closed:
+                self.session = aiohttp.ClientSession(
+                    connector=self.connector(),
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                )
+                await self.warm()
+            if self.keepalive_interval and self.keepalive_task is None:
+                self.keepalive_task = asyncio.create_task(self.keepalive())
+        return self.session
+
+    async def acquire(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session, opening and warming it for the first user.
+        """
+        session = await self.start()
+        self.users += 1
+        return session
+
+    async def release(self) -> None:
+        """
+        Gives the session back. It stays open, warm pooled connections are what the next user
+        came for, only the keepalive probes stop until someone acquires it again.
+        """
+        self.users = max(0, self.users - 1)
+        if self.users == 0 and self.keepalive_task is not None:
+            self.keepalive_task.cancel()
+            self.keepalive_task = None
+
+    async def probe(self) -> bool:
+        # the cheapest public call gate has; any answer means the connection is up
+        start = time.perf_counter()
+        try:
+            async with self.session.get(f"{BaseEndpoint.get}{self.get_links.server_time}") as response:
+                await response.read()
+                if self.scheduler is not None:
+                    self.scheduler.observe('GET', self.get_links.server_time, response.status, response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.probe_failures += 1
+            return False
+        self.probes += 1
+        self.last_probe_latency = time.perf_counter() - start
+        return True
+
+    async def warm(self) -> None:
+        """
+        Opens `warm_connections` pooled connections by probing them concurrently.
+        """
+        if self.scheduler is not None:
+            probe = lambda: self.scheduler.call(INFO, 'public', self.probe)
+        else:
+            probe = self.probe
+        await asyncio.gather(*(probe() for _ in range(self.warm_connections)))
+
+    async def keepalive(self) -> None:
+        while self.session is not None and not self.session.closed:
+            await asyncio.sleep(self.keepalive_interval)
+            await self.warm()
+
+    async def close(self) -> None:
+        if self.keepalive_task is not None:
+            self.keepalive_task.cancel()
+            self.keepalive_task = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+_shared: Optional[TransportGateio] = None
+
+
+def shared_transport() -> TransportGateio:
+    """
+    The process wide transport GetGateio and PostGateio use unless given their own.
+    """
+    global _shared
+    if _shared is None:
+        _shared = TransportGateio()
+    return _shared
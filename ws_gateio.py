@@ -1,4 +1,5 @@
 import asyncio
+import random
 import websockets
 from endpoints_gateio import BaseEndpoint, WSLinks
 import orjson
@@ -6,33 +7,239 @@ import os
 import time
 import hmac
 import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class WSConnection:
+    """
+    One websocket carrying a set of public subscriptions. Sends futures.ping heartbeats, closes
+    the socket if nothing (not even a pong) arrives within stale_timeout, and reconnects with
+    jittered exponential backoff, resubscribing and calling on_reconnect with its subscriptions.
+
+    A socket can keep answering pings after its feeds stop, so subscriptions on channels in
+    data_timeouts are also watched for data: one that goes that long without an update is passed
+    to on_stale (or, without one, the socket is reconnected). on_disconnect is called with the
+    subscriptions when a live socket drops.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        subscriptions: List[Tuple[str, list]],
+        on_message: Callable[[Dict], None],
+        on_reconnect: Optional[Callable[[List[Tuple[str, list]]], None]] = None,
+        ping_interval: float = 5.0,
+        stale_timeout: float = 15.0,
+        max_backoff: float = 30.0,
+        name: str = "ws",
+        data_timeouts: Optional[Dict[str, float]] = None,
+        on_stale: Optional[Callable[[List[Tuple[str, list]]], None]] = None,
+        on_disconnect: Optional[Callable[[List[Tuple[str, list]]], None]] = None,
+    ) -> None:
+        self.url = url
+        self.subscriptions = subscriptions
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self.ping_interval = ping_interval
+        self.stale_timeout = stale_timeout
+        self.max_backoff = max_backoff
+        self.name = name
+        self.ws_links = WSLinks()
+        # channel -> seconds a subscription on it may go without an update
+        self.data_timeouts = data_timeouts or {}
+        self.on_stale = on_stale
+        self.on_disconnect = on_disconnect
+
+        self.websocket = None
+        self.recorder = None
+        self.running = False
+        self.connected = False
+        self.connections = 0
+        self.reconnects = 0
+        self.stale_disconnects = 0
+        self.stale_feeds = 0
+        self.last_recv = 0.0
+        # (channel, first payload item) -> last update on a watched subscription; pongs do not count
+        self.last_data: Dict[Tuple[str, str], float] = {}
+        self.watched = {self.key(subscription): subscription for subscription in subscriptions if subscription[0] in self.data_timeouts}
+
+    async def run(self) -> None:
+        self.running = True
+        attempt = 0
+        while self.running:
+            connected_at = time.monotonic()
+            try:
+                async with websockets.connect(self.url) as websocket:
+                    self.websocket = websocket
+                    await self.subscribe(websocket)
+                    self.connected = True
+                    self.last_recv = time.monotonic()
+                    self.last_data = dict.fromkeys(self.watched, self.last_recv)
+                    self.connections += 1
+                    if self.connections > 1:
+                        self.reconnects += 1
+                        if self.on_reconnect:
+                            self.on_reconnect(self.subscriptions)
+
+                    heartbeat = asyncio.create_task(self.heartbeat(websocket))
+                    try:
+                        await self.receive(websocket)
+                    finally:
+                        heartbeat.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{self.name}: websocket error: {e}")
+            finally:
+                was_connected = self.connected
+                self.connected = False
+                self.websocket = None
+                if was_connected and self.running and self.on_disconnect:
+                    self.on_disconnect(self.subscriptions)
+
+            if not self.running:
+                break
+            # a connection that stayed up for a while resets the backoff
+            if time.monotonic() - connected_at > self.stale_timeout:
+                attempt = 0
+            delay = min(self.max_backoff, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+            attempt += 1
+            print(f"{self.name}: disconnected, reconnecting in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def subscribe(self, websocket) -> None:
+        for channel, payload in self.subscriptions:
+            subscribe_msg = {
+                "time": int(time.time()),
+                "channel": channel,
+                "event": "subscribe",
+                "payload": payload
+            }
+            await websocket.send(orjson.dumps(subscribe_msg))
+
+    @staticmethod
+    def key(subscription: Tuple[str, list]) -> Tuple[str, str]:
+        channel, payload = subscription
+        return channel, str(payload[0]) if payload else ''
+
+    def touch(self, data: Dict) -> None:
+        result = data.get('result')
+        if isinstance(result, list):
+            result = result[0] if result else None
+        contract = (result.get('s') or result.get('contract')) if isinstance(result, dict) else None
+        key = (data.get('channel'), contract)
+        if key in self.last_data:
+            self.last_data[key] = self.last_recv
+
+    async def receive(self, websocket) -> None:
+        pong = self.ws_links.pong
+        recorder = self.recorder
+        watched = bool(self.watched)
+        async for message in websocket:
+            self.last_recv = time.monotonic()
+            if recorder is not None:
+                recorder.record(message)
+            data = orjson.loads(message)
+            if data.get('channel') == pong:
+                continue
+            if watched and data.get('event') == 'update':
+                self.touch(data)
+            self.on_message(data)
+
+    def stale_subscriptions(self, now: float) -> List[Tuple[str, list]]:
+        stale = []
+        for key, subscription in self.watched.items():
+            if now - self.last_data.get(key, now) > self.data_timeouts[key[0]]:
+                stale.append(subscription)
+                self.last_data[key] = now  # reported once per timeout
+        return stale
+
+    async def heartbeat(self, websocket) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if time.monotonic() - self.last_recv > self.stale_timeout:
+                print(f"{self.name}: no data for {self.stale_timeout}s, reconnecting")
+                self.stale_disconnects += 1
+                await websocket.close()
+                return
+            stale = self.stale_subscriptions(time.monotonic())
+            if stale:
+                self.stale_feeds += len(stale)
+                if self.on_stale is None:
+                    print(f"{self.name}: no updates on {[self.key(subscription) for subscription in stale]}, reconnecting")
+                    await websocket.close()
+                    return
+                self.on_stale(stale)
+            await websocket.send(orjson.dumps({"time": int(time.time()), "channel": self.ws_links.ping}))
+
+    async def reconnect(self) -> None:
+        """
+        Drops the socket; run() connects again and resubscribes.
+        """
+        if self.websocket is not None:
+            await self.websocket.close()
+
+    async def close(self) -> None:
+        self.running = False
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+class PrivateWSConnection(WSConnection):
+    """
+    WSConnection for authenticated channels (futures.orders, futures.usertrades, ...): each
+    subscription is signed with the api secret, so they are restored on every reconnect too.
+    """
+
+    def __init__(self, url: str, subscriptions: List[Tuple[str, list]], on_message: Callable[[Dict], None], api_key: str, api_secret: str, **kwargs) -> None:
+        super().__init__(url, subscriptions, on_message, **kwargs)
+        self.api_key = api_key
+        self._hmac = hmac.new(api_secret.encode("utf8"), digestmod=hashlib.sha512)
+
+    def sign(self, channel: str, event: str, timestamp: int) -> str:
+        mac = self._hmac.copy()
+        mac.update(f"channel={channel}&event={event}&time={timestamp}".encode("utf8"))
+        return mac.hexdigest()
+
+    async def subscribe(self, websocket) -> None:
+        for channel, payload in self.subscriptions:
+            timestamp = int(time.time())
+            await websocket.send(orjson.dumps({
+                "time": timestamp,
+                "channel": channel,
+                "event": "subscribe",
+                "payload": payload,
+                "auth": {"method": "api_key", "KEY": self.api_key, "SIGN": self.sign(channel, "subscribe", timestamp)},
+            }))
 
 
 class WSGateio:
-    def __init__(self) -> None:
+    def __init__(self, num_connections: int = 1) -> None:
         self.base_endpoint = BaseEndpoint()
         self.ws_links = WSLinks()
         self.depth = "20"
         self.subscriptions = []
+        self.public_subscriptions: List[Tuple[str, list]] = []
         self.message_callback = None
+        # optional JournalWriter, every raw frame received on any subscription is appended to it
+        self.recorder = None
+        # called with the orderbook contracts of a socket after it reconnected and resubscribed
+        self.reconnect_callback: Optional[Callable[[List[str]], None]] = None
+        # called with the orderbook contracts of a socket that dropped; they get no updates until
+        # it is back and they are resynced
+        self.disconnect_callback: Optional[Callable[[List[str]], None]] = None
+        # called with orderbook contracts that had no update for data_timeout seconds. without a
+        # callback their socket is reconnected
+        self.stale_callback: Optional[Callable[[List[str]], None]] = None
+        self.data_timeout: Optional[float] = 30.0
+        self.num_connections = num_connections
+        self.ping_interval = 5.0
+        self.stale_timeout = 15.0
+        self.connections: List[WSConnection] = []
         # Get API keys from environment variables
         self.api_key = os.getenv('gateio_api_key')
         self.api_secret = os.getenv('gateio_secret_key')
 
-    async def _send_ping(self, interval, event):
-        while not event.wait(interval):
-            self.last_ping_tm = time.time()
-            if self.sock:
-                try:
-                    self.sock.ping()
-                except Exception as ex:
-                    print(ex)
-                    break
-                try:
-                    self._request("", auth_required=False)
-                except Exception as e:
-                    raise e
-    
     async def subscribe_public_trades(self, contract: str) -> None:
         ws_url = self.base_endpoint.ws
         async with websockets.connect(ws_url) as websocket:
@@ -46,10 +253,12 @@ class WSGateio:
             
             try:
                 response = await websocket.recv()
+                self._record(response)
                 print(f"Subscription response: {response}")
                 
                 while True:
                     message = await websocket.recv()
+                    self._record(message)
                     if self.message_callback:
                         self.message_callback(orjson.loads(message))
                     else:
@@ -76,6 +285,7 @@ class WSGateio:
             try:
                 while True:
                     recv = await websocket.recv()
+                    self._record(recv)
                     recv_json = orjson.loads(recv)
                     
                     # Check if the message is a candlestick update
@@ -94,38 +304,78 @@ class WSGateio:
 
             
     async def subscribe_orderbooks(self) -> None:
-        ws_url = self.base_endpoint.ws
-        async with websockets.connect(ws_url) as websocket:
-            for contract in self.subscriptions:
-                subscribe_msg = {
-                    "channel": self.ws_links.orderbook_update,
-                    "event": "subscribe",
-                    "payload": [contract, "20ms", self.depth]
-                }
-                await websocket.send(orjson.dumps(subscribe_msg))
+        await self.start_subscriptions()
 
-            try:
-                while True:
-                    recv = await websocket.recv()
-                    recv_json = orjson.loads(recv)
-                    if self.message_callback:
-                        self.message_callback(recv_json)
-                    else:
-                        print(f"Received: {recv_json}")
+    def add_orderbook_subscription(self, contract: str) -> None:
+        self.subscriptions.append(contract)
 
-            except websockets.ConnectionClosed:
-                print("WebSocket connection closed")
+    def add_public_subscription(self, channel: str, payload: list) -> None:
+        self.public_subscriptions.append((channel, payload))
 
-            except Exception as e:
-                print(f"Error: {e}")
-                await websocket.close()
-                raise e
+    def _record(self, message) -> None:
+        if self.recorder is not None:
+            self.recorder.record(message)
 
-    def add_orderbook_subscription(self, contract: str) -> None:
-        self.subscriptions.append(contract)
+    def _dispatch(self, data: Dict) -> None:
+        if self.message_callback:
+            self.message_callback(data)
+        else:
+            print(f"Received: {data}")
+
+    def _orderbook_contracts(self, subscriptions: List[Tuple[str, list]]) -> List[str]:
+        return [payload[0] for channel, payload in subscriptions if channel == self.ws_links.orderbook_update]
+
+    def _on_reconnect(self, subscriptions: List[Tuple[str, list]]) -> None:
+        if self.reconnect_callback:
+            self.reconnect_callback(self._orderbook_contracts(subscriptions))
+
+    def _on_disconnect(self, subscriptions: List[Tuple[str, list]]) -> None:
+        if self.disconnect_callback:
+            self.disconnect_callback(self._orderbook_contracts(subscriptions))
+
+    def _on_stale(self, subscriptions: List[Tuple[str, list]]) -> None:
+        self.stale_callback(self._orderbook_contracts(subscriptions))
+
+    async def reconnect(self, contract: str) -> None:
+        """
+        Reconnects the socket carrying the orderbook subscription of `contract`.
+        """
+        for connection in self.connections:
+            if contract in self._orderbook_contracts(connection.subscriptions):
+                await connection.reconnect()
 
     async def start_subscriptions(self) -> None:
-        await self.subscribe_orderbooks()
+        """
+        Spreads the orderbook and public subscriptions round-robin over num_connections
+        sockets and runs them until cleanup().
+        """
+        subscriptions = [(self.ws_links.orderbook_update, [contract, "20ms", self.depth]) for contract in self.subscriptions]
+        subscriptions += self.public_subscriptions
+        if not subscriptions:
+            return
+        n = max(1, min(self.num_connections, len(subscriptions)))
+        self.connections = [
+            WSConnection(
+                self.base_endpoint.ws,
+                subscriptions[i::n],
+                self._dispatch,
+                self._on_reconnect,
+                ping_interval=self.ping_interval,
+                stale_timeout=self.stale_timeout,
+                name=f"ws-{i}",
+                data_timeouts={self.ws_links.orderbook_update: self.data_timeout} if self.data_timeout else None,
+                on_stale=self._on_stale if self.stale_callback else None,
+                on_disconnect=self._on_disconnect,
+            )
+            for i in range(n)
+        ]
+        for connection in self.connections:
+            connection.recorder = self.recorder
+        await asyncio.gather(*(connection.run() for connection in self.connections))
+
+    async def cleanup(self) -> None:
+        for connection in self.connections:
+            await connection.close()
 
     #open user orders
     # async def subscribe_user_orders(self):
@@ -153,8 +403,8 @@ class WSGateio:
     #             else:
     #                 print(f"Received order update: {message}")
 
-    # def get_sign(self, message: str) -> str:
-    #     return hmac.new(self.api_secret.encode("utf8"), message.encode("utf8"), hashlib.sha512).hexdigest()
+    def get_sign(self, message: str) -> str:
+        return hmac.new(self.api_secret.encode("utf8"), message.encode("utf8"), hashlib.sha512).hexdigest()
 
 
 
@@ -176,7 +426,9 @@ class WSGateio:
         async with websockets.connect(ws_url) as websocket:
             await websocket.send(orjson.dumps(subscription))
             while True:
-                message = orjson.loads(await websocket.recv())
+                raw = await websocket.recv()
+                self._record(raw)
+                message = orjson.loads(raw)
                 if message.get("event") == "subscribe":
                     print("Subscribed to User Trades")
                 elif message.get("event") == "update":
@@ -207,6 +459,7 @@ class WSGateio:
             await websocket.send(orjson.dumps(subscription))
             while True:
                 message = await websocket.recv()
+                self._record(message)
                 if self.message_callback:
                     self.message_callback(orjson.loads(message))
                 else:
@@ -231,6 +484,7 @@ class WSGateio:
             await websocket.send(orjson.dumps(subscription))
             while True:
                 message = await websocket.recv()
+                self._record(message)
                 if self.message_callback:
                     self.message_callback(orjson.loads(message))
                 else:
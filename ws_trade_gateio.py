@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import os
+import time
+from typing import Any, Dict, List, Optional
+import orjson
+import websockets
+from dotenv import load_dotenv
+from endpoints_gateio import BaseEndpoint, WSLinks
+from ws_gateio import WSConnection
+
+"""
+gate.io futures websocket trading api: place / batch place / cancel / cancel ids / amend over an
+authenticated socket instead of https.
+
+every request carries a req_id; responses come back with it as request_id, first an ack
+(ack: true) and then the result, and the call's future resolves on the result. errors (status
+other than 200) raise WSTradeError with gate's label.
+"""
+
+
+class WSTradeError(Exception):
+    def __init__(self, label: str, message: str = "") -> None:
+        super().__init__(f"{label}: {message}")
+        self.label = label
+        self.message = message
+
+
+class WSTradeConnection(WSConnection):
+    """
+    WSConnection that logs in after connecting instead of subscribing to channels.
+    """
+
+    def __init__(self, client: "WSTradeGateio", **kwargs) -> None:
+        super().__init__(client.url, [], client.on_message, **kwargs)
+        self.client = client
+
+    async def subscribe(self, websocket) -> None:
+        await self.client.login(websocket)
+
+
+class WSTradeGateio:
+    def __init__(self, url: Optional[str] = None, timeout: float = 5.0, ping_interval: float = 5.0, stale_timeout: float = 15.0) -> None:
+        self.url = url or BaseEndpoint.ws
+        self.timeout = timeout
+        self.ws_links = WSLinks()
+
+        load_dotenv()
+        self.api_key = os.getenv('gateio_api_key')
+        api_secret = os.getenv('gateio_secret_key')
+        if not self.api_key or not api_secret:
+            raise ValueError("API key or secret not found in .env file")
+        self._hmac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha512)
+
+        self.req_ids = itertools.count(1)
+        self.req_prefix = f"{os.getpid()}-{int(time.time())}"
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.logged_in = asyncio.Event()
+        self.connection = WSTradeConnection(self, ping_interval=ping_interval, stale_timeout=stale_timeout, name="ws-trade")
+        self.task: Optional[asyncio.Task] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def sign(self, channel: str, req_param: bytes, timestamp: int) -> str:
+        mac = self._hmac.copy()
+        mac.update(b"api\n" + channel.encode() + b"\n" + req_param + b"\n" + str(timestamp).encode())
+        return mac.hexdigest()
+
+    def next_req_id(self) -> str:
+        return f"{self.req_prefix}-{next(self.req_ids)}"
+
+    async def login(self, websocket) -> None:
+        self.logged_in.clear()
+        timestamp = int(time.time())
+        req_id = self.next_req_id()
+        future = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = future
+        future.add_done_callback(self._on_login)
+        await websocket.send(orjson.dumps({
+            "time": timestamp,
+            "channel": self.ws_links.login,
+            "event": "api",
+            "payload": {
+                "api_key": self.api_key,
+                "signature": self.sign(self.ws_links.login, b"", timestamp),
+                "timestamp": str(timestamp),
+                "req_id": req_id,
+            },
+        }))
+
+    def _on_login(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.logged_in.set()
+        elif not future.cancelled():
+            print(f"ws-trade: login failed: {future.exception()}")
+
+    async def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.connection.run())
+        await asyncio.wait_for(self.logged_in.wait(), self.timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self.connection.connected and self.logged_in.is_set()
+
+    def on_message(self, data: Dict) -> None:
+        req_id = data.get('request_id')
+        if req_id is None or data.get('ack'):
+            return
+        future = self.pending.pop(req_id, None)
+        if future is None or future.done():
+            return
+        header = data.get('header') or {}
+        body = data.get('data') or {}
+        if str(header.get('status', '200')) != '200' or body.get('errors'):
+            errors = body.get('errors') or {}
+            self.errors += 1
+            future.set_exception(WSTradeError(errors.get('label', str(header.get('status'))), errors.get('message', '')))
+        else:
+            future.set_result(body.get('result'))
+
+    async def request(self, channel: str, req_param: Any) -> Any:
+        """
+        Sends one trading api request and waits for its result.
+        """
+        websocket = self.connection.websocket
+        if websocket is None or not self.logged_in.is_set():
+            raise ConnectionError("ws-trade: not connected")
+        req_id = self.next_req_id()
+        future = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = future
+        self.requests += 1
+        try:
+            await websocket.send(orjson.dumps({
+                "time": int(time.time()),
+                "channel": channel,
+                "event": "api",
+                "payload": {"req_id": req_id, "req_param": req_param},
+            }))
+        except websockets.ConnectionClosed as e:
+            # nothing reached the exchange, so the caller can safely retry elsewhere
+            self.pending.pop(req_id, None)
+            raise ConnectionError(f"ws-trade: {e}") from e
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.pending.pop(req_id, None)
+
+    async def place_order(self, order: Dict) -> Dict:
+        return await self.request(self.ws_links.order_place, order)
+
+    async def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        return await self.request(self.ws_links.order_batch_place, orders)
+
+    async def cancel_order(self, order_id: str) -> Dict:
+        return await self.request(self.ws_links.order_cancel, {"order_id": str(order_id)})
+
+    async def cancel_orders(self, order_ids: List[str]) -> List[Dict]:
+        return await self.request(self.ws_links.order_cancel_ids, [str(order_id) for order_id in order_ids])
+
+    async def amend_order(self, order_id: str, price: Optional[float] = None, size: Optional[float] = None, amend_text: str = '') -> Dict:
+        req_param = {"order_id": str(order_id)}
+        if price is not None:
+            req_param["price"] = str(price)
+        if size is not None:
+            req_param["size"] = int(size)
+        if amend_text:
+            req_param["amend_text"] = amend_text
+        return await self.request(self.ws_links.order_amend, req_param)
+
+    async def close(self) -> None:
+        await self.connection.close()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for future in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()